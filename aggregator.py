@@ -3,26 +3,45 @@ import re
 import base64
 import json
 import time
-import random
 import logging
 import threading
 import queue
-import hashlib # [新增] 用于特征哈希计算
-from urllib.parse import quote
-from typing import List, Set, Dict, Any, Optional, Union
+import math
+import itertools
+import codecs
+import asyncio
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor, Future
+from collections import Counter, defaultdict
+from urllib.parse import quote, urlsplit
+from typing import List, Set, Dict, Any, Optional, Union, Tuple, NamedTuple
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from node_model import safe_base64_decode, node_fingerprint, fingerprint_digest, FingerprintSet
+from yield_stats import SearchStats, SourceReputation, combo_key, source_key, save_node_sources, NODE_SOURCES_FILE
+
 # 尝试导入 PyYAML，如果未安装则降级处理
 try:
     import yaml
 except ImportError:
     yaml = None
 
+# 尝试导入 aiohttp，未安装时 asyncio 下载引擎不可用，回退到线程池
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 # --- 配置部分 ---
 
+# 服务地址：默认指向 GitHub，可通过环境变量改为本地替身服务 (见 benchmarks/github_standin.py)
+GITHUB_API_URL: str = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+RAW_CONTENT_URL: str = os.environ.get("GITHUB_RAW_URL", "https://raw.githubusercontent.com").rstrip("/")
+
 # 关键词列表：已优化，保留高价值关键词，移除冗余项以节省请求次数
 KEYWORDS: List[str] = [
     "proxies", "clash", "subscription", "vmess://", "vless://", 
@@ -34,17 +53,61 @@ KEYWORDS: List[str] = [
 EXTENSIONS: List[str] = ["yaml", "yml", "txt", "conf", "json"]
 
 MAX_PAGES: int = 3            # 每个关键词搜索的页数
-SEARCH_INTERVAL: float = 3.0  # 搜索请求的基础间隔(秒)，配合重试机制使用
+PER_PAGE: int = 20            # 每页结果数
+# 结果集分片：total_count 超过单个查询可翻页范围时，用 size: 范围把结果集切成互不重叠的分片
+MAX_SLICES: int = 8           # 每个关键词+后缀组合最多的分片数
+SIZE_RANGE_MAX: int = 384 * 1024 # GitHub 代码搜索只索引小于 384KB 的文件
+SEARCH_INTERVAL: float = 1.0  # 搜索请求的最小间隔(秒)，实际节奏由 GitHub 速率限制响应头决定
+SECONDARY_LIMIT_BACKOFF: float = 60.0 # 无任何响应头指示的次级限流，首次退避时长(秒)，之后逐次翻倍
+SECONDARY_LIMIT_MAX_BACKOFF: float = 600.0 # 次级限流单次退避上限(秒)
 MAX_EXECUTION_TIME: int = 3600 # 全局最大运行时间 (1小时)
 TIMEOUT: int = 10             # 单个文件下载超时时间 (秒)
 DOWNLOAD_WORKERS: int = 10    # 下载线程数 (设置为10以降低并发风控风险)
 
+# asyncio 下载引擎：单线程事件循环 + keep-alive 连接池，同时保持数百个 raw 下载在途
+ASYNC_DOWNLOAD: bool = True   # 启用 asyncio 引擎 (需要 aiohttp，不可用时自动回退线程池)
+ASYNC_CONCURRENCY: int = 200  # 全局在途下载数上限
+PER_HOST_LIMIT: int = ASYNC_CONCURRENCY # 单主机并发连接上限 (下载几乎全部指向 raw 主机，低于全局上限时在途数实际受其限制)
+
+# 流式下载：分块读取并增量扫描链接，超大文件/二进制文件提前中止，避免内存峰值
+STREAM_DOWNLOAD: bool = True
+STREAM_CHUNK_SIZE: int = 64 * 1024
+MAX_FILE_BYTES: int = 8 * 1024 * 1024  # 单文件字节上限
+BINARY_SNIFF_BYTES: int = 1024         # 首块中检测 NUL 字节的范围
+BINARY_CONTENT_TYPES = ("image/", "audio/", "video/", "font/", "application/zip", "application/gzip", "application/pdf")
+
+# 解析进程池：YAML/正则/哈希等 CPU 密集工作移出下载线程，避免持有 GIL 拖慢 I/O
+PARSE_WORKERS: int = max((os.cpu_count() or 1) - 1, 1) # 解析进程数 (<=1 时在下载线程内直接解析)
+PARSE_BATCH_SIZE: int = 16    # 每批提交给子进程的文件数
+PARSE_BATCH_WAIT: float = 0.5 # 批次未满时的最长等待 (秒)
+
+# 跨运行持久化缓存目录 (工作流通过 actions/cache 保存与恢复)
+CACHE_DIR: str = ".cache"
+BLOB_CACHE_FILE: str = os.path.join(CACHE_DIR, "blob_cache.json")
+BLOB_CACHE_MAX_ENTRIES: int = 50000  # 缓存条目上限，超出时淘汰最久未命中的文件
+# 提取逻辑版本：修改 NodeExtractor / LINK_PATTERN 等会改变提取结果的逻辑时加 1，
+# 文件缓存中由旧版本 (或不同 MAX_FILE_BYTES) 得出的结果在加载时整体丢弃，相关文件重新下载提取
+EXTRACTOR_VERSION: int = 2
+
 OUTPUT_FILE: str = "sub.txt"
 RAW_OUTPUT_FILE: str = "nodes.txt"
 
 # 增强型正则：支持标准协议头，以及 #备注 和 [] 包裹的 IPv6
 LINK_PATTERN = re.compile(r'(?:vmess|vless|ss|trojan|hysteria2|hy2)://[a-zA-Z0-9+/=_@.:?&%#\[\]-]+')
 
+# 格式嗅探：只检查文件头部即可决定唯一的提取路径
+SNIFF_HEAD_CHARS: int = 4096
+FORMAT_LINKS, FORMAT_BASE64, FORMAT_YAML, FORMAT_JSON = "links", "base64", "yaml", "json"
+BASE64_HEAD_PATTERN = re.compile(r'[A-Za-z0-9+/=_\-\s]+')
+YAML_LIST_HEAD_PATTERN = re.compile(r'^\s*-\s*\{?\s*name\s*:', re.M)
+YAML_PROXIES_KEY_PATTERN = re.compile(r'^proxies\s*:', re.M) # 顶层 proxies 键 (Clash 配置)
+PROXIES_SNIFF_CHARS: int = 64 * 1024 # 查找 proxies 键的范围 (Clash 配置中 proxies 之前通常只有端口、DNS 等少量设置)
+
+# 流式扫描时保留的块尾长度，覆盖最长的协议头 (hysteria2://)，保证跨块链接不被截断
+LINK_PREFIX_CARRY: int = 16
+# 跨块链接的最大暂存长度，防止异常长的匹配无限累积
+LINK_CARRY_LIMIT: int = 64 * 1024
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -52,107 +115,258 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class NodeAggregator:
-    def __init__(self, token: Optional[str]):
-        self.github_token = token
-        self.nodes: Set[str] = set()
-        self.seen_hashes: Set[str] = set() # [新增] 用于特征值去重的哈希集合
-        self.nodes_lock = threading.Lock() # 线程锁，保护集合写入安全
-        
-        # 初始化 Session (包含连接池优化)
-        self.session = self._init_session()
-        self._setup_headers()
-        
-        self.start_time = time.time()
-        self.should_stop = False # 全局停止标志
-        
-        # 任务队列 (生产者-消费者模型核心)
-        self.url_queue = queue.Queue()
-        
-        # 策略调整
-        if token:
-            self.sleep_interval = SEARCH_INTERVAL
+class FileTask(NamedTuple):
+    """下载队列中的一个文件"""
+    raw_url: str
+    cache_key: str
+    combo: str      # 命中该文件的 关键词|后缀 组合，用于产出统计
+    source: str     # 仓库:路径，用于来源信誉统计
+
+class StreamingLinkScanner:
+    """对分块到达的文本增量执行 LINK_PATTERN，跨越块边界的链接暂存到下一块再判定"""
+
+    def __init__(self):
+        self.carry = ""
+        self.links: List[str] = []
+
+    def feed(self, text: str) -> None:
+        buf = self.carry + text
+        scan_end = len(buf)
+        last_end = 0
+        for match in LINK_PATTERN.finditer(buf):
+            # 匹配一直延伸到块尾：链接可能在下一块继续，留待下次判定
+            if match.end() == len(buf) and len(buf) - match.start() < LINK_CARRY_LIMIT:
+                scan_end = match.start()
+                break
+            self.links.append(match.group())
+            last_end = match.end()
+        if scan_end < len(buf):
+            self.carry = buf[scan_end:]
         else:
-            self.sleep_interval = 15.0 # 无 Token 必须非常慢
-            logger.warning("未检测到 Token，将使用极低速模式 (15s/req) 以免被封锁")
+            # 保留块尾少量字符，以便拼出被切开的协议头
+            self.carry = buf[max(last_end, len(buf) - LINK_PREFIX_CARRY):]
 
-        if not yaml:
-            logger.warning("未检测到 PyYAML 库，YAML 解析功能将不可用。建议安装 PyYAML。")
+    def close(self) -> List[str]:
+        if self.carry:
+            self.links.extend(LINK_PATTERN.findall(self.carry))
+            self.carry = ""
+        return self.links
 
-    def _init_session(self) -> requests.Session:
-        """初始化 Session，显式设置连接池大小以消除 'Connection pool is full' 警告"""
-        session = requests.Session()
-        retry = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[500, 502, 503, 504],
-            allowed_methods=["GET"]
-        )
-        # [关键优化] pool_connections = DOWNLOAD_WORKERS
-        # 确保每个线程都有独立的连接可用，无需频繁建立/关闭 TCP 连接
-        adapter = HTTPAdapter(
-            max_retries=retry,
-            pool_connections=DOWNLOAD_WORKERS, 
-            pool_maxsize=DOWNLOAD_WORKERS
-        )
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
+class StreamingBody:
+    """
+    流式下载的分块消费者 (线程池与 asyncio 引擎共用)：
+    首块判定为明文链接时边下边扫、不保留原文；其余格式在字节上限内缓存原文交给完整解析。
+    """
 
-    def _setup_headers(self) -> None:
-        self.session.headers.update({
-            "Accept": "application/vnd.github.v3+json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        })
-        if self.github_token:
-            self.session.headers["Authorization"] = f"token {self.github_token}"
-            logger.info("GitHub Token 已加载")
+    def __init__(self, encoding: Optional[str] = None):
+        self.encoding = encoding
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self.scanner: Optional[StreamingLinkScanner] = None
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.aborted: Optional[str] = None # 中止原因: binary / oversize
 
-    def check_timeout(self) -> bool:
-        """检查是否达到最大执行时间"""
-        if time.time() - self.start_time > MAX_EXECUTION_TIME:
+    def accept_headers(self, content_type: Optional[str], content_length: Optional[str]) -> bool:
+        """根据响应头提前拒绝二进制或超限文件，返回是否继续读取正文"""
+        if content_type and content_type.lower().startswith(BINARY_CONTENT_TYPES):
+            self.aborted = "binary"
+        elif content_length and content_length.isdigit() and int(content_length) > MAX_FILE_BYTES:
+            self.aborted = "oversize"
+        return self.aborted is None
+
+    def feed(self, chunk: bytes) -> bool:
+        """消费一个数据块，返回 False 表示应中止下载"""
+        if not chunk:
             return True
-        return False
+        if self.size == 0 and b'\x00' in chunk[:BINARY_SNIFF_BYTES]:
+            self.aborted = "binary"
+            return False
+        self.size += len(chunk)
+        if self.size > MAX_FILE_BYTES:
+            self.aborted = "oversize"
+            return False
+
+        if self.scanner is None and not self.chunks:
+            try:
+                self.decoder = codecs.getincrementaldecoder(self.encoding or 'utf-8')(errors='ignore')
+            except LookupError:
+                pass
+            text = self.decoder.decode(chunk)
+            head = text[:SNIFF_HEAD_CHARS].lstrip()
+            # 只有以链接开头且没有顶层 proxies 键的内容才按明文链接流式扫描，其余缓存原文走完整解析
+            if LINK_PATTERN.match(head) and not YAML_PROXIES_KEY_PATTERN.search(text, 0, PROXIES_SNIFF_CHARS):
+                self.scanner = StreamingLinkScanner()
+                self.scanner.feed(text)
+                return True
+            self.chunks.append(chunk)
+        elif self.scanner is not None:
+            self.scanner.feed(self.decoder.decode(chunk))
+        else:
+            self.chunks.append(chunk)
+        return True
+
+class SearchRateLimiter:
+    """
+    由 GitHub 速率限制响应头驱动的令牌桶 (仅供搜索生产者单线程使用)：
+    额度充足时按最小间隔连续发送；额度耗尽时精确休眠到 X-RateLimit-Reset；
+    403/429 优先遵循 Retry-After，只有没有任何响应头指示的次级限流才指数退避。
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None   # 令牌数：以响应头为准，两次响应之间本地扣减
+        self.reset_at: Optional[float] = None
+        self.last_request = 0.0
+        self.backoff_level = 0
+        self.throttled_seconds = 0.0           # 因限流而等待的总时长，用于评估搜索效率
+
+    def update(self, headers: Any) -> None:
+        """根据响应头校正令牌数与重置时间"""
+        try:
+            if headers.get("X-RateLimit-Limit") is not None:
+                self.limit = int(headers["X-RateLimit-Limit"])
+            if headers.get("X-RateLimit-Remaining") is not None:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if headers.get("X-RateLimit-Reset") is not None:
+                self.reset_at = float(headers["X-RateLimit-Reset"])
+        except (TypeError, ValueError):
+            pass
+
+    def next_delay(self) -> float:
+        """发出下一个请求前需要等待的秒数"""
+        now = time.time()
+        delay = max(0.0, self.last_request + self.min_interval - now)
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at:
+            delay = max(delay, self.reset_at - now + 1.0)
+        return delay
+
+    def acquire(self, deadline: float) -> bool:
+        """取得一个令牌 (必要时休眠)，若等待会越过截止时间则返回 False"""
+        delay = self.next_delay()
+        if time.time() + delay > deadline:
+            return False
+        self.sleep(delay)
+        self.last_request = time.time()
+        if self.remaining is not None:
+            self.remaining -= 1
+        return True
+
+    def sleep(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        if seconds > self.min_interval:
+            self.throttled_seconds += seconds
+        time.sleep(seconds)
+
+    def throttle_delay(self, headers: Any) -> Tuple[float, bool]:
+        """
+        403/429 后应等待的秒数，以及该等待是否有响应头依据
+        (无依据的次级限流按 SECONDARY_LIMIT_BACKOFF 指数退避)
+        """
+        self.update(headers)
+        retry_after = headers.get("Retry-After")
+        if retry_after and str(retry_after).isdigit():
+            return float(retry_after), True
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at:
+            return max(self.reset_at - time.time() + 1.0, 1.0), True
+        delay = SECONDARY_LIMIT_BACKOFF * (2 ** self.backoff_level)
+        if delay >= SECONDARY_LIMIT_MAX_BACKOFF:
+            return SECONDARY_LIMIT_MAX_BACKOFF, False
+        self.backoff_level += 1
+        return delay, False
+
+    def on_success(self) -> None:
+        """一页搜索成功后重置次级限流的退避级别"""
+        self.backoff_level = 0
+
+class BlobCache:
+    """
+    跨运行的文件级缓存：以 blob sha (无 sha 时退化为 raw URL) 为键，保存该文件已提取出的节点。
+    同时维护 raw URL -> 键 的索引，未变化的 GitHub 文件无需再次下载。
+    缓存文件记录写入时的 EXTRACTOR_VERSION 与 MAX_FILE_BYTES，任一不同时旧条目全部作废
+    (二进制/超限文件记为空结果，字节上限调整后同样需要重新判定)。
+    """
+
+    def __init__(self, path: str, max_entries: int = BLOB_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict[str, Any]] = {}  # key -> {"nodes": [...], "ts": 最近命中时间}
+        self.url_index: Dict[str, str] = {}           # raw_url -> key
+        self.hits = 0
+        self.lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key_for(raw_url: str, sha: Optional[str]) -> str:
+        return f"sha:{sha}" if sha else f"url:{raw_url}"
+
+    @staticmethod
+    def format_key() -> Dict[str, int]:
+        return {"extractor": EXTRACTOR_VERSION, "max_file_bytes": MAX_FILE_BYTES}
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("format") != self.format_key():
+                logger.info(f"提取逻辑版本或字节上限已变化，丢弃旧文件缓存 ({len(data.get('entries', {}))} 个文件)")
+                return
+            self.entries = data.get("entries", {})
+            self.url_index = data.get("urls", {})
+            logger.info(f"已加载文件缓存: {len(self.entries)} 个文件")
+        except Exception as e:
+            logger.warning(f"文件缓存损坏，已忽略: {e}")
+            self.entries, self.url_index = {}, {}
+
+    def get(self, key: str, raw_url: str) -> Optional[List[str]]:
+        """按键或 raw URL 查询缓存，命中返回节点列表 (可能为空列表)，未命中返回 None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                alias = self.url_index.get(raw_url)
+                entry = self.entries.get(alias) if alias else None
+            if entry is None:
+                return None
+            entry["ts"] = time.time()
+            self.hits += 1
+            return list(entry["nodes"])
+
+    def put(self, key: str, raw_url: str, nodes: List[str]) -> None:
+        with self.lock:
+            self.entries[key] = {"nodes": list(nodes), "ts": time.time()}
+            self.url_index[raw_url] = key
+
+    def save(self) -> None:
+        with self.lock:
+            if len(self.entries) > self.max_entries:
+                keep = sorted(self.entries, key=lambda k: self.entries[k]["ts"], reverse=True)[:self.max_entries]
+                self.entries = {k: self.entries[k] for k in keep}
+            self.url_index = {u: k for u, k in self.url_index.items() if k in self.entries}
+            data = {"format": self.format_key(), "entries": self.entries, "urls": self.url_index}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            logger.info(f"文件缓存已保存: {len(data['entries'])} 个文件")
+        except Exception as e:
+            logger.error(f"保存文件缓存失败: {e}")
+
+class NodeExtractor:
+    """节点提取器：纯解析逻辑，不持有任何运行时状态，可在解析子进程中独立实例化"""
 
     def safe_base64_decode(self, text: str) -> Optional[str]:
         """安全的 Base64 解码，处理 URL 安全字符和填充"""
-        if not text:
-            return None
-        text = text.strip().replace(' ', '').replace('\n', '').replace('\r', '')
-        text = text.replace('-', '+').replace('_', '/')
-        padding = len(text) % 4
-        if padding > 0:
-            text += '=' * (4 - padding)
-        try:
-            return base64.b64decode(text).decode('utf-8', errors='ignore')
-        except Exception:
-            return None
+        return safe_base64_decode(text)
 
     # --- [新增] 核心特征值生成（优化项 1：去重逻辑） ---
     def _get_node_hash(self, link: str) -> str:
-        """剥离名称备注等冗余信息，仅对节点的核心连接参数进行哈希"""
-        link = link.strip()
-        if "://" not in link:
-            return hashlib.md5(link.encode('utf-8')).hexdigest()
-        
-        try:
-            protocol, rest = link.split("://", 1)
-            protocol = protocol.lower()
-            
-            # vmess 需要解密 base64 后剔除 'ps' (备注) 字段
-            if protocol == "vmess":
-                decoded = self.safe_base64_decode(rest)
-                if decoded:
-                    conf = json.loads(decoded)
-                    conf.pop("ps", None) 
-                    conf_str = json.dumps(conf, sort_keys=True)
-                    return hashlib.md5(f"vmess://{conf_str}".encode('utf-8')).hexdigest()
-            
-            # 其他协议直接去除 # 后面的备注信息
-            core = rest.split("#")[0]
-            return hashlib.md5(f"{protocol}://{core}".encode('utf-8')).hexdigest()
-        except Exception:
-            return hashlib.md5(link.encode('utf-8')).hexdigest()
+        """剥离名称备注等冗余信息，仅对节点的核心连接参数进行哈希 (逻辑统一在 node_model)"""
+        return node_fingerprint(link)
 
     # --- [完整保留] 节点构建逻辑 ---
 
@@ -244,182 +458,632 @@ class NodeAggregator:
                 extracted.append(link)
         return extracted
 
-    # --- [完整保留] 核心提取逻辑 ---
+    # --- 核心提取逻辑 (格式嗅探 + 单路径提取) ---
 
-    def extract_nodes(self, text: str) -> List[str]:
-        if not text:
-            return []
-        found_nodes = []
-        
-        # 策略 1: 正则直接提取
-        regex_matches = LINK_PATTERN.findall(text)
-        found_nodes.extend(regex_matches)
-        
-        # 策略 2: Base64 解码后正则提取
-        decoded = self.safe_base64_decode(text)
-        if decoded:
-            decoded_matches = LINK_PATTERN.findall(decoded)
-            found_nodes.extend(decoded_matches)
+    def _format_plausible(self, text: str, head: str, fmt: str) -> bool:
+        """廉价判断某种格式是否值得尝试 (只看头部或做子串查找，不做完整解析)"""
+        if fmt == FORMAT_LINKS:
+            return True
+        if fmt == FORMAT_JSON:
+            return head[:1] in ('{', '[')
+        if fmt == FORMAT_YAML:
+            return bool(yaml) and (text.find("proxies:", 0, PROXIES_SNIFF_CHARS) >= 0 or bool(YAML_LIST_HEAD_PATTERN.search(head)))
+        if fmt == FORMAT_BASE64:
+            return bool(head) and BASE64_HEAD_PATTERN.fullmatch(head) is not None
+        return False
+
+    def sniff_format(self, text: str) -> str:
+        """根据文件头部判断主格式：JSON > 含顶层 proxies 的 Clash YAML > 明文链接 > 其他 YAML > Base64 订阅，均不命中时按明文处理"""
+        head = text[:SNIFF_HEAD_CHARS].lstrip()
+        if self._format_plausible(text, head, FORMAT_JSON):
+            return FORMAT_JSON
+        # 顶层 proxies 键先于链接判断：注释里带一条链接的 Clash 配置不能按明文链接处理
+        if yaml and YAML_PROXIES_KEY_PATTERN.search(text, 0, PROXIES_SNIFF_CHARS):
+            return FORMAT_YAML
+        if LINK_PATTERN.search(head):
+            return FORMAT_LINKS
+        if self._format_plausible(text, head, FORMAT_YAML):
+            return FORMAT_YAML
+        if self._format_plausible(text, head, FORMAT_BASE64):
+            return FORMAT_BASE64
+        return FORMAT_LINKS
 
-        # 策略 3: JSON/YAML 解析 (针对结构化订阅)
-        text_stripped = text.strip()
-        is_json_like = text_stripped.startswith('{') or text_stripped.startswith('[')
-        is_yaml_like = "proxies:" in text_stripped or "name:" in text_stripped
+    def _extract_by_format(self, text: str, fmt: str) -> List[str]:
+        """按指定格式执行唯一一条提取路径"""
+        if fmt == FORMAT_LINKS:
+            return LINK_PATTERN.findall(text)
+        if fmt == FORMAT_BASE64:
+            decoded = self.safe_base64_decode(text)
+            return LINK_PATTERN.findall(decoded) if decoded else []
 
         parsed_data = None
-        # 3.1 尝试 JSON
-        if is_json_like:
+        if fmt == FORMAT_JSON:
             try:
-                parsed_data = json.loads(text_stripped)
+                parsed_data = json.loads(text)
             except json.JSONDecodeError:
                 pass
-        
-        # 3.2 尝试 YAML
-        if parsed_data is None and is_yaml_like and yaml:
+        elif fmt == FORMAT_YAML and yaml:
             try:
-                parsed_data = yaml.safe_load(text_stripped)
+                parsed_data = yaml.safe_load(text)
             except Exception:
                 pass
+        # 解析失败或没有结构化节点时返回空列表，由 extract_nodes_with_format 回退到明文链接等路径
+        return self._extract_from_structured_data(parsed_data) if parsed_data else []
+
+    def extract_nodes_with_format(self, text: str) -> Tuple[List[str], str]:
+        """
+        嗅探格式后只走一条提取路径，该路径无结果时才依次回退到其余可能的格式。
+        返回 (节点列表, 实际命中的路径)，路径形如 "yaml"、"links->base64" 或 "none"。
+        """
+        if not text:
+            return [], "none"
+        primary = self.sniff_format(text)
+        nodes = self._extract_by_format(text, primary)
+        if nodes:
+            return nodes, primary
+
+        head = text[:SNIFF_HEAD_CHARS].lstrip()
+        for fmt in (FORMAT_LINKS, FORMAT_BASE64, FORMAT_JSON, FORMAT_YAML):
+            if fmt == primary or not self._format_plausible(text, head, fmt):
+                continue
+            nodes = self._extract_by_format(text, fmt)
+            if nodes:
+                return nodes, f"{primary}->{fmt}"
+        return [], "none"
+
+    def extract_nodes(self, text: str) -> List[str]:
+        return self.extract_nodes_with_format(text)[0]
+
+# --- 解析子进程入口 (模块级函数，便于进程池序列化) ---
+
+_worker_extractor: Optional[NodeExtractor] = None
+
+def parse_batch(bodies: List[Tuple[Union[bytes, List[str]], Optional[str]]]) -> List[Tuple[List[Tuple[str, str]], str]]:
+    """
+    子进程中批量解析文件内容，返回每个文件的 ([(节点, 特征哈希)], 提取路径)
+    内容为链接列表时 (流式扫描已提取出链接) 只计算特征哈希
+    """
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = NodeExtractor()
+    results = []
+    for body, encoding in bodies:
+        try:
+            if isinstance(body, list):
+                nodes, path = body, "links(stream)"
+            else:
+                text = body.decode(encoding or 'utf-8', errors='ignore')
+                nodes, path = _worker_extractor.extract_nodes_with_format(text)
+            results.append(([(node, _worker_extractor._get_node_hash(node)) for node in nodes], path))
+        except Exception:
+            results.append(([], "error"))
+    return results
+
+class NodeAggregator(NodeExtractor):
+    def __init__(self, token: Optional[str]):
+        self.github_token = token
+        self.nodes: List[str] = [] # 去重后的节点链接 (去重以特征哈希为准，链接本身无需再放入集合)
+        self.seen_hashes: Set[bytes] = set() # [新增] 用于特征值去重的哈希集合 (8 字节摘要)
+        self.nodes_lock = threading.Lock() # 线程锁，保护集合写入安全
         
-        # 3.3 提取结构化数据
-        if parsed_data:
-            structured_nodes = self._extract_from_structured_data(parsed_data)
-            if structured_nodes:
-                found_nodes.extend(structured_nodes)
-            
-        return found_nodes
+        # 初始化 Session (包含连接池优化)
+        self.session = self._init_session()
+        self._setup_headers()
+        
+        self.start_time = time.time()
+        self.should_stop = False # 全局停止标志
+        
+        # 任务队列 (生产者-消费者模型核心)：按来源信誉排序的优先队列，元素为 (-信誉评分, 入队序号, FileTask)
+        # 运行时间耗尽时留在队列中未下载的总是历史产出最低的文件
+        self.url_queue = queue.PriorityQueue()
+        self.queue_seq = itertools.count()
+        self.reputation = SourceReputation()
+        self.queued_keys: Set[str] = set() # 本轮已入队或已命中缓存的文件，折叠重复搜索结果
+        # 产出统计：各 关键词|后缀 组合本轮的文件数/新增节点数，以及新增节点的来源 (按来源文件记录，不按节点建字典)
+        self.search_stats = SearchStats()
+        self.combo_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"files": 0, "new_nodes": 0})
+        self.file_counts: Dict[str, int] = {}  # 来源文件 -> 本轮提取到的节点数
+        self.file_nodes: Dict[str, array] = {} # 来源文件 -> 本轮由该文件首次带来的节点 (64 位指纹，每个节点 8 字节)
+        self.file_combos: Dict[str, str] = {}  # 来源文件 -> 带来这些节点的 关键词|后缀 组合
+        self.blob_cache = BlobCache(BLOB_CACHE_FILE)
+        # 解析阶段：PARSE_WORKERS > 1 时下载线程只负责把内容交给进程池
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
+        # 待攒批的内容与在途批次均有上限：解析跟不上时下载方在 _submit_parse 阻塞，防止内容堆积占满内存
+        self.parse_queue: queue.Queue = queue.Queue(maxsize=max(PARSE_WORKERS, 1) * PARSE_BATCH_SIZE)
+        self.parse_slots = threading.Semaphore(max(PARSE_WORKERS, 1) * 2)
+        self.pending_parse = 0
+        self.parse_lock = threading.Lock()
+        self.format_stats: Counter = Counter() # 各提取路径的命中次数，用于评估格式嗅探效果
+        
+        # 搜索节奏由速率限制响应头驱动 (无 Token 时 GitHub 返回的额度更低，节奏自然放慢)
+        self.rate_limiter = SearchRateLimiter(SEARCH_INTERVAL)
+        if not token:
+            logger.warning("未检测到 Token，搜索额度极低，将严格按响应头的额度与重置时间放慢请求")
+
+        if not yaml:
+            logger.warning("未检测到 PyYAML 库，YAML 解析功能将不可用。建议安装 PyYAML。")
+
+    def _init_session(self) -> requests.Session:
+        """初始化 Session，显式设置连接池大小以消除 'Connection pool is full' 警告"""
+        session = requests.Session()
+        # 不遵循 Retry-After：否则 429 会在 session.get 内部按响应头休眠重试，
+        # 绕过 SearchRateLimiter 的截止时间判断与限流计时，所有限流等待统一由 _search_page 处理
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=False
+        )
+        # [关键优化] pool_connections = DOWNLOAD_WORKERS
+        # 确保每个线程都有独立的连接可用，无需频繁建立/关闭 TCP 连接
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=DOWNLOAD_WORKERS, 
+            pool_maxsize=DOWNLOAD_WORKERS
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _setup_headers(self) -> None:
+        self.session.headers.update({
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        })
+        if self.github_token:
+            self.session.headers["Authorization"] = f"token {self.github_token}"
+            logger.info("GitHub Token 已加载")
+
+    def check_timeout(self) -> bool:
+        """检查是否达到最大执行时间"""
+        if time.time() - self.start_time > MAX_EXECUTION_TIME:
+            return True
+        return False
 
     # --- 生产者-消费者并发架构 (核心优化) ---
 
+    def _merge_pairs(self, pairs: List[Tuple[str, str]], task: FileTask) -> None:
+        """按特征哈希去重后并入结果集 (哈希已在锁外算好)，新增节点记入来源组合与来源文件"""
+        combo = task.combo
+        with self.nodes_lock:
+            self.file_counts[task.source] = len(pairs)
+            if not pairs:
+                return
+            count_before = len(self.nodes)
+            new_nodes = None
+            for node, node_hash in pairs:
+                # [核心改动：应用哈希去重逻辑]
+                digest = fingerprint_digest(node_hash)
+                if digest not in self.seen_hashes:
+                    self.seen_hashes.add(digest)
+                    self.nodes.append(node)
+                    if new_nodes is None:
+                        new_nodes = self.file_nodes.setdefault(task.source, array('Q'))
+                        self.file_combos.setdefault(task.source, combo)
+                    new_nodes.append(FingerprintSet.digest(node_hash))
+                    self.combo_counts[combo]["new_nodes"] += 1
+            # 简单的进度展示
+            if len(self.nodes) > count_before and len(self.nodes) % 50 == 0:
+                logger.info(f"当前库存: {len(self.nodes)} 个唯一节点")
+
+    def _merge_nodes(self, nodes: List[str], task: FileTask) -> None:
+        self._merge_pairs([(node, self._get_node_hash(node)) for node in nodes], task)
+
+    def _process_content(self, task: FileTask, body: bytes, encoding: Optional[str] = None) -> None:
+        """交给解析进程池 (或在当前线程解析)；内容相同的 fork/镜像文件 blob sha 相同，入队前已由文件缓存折叠"""
+        if self.parse_pool:
+            self._submit_parse(task, body, encoding)
+            return
+
+        text = body.decode(encoding or 'utf-8', errors='ignore')
+        nodes, path = self.extract_nodes_with_format(text)
+        self._commit_parsed(task, [(node, self._get_node_hash(node)) for node in nodes], path)
+
+    def _submit_parse(self, task: FileTask, payload: Union[bytes, List[str]],
+                      encoding: Optional[str], path: Optional[str] = None) -> None:
+        """交给解析进程池：payload 为原文或流式扫描出的链接列表，path 非空时覆盖子进程返回的提取路径"""
+        with self.parse_lock:
+            self.pending_parse += 1
+        # 队列已满时阻塞等待攒批线程取走内容 (背压传导到下载方)；收到停止信号时放弃该文件
+        while True:
+            try:
+                self.parse_queue.put((task, payload, encoding, path), timeout=1)
+                return
+            except queue.Full:
+                if self.should_stop:
+                    break
+        with self.parse_lock:
+            self.pending_parse -= 1
+
+    def _commit_parsed(self, task: FileTask, pairs: List[Tuple[str, str]], path: str) -> None:
+        """解析结果写入文件缓存，并合并到结果集"""
+        self.blob_cache.put(task.cache_key, task.raw_url, [node for node, _ in pairs])
+        self._merge_pairs(pairs, task)
+        with self.nodes_lock:
+            self.format_stats[path] += 1
+
+    def _finish_stream(self, task: FileTask, stream: StreamingBody) -> None:
+        """流式下载结束后的收尾：增量扫描结果直接合并，缓存的原文走完整解析"""
+        if stream.scanner is not None:
+            # 超限中止时保留已扫描到的链接
+            links = stream.scanner.close()
+            path = "links(stream)" if not stream.aborted else f"links(stream,{stream.aborted})"
+            if self.parse_pool:
+                # 特征哈希 (规范化 + 摘要) 是 CPU 密集工作，同样交给进程池，不在 I/O 线程上持有 GIL
+                self._submit_parse(task, links, None, path)
+            else:
+                self._commit_parsed(task, [(link, self._get_node_hash(link)) for link in links], path)
+        elif stream.aborted:
+            # 二进制或超限文件：记为空结果，后续运行不再下载
+            self.blob_cache.put(task.cache_key, task.raw_url, [])
+            with self.nodes_lock:
+                self.format_stats[f"skip:{stream.aborted}"] += 1
+                self.file_counts[task.source] = 0
+        else:
+            self._process_content(task, b"".join(stream.chunks), stream.encoding)
+
+    # --- 解析进程池 ---
+
+    def parse_dispatcher(self) -> None:
+        """攒批线程：从 parse_queue 收集内容，按批提交到进程池"""
+        while not self.should_stop:
+            try:
+                batch = [self.parse_queue.get(timeout=1)]
+            except queue.Empty:
+                continue
+            deadline = time.time() + PARSE_BATCH_WAIT
+            while len(batch) < PARSE_BATCH_SIZE:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.parse_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self.parse_slots.acquire()
+            try:
+                future = self.parse_pool.submit(parse_batch, [(payload, encoding) for _, payload, encoding, _ in batch])
+            except Exception as e:
+                # 进程池不可用 (如子进程崩溃)：在当前线程解析，不丢弃已下载的内容
+                logger.error(f"提交解析任务失败，改为线程内解析: {e}")
+                self._parse_inline(batch)
+                self.parse_slots.release()
+                self._finish_parse(len(batch))
+                continue
+            future.add_done_callback(lambda f, b=batch: self._on_batch_parsed(b, f))
+
+    def _parse_inline(self, batch: List[Tuple]) -> None:
+        for (task, _, _, path), (pairs, parsed_path) in zip(batch, parse_batch([(p, e) for _, p, e, _ in batch])):
+            self._commit_parsed(task, pairs, path or parsed_path)
+
+    def _on_batch_parsed(self, batch: List[Tuple], future: Future) -> None:
+        try:
+            if future.cancelled():
+                return
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error(f"解析批次失败，改为线程内解析: {e}")
+                self._parse_inline(batch)
+                return
+            for (task, _, _, path), (pairs, parsed_path) in zip(batch, results):
+                self._commit_parsed(task, pairs, path or parsed_path)
+        except Exception as e:
+            logger.error(f"解析批次失败: {e}")
+        finally:
+            self.parse_slots.release()
+            self._finish_parse(len(batch))
+
+    def _finish_parse(self, count: int) -> None:
+        with self.parse_lock:
+            self.pending_parse -= count
+
     def fetch_worker(self):
         """消费者线程：从队列获取URL并下载解析"""
         while not self.should_stop:
             try:
                 # 阻塞等待，每秒检查一次停止标志
-                url = self.url_queue.get(timeout=1) 
+                _, _, task = self.url_queue.get(timeout=1)
             except queue.Empty:
                 continue
             
             try:
                 # 使用全局 TIMEOUT 常量
-                resp = self.session.get(url, timeout=TIMEOUT)
-                if resp.status_code == 200:
-                    # 调用完整的提取逻辑
-                    nodes = self.extract_nodes(resp.text)
-                    if nodes:
-                        with self.nodes_lock:
-                            count_before = len(self.nodes)
-                            for node in nodes:
-                                # [核心改动：应用哈希去重逻辑]
-                                node_hash = self._get_node_hash(node)
-                                if node_hash not in self.seen_hashes:
-                                    self.seen_hashes.add(node_hash)
-                                    self.nodes.add(node)
-                            # 简单的进度展示
-                            if len(self.nodes) > count_before and len(self.nodes) % 50 == 0:
-                                logger.info(f"当前库存: {len(self.nodes)} 个唯一节点")
+                if STREAM_DOWNLOAD:
+                    with self.session.get(task.raw_url, timeout=TIMEOUT, stream=True) as resp:
+                        if resp.status_code == 200:
+                            stream = StreamingBody(resp.encoding)
+                            if stream.accept_headers(resp.headers.get("Content-Type"), resp.headers.get("Content-Length")):
+                                for chunk in resp.iter_content(STREAM_CHUNK_SIZE):
+                                    if not stream.feed(chunk):
+                                        break
+                            self._finish_stream(task, stream)
+                else:
+                    resp = self.session.get(task.raw_url, timeout=TIMEOUT)
+                    if resp.status_code == 200:
+                        # 调用完整的提取逻辑
+                        self._process_content(task, resp.content, resp.encoding)
             except Exception:
                 pass
             finally:
                 self.url_queue.task_done()
 
-    def search_producer(self):
-        """生产者线程：执行搜索并将结果推入队列"""
-        logger.info(f"开始搜索 GitHub, 关键词队列: {len(KEYWORDS)} 个")
-        random.shuffle(KEYWORDS) # 打乱顺序
-        
-        consecutive_limit_hits = 0 # 新增：连续风控计数器
+    # --- asyncio 下载引擎 ---
 
-        for keyword in KEYWORDS:
-            if self.should_stop: break
-            
-            for ext in EXTENSIONS:
-                if self.should_stop: break
+    def async_fetch_engine(self) -> None:
+        """消费者线程：在独立事件循环中运行 asyncio 下载引擎"""
+        try:
+            asyncio.run(self._async_fetch_main())
+        except Exception as e:
+            logger.error(f"asyncio 下载引擎异常退出: {e}")
+
+    async def _async_fetch_main(self) -> None:
+        """从 url_queue 取任务，以全局/单主机双重并发上限保持大量下载在途"""
+        connector = aiohttp.TCPConnector(
+            limit=ASYNC_CONCURRENCY,
+            limit_per_host=PER_HOST_LIMIT,
+            ttl_dns_cache=300
+        )
+        # 每个请求的总截止时间 (建连 + 读完正文)：慢速滴流的服务器不能长期占用在途名额
+        # 信号量、连接池总上限与单主机上限取值相同，请求不会排队等待连接，等待时间不会计入截止时间
+        timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+        semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+        in_flight: Set[asyncio.Task] = set()
+
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers=dict(self.session.headers)
+        ) as client:
+            while not self.should_stop:
+                await semaphore.acquire()
+                item = None
+                while item is None and not self.should_stop:
+                    try:
+                        _, _, item = self.url_queue.get_nowait()
+                    except queue.Empty:
+                        await asyncio.sleep(0.2)
+                if item is None:
+                    semaphore.release()
+                    break
+                task = asyncio.create_task(self._async_fetch_one(client, item, semaphore))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            # 收到停止信号：放弃仍在途的下载
+            for task in list(in_flight):
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _async_fetch_one(self, client: "aiohttp.ClientSession", task: FileTask, semaphore: asyncio.Semaphore) -> None:
+        """下载单个文件，解析放到线程池执行，避免阻塞事件循环 (先释放响应，解析期间不占用连接)"""
+        try:
+            stream = body = None
+            async with client.get(task.raw_url) as resp:
+                if resp.status != 200:
+                    return
+                charset = resp.charset
+                if STREAM_DOWNLOAD:
+                    stream = StreamingBody(charset)
+                    if stream.accept_headers(resp.headers.get("Content-Type"), resp.headers.get("Content-Length")):
+                        async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                            if not stream.feed(chunk):
+                                break
+                else:
+                    body = await resp.read()
+            loop = asyncio.get_running_loop()
+            if stream is not None:
+                await loop.run_in_executor(None, self._finish_stream, task, stream)
+            else:
+                await loop.run_in_executor(None, self._process_content, task, body, charset)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        finally:
+            semaphore.release()
+            self.url_queue.task_done()
+
+    def _enqueue_file(self, raw_url: str, sha: Optional[str], combo: str, source: str) -> None:
+        """入队前查询文件缓存：已知 blob 直接复用节点，本轮重复命中的文件直接折叠，其余按来源信誉入队"""
+        cache_key = BlobCache.key_for(raw_url, sha)
+        if cache_key in self.queued_keys:
+            return
+        self.queued_keys.add(cache_key)
+        with self.nodes_lock:
+            self.combo_counts[combo]["files"] += 1
+        task = FileTask(raw_url, cache_key, combo, source)
+        cached = self.blob_cache.get(cache_key, raw_url)
+        if cached is not None:
+            self._merge_nodes(cached, task)
+            return
+        self.url_queue.put((-self.reputation.score(source), next(self.queue_seq), task))
+
+    def _search_page(self, query: str, page: int) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        按速率限制器的节奏请求一页搜索结果
+        返回 ("ok", 数据) / ("error", None) / ("stop", None)，stop 表示剩余运行时间已不足以等到额度恢复
+        """
+        api_url = f"{GITHUB_API_URL}/search/code?q={query}&per_page={PER_PAGE}&page={page}&sort=indexed&order=desc"
+        deadline = self.start_time + MAX_EXECUTION_TIME
+        
+        # === 智能重试循环 (防止丢失数据) ===
+        max_retries = 3
+        attempt = 0
+        while attempt < max_retries:
+            if not self.rate_limiter.acquire(deadline):
+                logger.warning("搜索额度在剩余运行时间内无法恢复，停止搜索任务并进入后续处理...")
+                return "stop", None
+            try:
+                resp = self.session.get(api_url, timeout=TIMEOUT)
+                self.rate_limiter.update(resp.headers)
                 
-                # 标记：当前关键词+后缀组合是否找到了结果
-                found_items_in_this_combo = False
+                # 触发速率限制：按响应头给出的时间等待并重试，绝不跳过
+                if resp.status_code in [403, 429]:
+                    wait_time, by_header = self.rate_limiter.throttle_delay(resp.headers)
+                    if time.time() + wait_time > deadline:
+                        logger.warning(f"速率限制需等待 {wait_time:.0f} 秒，超出剩余运行时间，停止搜索任务并进入后续处理...")
+                        return "stop", None
+                    if not by_header:
+                        attempt += 1 # 只有无响应头依据的限流才消耗重试次数
+                    logger.warning(f"触发 API 速率限制，暂停 {wait_time:.0f} 秒后重试 ({'响应头指示' if by_header else '次级限流退避'})...")
+                    self.rate_limiter.sleep(wait_time)
+                    continue
                 
-                for page in range(1, MAX_PAGES + 1):
-                    if self.should_stop: break
-                    if self.check_timeout():
-                        logger.warning("达到最大执行时间，停止搜索")
-                        self.should_stop = True
-                        return
-
-                    query = f"{keyword} extension:{ext}"
-                    api_url = f"https://api.github.com/search/code?q={query}&per_page=20&page={page}&sort=indexed&order=desc"
-                    
-                    # === 智能重试循环 (防止丢失数据) ===
-                    max_retries = 3
-                    success = False
-                    
-                    for attempt in range(max_retries):
-                        try:
-                            resp = self.session.get(api_url)
-                            
-                            # 触发速率限制：原地等待并重试，绝不跳过
-                            if resp.status_code in [403, 429]:
-                                consecutive_limit_hits += 1 # 计数 +1
-                                
-                                # 新增：连续4次风控则熔断
-                                if consecutive_limit_hits >= 4:
-                                    logger.warning("连续 4 次触发 API 速率限制，判定为高风险，停止搜索任务并进入后续处理...")
-                                    return 
-
-                                wait_time = 60 * (attempt + 1) # 第一次60s，第二次120s
-                                logger.warning(f"触发 API 速率限制，暂停 {wait_time} 秒后重试 (第 {attempt+1} 次)...")
-                                time.sleep(wait_time)
-                                continue 
-                            
-                            if resp.status_code == 200:
-                                consecutive_limit_hits = 0 # 成功则重置计数
-                                items = resp.json().get("items", [])
-                                logger.info(f"搜索 [{query} P{page}] -> 找到 {len(items)} 个文件")
-                                
-                                if items:
-                                    found_items_in_this_combo = True
-                                    for item in items:
-                                        html_url = item.get("html_url")
-                                        if html_url:
-                                            # 转换为 raw 链接
-                                            raw_url = html_url.replace("github.com", "raw.githubusercontent.com").replace("/blob/", "/")
-                                            self.url_queue.put(raw_url)
-                                else:
-                                    # 当前页无结果，通常后续页也无结果，跳出页码循环
-                                    pass 
-                                
-                                success = True
-                                break # 成功，退出重试循环
-                            
-                            else:
-                                logger.error(f"API 错误 {resp.status_code}")
-                                break # 其他错误（如404）不重试
-                                
-                        except Exception as e:
-                            logger.error(f"搜索请求异常: {e}")
-                            time.sleep(5)
-                    
-                    # 动态随机休眠
-                    time.sleep(random.uniform(self.sleep_interval, self.sleep_interval + 1.0))
-                    
-                    # 如果这一页本来就没结果，不需要继续翻后面的页码
-                    if success and not found_items_in_this_combo:
-                         break
+                if resp.status_code == 200:
+                    self.rate_limiter.on_success()
+                    return "ok", resp.json()
                 
-                # 处理下一个后缀
-                pass 
+                logger.error(f"API 错误 {resp.status_code}")
+                return "error", None # 其他错误（如404）不重试
+                    
+            except Exception as e:
+                logger.error(f"搜索请求异常: {e}")
+                attempt += 1
+                time.sleep(5)
+        return "error", None
+
+    @staticmethod
+    def _raw_url(html_url: str) -> str:
+        """html_url (/仓库/blob/提交/路径) 转换为 raw 链接 (/仓库/提交/路径)"""
+        return RAW_CONTENT_URL + urlsplit(html_url).path.replace("/blob/", "/", 1)
+
+    def _enqueue_items(self, query: str, page: int, items: List[Dict[str, Any]], combo: str) -> None:
+        logger.info(f"搜索 [{query} P{page}] -> 找到 {len(items)} 个文件")
+        for item in items:
+            html_url = item.get("html_url")
+            if html_url:
+                raw_url = self._raw_url(html_url)
+                repo = (item.get("repository") or {}).get("full_name") or "/".join(raw_url.split("/")[3:5])
+                self._enqueue_file(raw_url, item.get("sha"), combo, source_key(repo, item.get("path", raw_url)))
+
+    @staticmethod
+    def _split_size_range(lo: int, hi: int) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """按几何中点二分文件大小范围 (配置文件大多很小，几何切分使各分片结果数更均衡)"""
+        if hi - lo < 2:
+            return None
+        mid = int(math.sqrt((lo + 1) * (hi + 1))) - 1
+        mid = min(max(mid, lo), hi - 1)
+        return (lo, mid), (mid + 1, hi)
+
+    def _search_combo(self, keyword: str, ext: str) -> bool:
+        """
+        查询规划：先取基础查询首页读取 total_count，超出可翻页范围时按 size: 范围递归二分成互不重叠的分片，
+        然后按页轮转抓取各分片 (各分片均按索引时间倒序，先取所有分片最新的一页)。
+        返回 False 表示应停止整个搜索任务。
+        """
+        base_query = f"{keyword} extension:{ext}"
+        combo = combo_key(keyword, ext)
+        slice_target = MAX_PAGES * PER_PAGE
+        with self.nodes_lock:
+            self.combo_counts[combo] # 没有任何结果的组合同样计入搜索轮次，评分才会逐步回落
+
+        status, data = self._search_page(base_query, 1)
+        if status == "stop":
+            return False
+        if status != "ok":
+            return True
+        items = data.get("items", [])
+        self._enqueue_items(base_query, 1, items, combo)
+        total = data.get("total_count", len(items))
+
+        # 1. 规划分片：每个分片先取首页，既得到分片的 total_count 也不浪费请求
+        slices: List[Tuple[str, int]] = []
+        if total <= slice_target:
+            slices.append((base_query, total))
+            fetched_first = {base_query}
+        else:
+            fetched_first = set()
+            pending = list(self._split_size_range(0, SIZE_RANGE_MAX))
+            while pending:
+                if self.should_stop or self.check_timeout():
+                    return False
+                lo, hi = pending.pop(0)
+                query = f"{base_query} size:{lo}..{hi}"
+                status, data = self._search_page(query, 1)
+                if status == "stop":
+                    return False
+                if status != "ok":
+                    continue
+                items = data.get("items", [])
+                self._enqueue_items(query, 1, items, combo)
+                fetched_first.add(query)
+                count = data.get("total_count", len(items))
+                halves = self._split_size_range(lo, hi)
+                # 分片仍超出可翻页范围且预算允许时继续二分
+                if count > slice_target and halves and len(slices) + len(pending) + 2 <= MAX_SLICES:
+                    pending.extend(halves)
+                elif count:
+                    slices.append((query, count))
+            logger.info(f"[{base_query}] 共 {total} 个结果，切分为 {len(slices)} 个 size 分片")
+
+        # 2. 按页轮转抓取剩余页
+        for page in range(2, MAX_PAGES + 1):
+            for query, count in slices:
+                if self.should_stop: return False
+                if self.check_timeout():
+                    logger.warning("达到最大执行时间，停止搜索")
+                    self.should_stop = True
+                    return False
+                if query not in fetched_first or count <= (page - 1) * PER_PAGE:
+                    continue
+                status, data = self._search_page(query, page)
+                if status == "stop":
+                    return False
+                if status == "ok":
+                    self._enqueue_items(query, page, data.get("items", []), combo)
+        return True
+
+    def search_producer(self):
+        """生产者线程：按历史产出评分从高到低执行搜索并将结果推入队列"""
+        combos = self.search_stats.order(combo_key(keyword, ext) for keyword in KEYWORDS for ext in EXTENSIONS)
+        logger.info(f"开始搜索 GitHub, 关键词队列: {len(KEYWORDS)} 个, 组合: {len(combos)} 个 (按历史产出排序)")
+
+        for combo in combos:
+            if self.should_stop: break
+            if self.check_timeout():
+                logger.warning("达到最大执行时间，停止搜索")
+                self.should_stop = True
+                return
+            keyword, ext = combo.split("|", 1)
+            if not self._search_combo(keyword, ext):
+                return
 
         logger.info("所有搜索任务已遍历完成")
 
     def run(self):
-        # 1. 启动下载消费者线程
-        logger.info(f"启动 {DOWNLOAD_WORKERS} 个下载线程...")
+        # 0. 启动解析进程池 (spawn 启动，避免在多线程进程中 fork)
         threads = []
-        for _ in range(DOWNLOAD_WORKERS):
-            t = threading.Thread(target=self.fetch_worker)
-            t.daemon = True # 守护线程
+        if PARSE_WORKERS > 1:
+            logger.info(f"启动 {PARSE_WORKERS} 个解析进程...")
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            t = threading.Thread(target=self.parse_dispatcher)
+            t.daemon = True
             t.start()
             threads.append(t)
+
+        # 1. 启动下载消费者 (asyncio 引擎优先，不可用时回退线程池)
+        if ASYNC_DOWNLOAD and aiohttp:
+            logger.info(f"启动 asyncio 下载引擎 (并发 {ASYNC_CONCURRENCY}, 单主机 {PER_HOST_LIMIT})...")
+            t = threading.Thread(target=self.async_fetch_engine)
+            t.daemon = True
+            t.start()
+            threads.append(t)
+        else:
+            if ASYNC_DOWNLOAD:
+                logger.warning("未检测到 aiohttp 库，回退到线程池下载模式")
+            logger.info(f"启动 {DOWNLOAD_WORKERS} 个下载线程...")
+            for _ in range(DOWNLOAD_WORKERS):
+                t = threading.Thread(target=self.fetch_worker)
+                t.daemon = True # 守护线程
+                t.start()
+                threads.append(t)
         
         # 2. 在主线程运行搜索生产者
         try:
@@ -428,24 +1092,54 @@ class NodeAggregator:
             logger.warning("用户中断")
             self.should_stop = True
         
-        # 3. 等待队列清空
+        # 3. 等待队列清空 (以未完成任务数为准，包含已出队但仍在下载或解析的文件)
         logger.info("搜索结束，等待剩余下载任务完成(最多30秒)...")
         timeout_wait = time.time() + 30
-        while not self.url_queue.empty() and time.time() < timeout_wait:
+        while (self.url_queue.unfinished_tasks > 0 or self.pending_parse > 0) and time.time() < timeout_wait:
             time.sleep(1)
         
         self.should_stop = True # 通知所有线程退出
+        if self.url_queue.qsize():
+            logger.warning(f"等待超时，放弃 {self.url_queue.qsize()} 个信誉最低的未下载文件")
+        for t in threads:
+            t.join(timeout=5)
+        if self.parse_pool:
+            self.parse_pool.shutdown(wait=True, cancel_futures=True)
         
         # 4. 保存结果
         self._save_results()
 
+    def _save_search_stats(self) -> None:
+        """保存各组合的产出统计与来源信誉，并写出节点来源映射供检测阶段回填存活数"""
+        with self.nodes_lock:
+            run_counts = {combo: dict(counts) for combo, counts in self.combo_counts.items()}
+            file_counts = dict(self.file_counts)
+            files = {source: (self.file_combos[source], nodes) for source, nodes in self.file_nodes.items()}
+        try:
+            self.search_stats.record_crawl(run_counts)
+            self.search_stats.save()
+            self.reputation.record_crawl(file_counts)
+            self.reputation.save()
+            save_node_sources(NODE_SOURCES_FILE, self.start_time, files)
+            if run_counts:
+                top = sorted(run_counts.items(), key=lambda kv: kv[1]["new_nodes"], reverse=True)[:5]
+                logger.info("本轮高产组合: " + ", ".join(f"{combo} +{c['new_nodes']}" for combo, c in top))
+        except Exception as e:
+            logger.error(f"保存搜索产出统计失败: {e}")
+
     def _save_results(self):
-        logger.info(f"=== 最终统计: 共获取 {len(self.nodes)} 个唯一节点 ===")
+        logger.info(f"=== 最终统计: 共获取 {len(self.nodes)} 个唯一节点 (文件缓存命中 {self.blob_cache.hits} 次, 限流等待 {self.rate_limiter.throttled_seconds:.0f}s) ===")
+        if self.format_stats:
+            summary = ", ".join(f"{path} {count}" for path, count in self.format_stats.most_common())
+            logger.info(f"解析路径统计: {summary}")
+        self.blob_cache.save()
+        self._save_search_stats()
         if not self.nodes:
             logger.warning("结果为空，未生成文件")
             return
 
-        plain_text = "\n".join(self.nodes)
+        with self.nodes_lock:
+            plain_text = "\n".join(self.nodes)
         
         # 保存明文
         try:
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import platform
+import threading
+import urllib.request
+from typing import Dict, List, Optional
+
+# 基准脚本位于 benchmarks/，被测模块在仓库根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from github_standin import StandinConfig, start_in_process
+from bench_hotpaths import git_revision, RESULTS_DIR
+
+import aggregator
+
+# --- 离线端到端爬取基准 ---
+# 在独立进程中启动 GitHub 替身服务，把 aggregator 的服务地址指向它，在临时工作目录中完整运行 NodeAggregator.run，
+# 报告 files/s、nodes/s、限流等待时长，以及截止时间到达时队列中剩余的文件数
+# 多轮运行共用同一工作目录：第 1 轮为冷缓存，之后各轮命中上一轮的文件缓存
+
+SAMPLE_INTERVAL = 0.5   # 队列长度采样间隔 (秒)
+
+def standin_stats(base_url: str, reset: bool = False) -> Dict[str, int]:
+    """读取替身服务的请求计数 (reset 时随后清零，各轮从相同的限流脚本开始)"""
+    with urllib.request.urlopen(f"{base_url}/{'_reset' if reset else '_stats'}", timeout=10) as resp:
+        return json.load(resp)
+
+class QueueSampler(threading.Thread):
+    """后台采样下载队列长度，记录峰值以及截止时间到达时的队列长度"""
+
+    def __init__(self, crawler: "aggregator.NodeAggregator", deadline: float):
+        super().__init__(daemon=True)
+        self.crawler = crawler
+        self.deadline = deadline
+        self.peak = 0
+        self.at_deadline: Optional[int] = None
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            size = self.crawler.url_queue.qsize()
+            self.peak = max(self.peak, size)
+            if self.at_deadline is None and time.time() >= self.deadline:
+                self.at_deadline = size
+
+def run_crawl(base_url: str, duration: int) -> Dict:
+    standin_stats(base_url, reset=True)
+    crawler = aggregator.NodeAggregator(token="bench")
+    sampler = QueueSampler(crawler, crawler.start_time + duration)
+    sampler.start()
+    start = time.perf_counter()
+    crawler.run()
+    elapsed = time.perf_counter() - start
+    sampler.stopped.set()
+    sampler.join()
+    served = standin_stats(base_url)
+
+    files = len(crawler.file_counts)
+    return {
+        "seconds": elapsed,
+        "files": files,
+        "downloads": served["raw_requests"],
+        "download_mb": served["raw_bytes"] / 1e6,
+        "nodes": len(crawler.nodes),
+        "files_per_sec": files / elapsed if elapsed else 0.0,
+        "nodes_per_sec": len(crawler.nodes) / elapsed if elapsed else 0.0,
+        "search_requests": served["search_requests"],
+        "search_throttled": served["search_throttled"],
+        "throttled_seconds": crawler.rate_limiter.throttled_seconds,
+        "queue_peak": sampler.peak,
+        # 运行未触及截止时间时没有截止时刻的采样
+        "queue_at_deadline": sampler.at_deadline,
+        "queue_abandoned": crawler.url_queue.qsize(),
+        "blob_cache_hits": crawler.blob_cache.hits,
+    }
+
+def main():
+    defaults = StandinConfig()
+    parser = argparse.ArgumentParser(description="基于本地 GitHub 替身服务的离线端到端爬取基准")
+    parser.add_argument("--duration", type=int, default=60, help="爬虫的最大运行时间 MAX_EXECUTION_TIME (秒)")
+    parser.add_argument("--runs", type=int, default=1, help="运行轮数 (第 2 轮起为热缓存)")
+    parser.add_argument("--keywords", type=int, default=0, help="只使用前 N 个关键词 (0 为全部)")
+    parser.add_argument("--engine", choices=["async", "thread"], default="async", help="下载引擎")
+    parser.add_argument("--parse-workers", type=int, default=aggregator.PARSE_WORKERS, help="解析进程数")
+    parser.add_argument("--search-interval", type=float, default=0.1, help="搜索请求最小间隔 SEARCH_INTERVAL (秒)")
+    parser.add_argument("--secondary-backoff", type=float, default=5.0, help="无提示头次级限流的首次退避 (秒)")
+    parser.add_argument("--files", type=int, default=defaults.files, help="替身服务的文件全集大小")
+    parser.add_argument("--file-nodes", type=int, default=defaults.file_nodes, help="每个文件的平均节点数")
+    parser.add_argument("--raw-latency", type=float, default=defaults.raw_latency, help="raw 响应平均延迟 (秒)")
+    parser.add_argument("--search-latency", type=float, default=defaults.search_latency, help="搜索响应延迟 (秒)")
+    parser.add_argument("--search-limit", type=int, default=defaults.search_limit, help="每个窗口的搜索额度")
+    parser.add_argument("--search-window", type=float, default=10.0, help="搜索额度窗口 (秒)")
+    parser.add_argument("--episodes", default="8:429:2,40-41:403", help="脚本化限流 (见 github_standin.parse_episodes)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--save", nargs="?", const="", default=None, help="保存结果 JSON (不指定路径时按提交号保存到 .cache/bench_results/)")
+    parser.add_argument("--verbose", action="store_true", help="输出爬虫日志")
+    args = parser.parse_args()
+
+    config = StandinConfig(args.files, args.file_nodes, args.raw_latency, args.search_latency,
+                           args.search_limit, args.search_window, args.episodes, args.seed)
+    process, base_url = start_in_process(config)
+    print(f"替身服务已启动: {base_url} (文件全集 {args.files}, 平均 {args.file_nodes} 节点/文件, raw 延迟 {args.raw_latency * 1000:.0f}ms)")
+
+    aggregator.GITHUB_API_URL = base_url
+    aggregator.RAW_CONTENT_URL = f"{base_url}/raw"
+    aggregator.MAX_EXECUTION_TIME = args.duration
+    aggregator.SEARCH_INTERVAL = args.search_interval
+    aggregator.SECONDARY_LIMIT_BACKOFF = args.secondary_backoff
+    aggregator.ASYNC_DOWNLOAD = args.engine == "async"
+    aggregator.PARSE_WORKERS = args.parse_workers
+    if args.keywords:
+        aggregator.KEYWORDS = aggregator.KEYWORDS[:args.keywords]
+    if not args.verbose:
+        aggregator.logger.setLevel(logging.WARNING)
+
+    # 缓存、统计与输出文件均为相对路径，切换到临时目录运行，不触碰仓库内的真实状态
+    work_dir = tempfile.mkdtemp(prefix="bench_crawl_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    results: List[Dict] = []
+    try:
+        print(f"{'轮次':<6}{'耗时s':>8}{'文件':>8}{'下载':>8}{'files/s':>10}{'节点':>9}{'nodes/s':>10}{'限流s':>8}{'限流次数':>9}{'截止时队列':>11}{'放弃':>7}")
+        for run in range(1, args.runs + 1):
+            r = run_crawl(base_url, args.duration)
+            results.append(r)
+            at_deadline = "-" if r["queue_at_deadline"] is None else str(r["queue_at_deadline"])
+            print(f"{run:<6}{r['seconds']:>8.1f}{r['files']:>8}{r['downloads']:>8}{r['files_per_sec']:>10.1f}{r['nodes']:>9}"
+                  f"{r['nodes_per_sec']:>10.1f}{r['throttled_seconds']:>8.1f}{r['search_throttled']:>9}{at_deadline:>11}{r['queue_abandoned']:>7}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        process.terminate()
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            "revision": revision,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "engine": args.engine if aggregator.aiohttp else "thread",
+            "config": config._asdict(),
+            "duration": args.duration,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "runs": results,
+    }
+    if args.save is not None:
+        path = args.save or os.path.join(RESULTS_DIR, f"{revision or 'unknown'}-crawl.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存至 {path}")
+
+if __name__ == "__main__":
+    main()
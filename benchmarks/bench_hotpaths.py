@@ -0,0 +1,176 @@
+import os
+import sys
+import gc
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 基准脚本位于 benchmarks/，被测模块在仓库根目录
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import build_corpus, make_links, DEFAULT_NODES, DEFAULT_SEED
+
+from aggregator import NodeExtractor
+from check_active import NodeParser
+from node_model import Node, FingerprintSet, fingerprint_digest
+import filter_nodes
+import merge_nodes
+
+# --- 解析与去重热路径的微基准 ---
+# 每项取 REPEAT 次中最快的一次计时 (减少调度噪声)，峰值内存单独在 tracemalloc 下再跑一次 (避免追踪开销影响计时)
+
+REPEAT = 5
+RESULTS_DIR = os.path.join(ROOT_DIR, ".cache", "bench_results")
+
+# 基准项：名称 -> (准备函数, 被测函数, 每次调用处理的条目数, 每次调用处理的字节数)
+Benchmark = Tuple[Callable[[], Any], Callable[[Any], Any], int, int]
+
+def build_benchmarks(nodes: int, seed: int) -> Dict[str, Benchmark]:
+    corpus = build_corpus(nodes, seed)
+    links = make_links(random.Random(f"{seed}:bench-links"), nodes)
+    links_bytes = sum(len(link) for link in links)
+    # 合并路径：新旧两组链接，约一半为同一节点的不同备注
+    history = [link.split("#")[0] + "#old" for link in links[: nodes // 2]] + make_links(random.Random(f"{seed}:history"), nodes // 2)
+    extractor = NodeExtractor()
+
+    benchmarks: Dict[str, Benchmark] = {}
+    for kind, text in corpus.items():
+        count = len(extractor.extract_nodes(text))
+        benchmarks[f"extract_nodes[{kind}]"] = (lambda t=text: t, extractor.extract_nodes, count, len(text.encode('utf-8')))
+
+    benchmarks["_get_node_hash"] = (lambda: links, lambda ls: [extractor._get_node_hash(l) for l in ls], nodes, links_bytes)
+    benchmarks["NodeParser.parse"] = (lambda: links, lambda ls: [NodeParser.parse(l) for l in ls], nodes, links_bytes)
+    benchmarks["filter_nodes.get_node_name"] = (lambda: links, lambda ls: [filter_nodes.get_node_name(l) for l in ls], nodes, links_bytes)
+    benchmarks["filter_nodes.apply_filter"] = (
+        lambda: [Node.parse(l) for l in links], filter_nodes.apply_filter, nodes, links_bytes
+    )
+    benchmarks["merge_nodes.merge_sources"] = (
+        lambda: [links, history], merge_nodes.merge_sources, len(links) + len(history),
+        links_bytes + sum(len(link) for link in history)
+    )
+    # 两种去重集合：紧凑表 (合并历史全集) 与 8 字节摘要的 set (聚合与检测的热路径)
+    benchmarks["FingerprintSet.add"] = (
+        lambda: [Node.parse(l).fingerprint for l in links + history],
+        _fill_fingerprint_set,
+        len(links) + len(history), 0
+    )
+    benchmarks["set[digest].add"] = (
+        lambda: [Node.parse(l).fingerprint for l in links + history],
+        _fill_digest_set,
+        len(links) + len(history), 0
+    )
+    return benchmarks
+
+def _fill_fingerprint_set(fingerprints: List[str]) -> FingerprintSet:
+    seen = FingerprintSet()
+    for fingerprint in fingerprints:
+        seen.add(fingerprint)
+    return seen
+
+def _fill_digest_set(fingerprints: List[str]) -> set:
+    seen = set()
+    for fingerprint in fingerprints:
+        digest = fingerprint_digest(fingerprint)
+        if digest not in seen:
+            seen.add(digest)
+    return seen
+
+def run_benchmark(setup: Callable[[], Any], func: Callable[[Any], Any], repeat: int) -> Tuple[float, int]:
+    """返回 (最快一次耗时秒数, 峰值内存字节)"""
+    payload = setup()
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(payload)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def compare(current: Dict[str, Dict], baseline_path: str) -> None:
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n--- 与基线对比 ({baseline['meta'].get('revision')} @ {baseline_path}) ---")
+    print(f"{'基准项':<34}{'items/s 变化':>14}{'峰值内存变化':>14}")
+    for name, result in current.items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<34}{'(新增)':>14}")
+            continue
+        speed = (result["items_per_sec"] / base["items_per_sec"] - 1) * 100 if base["items_per_sec"] else 0.0
+        memory = (result["peak_kb"] / base["peak_kb"] - 1) * 100 if base["peak_kb"] else 0.0
+        print(f"{name:<34}{speed:>+13.1f}%{memory:>+13.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="解析与去重热路径微基准")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODES, help="每份语料的节点数")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--filter", default="", help="只运行名称包含该子串的基准项")
+    parser.add_argument("--save", nargs="?", const="", default=None, help="保存结果 JSON (不指定路径时按提交号保存到 .cache/bench_results/)")
+    parser.add_argument("--compare", help="与之前保存的结果 JSON 对比")
+    args = parser.parse_args()
+
+    print(f"生成语料 (每份 {args.nodes} 个节点, seed={args.seed})...")
+    benchmarks = build_benchmarks(args.nodes, args.seed)
+
+    results: Dict[str, Dict] = {}
+    print(f"{'基准项':<34}{'ops/s':>10}{'items/s':>12}{'MB/s':>9}{'峰值KB':>10}")
+    for name, (setup, func, items, size) in benchmarks.items():
+        if args.filter and args.filter not in name:
+            continue
+        seconds, peak = run_benchmark(setup, func, args.repeat)
+        results[name] = {
+            "seconds": seconds,
+            "ops_per_sec": 1 / seconds if seconds else 0.0,
+            "items_per_sec": items / seconds if seconds else 0.0,
+            "bytes_per_sec": size / seconds if seconds else 0.0,
+            "peak_kb": peak / 1024,
+            "items": items,
+            "bytes": size,
+        }
+        r = results[name]
+        print(f"{name:<34}{r['ops_per_sec']:>10.1f}{r['items_per_sec']:>12.0f}{r['bytes_per_sec'] / 1e6:>9.2f}{r['peak_kb']:>10.0f}")
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            "revision": revision,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "nodes": args.nodes,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.save is not None:
+        path = args.save or os.path.join(RESULTS_DIR, f"{revision or 'unknown'}-{args.nodes}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存至 {path}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import base64
+import random
+import argparse
+from urllib.parse import quote
+from typing import Dict, List
+
+# --- 基准测试语料生成器 ---
+# 相同的 seed 与规模总是生成完全相同的语料，不同提交之间的测试结果才可比较
+
+DEFAULT_SEED = 20240101
+DEFAULT_NODES = 2000
+RULES_PER_NODE = 20            # Clash YAML 中每个节点对应的规则行数 (真实订阅的 rules 段通常远长于 proxies 段)
+JUNK_LINES_PER_NODE = 5        # 混杂文本中每个节点附带的无关行数
+VMESS_HEAVY_RATIO = 0.9        # vmess 密集语料中 vmess 链接的比例
+
+PROTOCOLS = ["vmess", "vless", "trojan", "ss", "hysteria2"]
+REMARK_WORDS = ["香港", "日本", "美国", "新加坡", "台湾", "HK", "JP", "US", "SG", "IPLC", "专线", "高速", "流量", "到期", "官网", "01", "02", "x2"]
+CIPHERS = ["aes-128-gcm", "aes-256-gcm", "chacha20-ietf-poly1305", "2022-blake3-aes-128-gcm"]
+TLDS = ["com", "net", "org", "xyz", "top", "io"]
+
+def _host(rng: random.Random) -> str:
+    if rng.random() < 0.4:
+        return ".".join(str(rng.randint(1, 254)) for _ in range(4))
+    return f"{rng.choice(['node', 'cdn', 'edge', 'hk', 'jp', 'us'])}{rng.randint(1, 999)}.{rng.choice(['speed', 'cloud', 'fast', 'proxy'])}.{rng.choice(TLDS)}"
+
+def _uuid(rng: random.Random) -> str:
+    h = f"{rng.getrandbits(128):032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+def _remark(rng: random.Random) -> str:
+    return " ".join(rng.sample(REMARK_WORDS, rng.randint(1, 3)))
+
+def make_config(rng: random.Random, protocol: str) -> Dict:
+    """生成一个节点的结构化配置 (Clash proxies 条目格式)"""
+    config = {"name": _remark(rng), "server": _host(rng), "port": rng.choice([443, 8443, 2053, 2083, rng.randint(10000, 60000)])}
+    if protocol == "vmess":
+        config.update({"type": "vmess", "uuid": _uuid(rng), "alterId": 0, "cipher": "auto", "tls": rng.random() < 0.7,
+                       "network": "ws", "ws-opts": {"path": f"/{rng.getrandbits(32):x}", "headers": {"Host": _host(rng)}}})
+    elif protocol == "ss":
+        config.update({"type": "ss", "cipher": rng.choice(CIPHERS), "password": f"{rng.getrandbits(64):x}"})
+    else:
+        config.update({"type": "trojan", "password": f"{rng.getrandbits(64):x}", "sni": _host(rng)})
+    return config
+
+def make_link(rng: random.Random, protocol: str) -> str:
+    """生成一条节点链接"""
+    host, port, remark = _host(rng), rng.choice([443, 8443, rng.randint(10000, 60000)]), _remark(rng)
+    if protocol == "vmess":
+        conf = {"v": "2", "ps": remark, "add": host, "port": str(port), "id": _uuid(rng), "aid": "0", "scy": "auto",
+                "net": rng.choice(["ws", "tcp", "grpc"]), "type": "none", "host": _host(rng), "path": "/ws",
+                "tls": rng.choice(["tls", "tls", ""]), "sni": _host(rng)}
+        return "vmess://" + base64.b64encode(json.dumps(conf, ensure_ascii=False).encode('utf-8')).decode('utf-8')
+    if protocol == "ss":
+        user_info = base64.b64encode(f"{rng.choice(CIPHERS)}:{rng.getrandbits(64):x}".encode('utf-8')).decode('utf-8')
+        return f"ss://{user_info}@{host}:{port}#{quote(remark)}"
+    if protocol == "trojan":
+        return f"trojan://{rng.getrandbits(64):x}@{host}:{port}?security=tls&sni={_host(rng)}&type=tcp#{quote(remark)}"
+    if protocol == "vless":
+        return (f"vless://{_uuid(rng)}@{host}:{port}?encryption=none&security={rng.choice(['tls', 'reality', 'none'])}"
+                f"&sni={_host(rng)}&type=ws&path=%2F{rng.getrandbits(24):x}#{quote(remark)}")
+    return f"hysteria2://{rng.getrandbits(64):x}@{host}:{port}?sni={_host(rng)}&insecure=1#{quote(remark)}"
+
+def make_links(rng: random.Random, count: int, vmess_ratio: float = 0.2) -> List[str]:
+    others = [p for p in PROTOCOLS if p != "vmess"]
+    return [make_link(rng, "vmess" if rng.random() < vmess_ratio else rng.choice(others)) for _ in range(count)]
+
+def plain_links(rng: random.Random, count: int) -> str:
+    return "\n".join(make_links(rng, count))
+
+def base64_subscription(rng: random.Random, count: int) -> str:
+    return base64.b64encode(plain_links(rng, count).encode('utf-8')).decode('utf-8')
+
+def _yaml_scalar(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{k}: {_yaml_scalar(v)}" for k, v in value.items()) + "}"
+    return json.dumps(str(value), ensure_ascii=False)
+
+def clash_yaml(rng: random.Random, count: int) -> str:
+    """Clash 配置：proxies (流式映射) + proxy-groups + 很长的 rules 段"""
+    configs = [make_config(rng, rng.choice(["vmess", "ss", "trojan"])) for _ in range(count)]
+    lines = ["port: 7890", "socks-port: 7891", "allow-lan: false", "mode: rule", "log-level: info", "proxies:"]
+    lines += [f"  - {_yaml_scalar(config)}" for config in configs]
+    lines += ["proxy-groups:", "  - name: PROXY", "    type: select", "    proxies:"]
+    lines += [f"      - {_yaml_scalar(config['name'])}" for config in configs[:200]]
+    lines.append("rules:")
+    kinds = ["DOMAIN-SUFFIX", "DOMAIN-KEYWORD", "DOMAIN", "IP-CIDR"]
+    for _ in range(count * RULES_PER_NODE):
+        kind = rng.choice(kinds)
+        target = f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.0.0/16" if kind == "IP-CIDR" else _host(rng)
+        lines.append(f"  - {kind},{target},{rng.choice(['PROXY', 'DIRECT', 'REJECT'])}")
+    lines.append("  - MATCH,PROXY")
+    return "\n".join(lines)
+
+def json_list(rng: random.Random, count: int) -> str:
+    return json.dumps([make_config(rng, rng.choice(["vmess", "ss", "trojan"])) for _ in range(count)], ensure_ascii=False, indent=2)
+
+def mixed_junk(rng: random.Random, count: int) -> str:
+    """README/HTML 式的混杂文本：链接零散分布在大量无关内容中"""
+    junk = [
+        "<div class=\"markdown-body\"><p>免费节点每日更新，请勿用于非法用途</p></div>",
+        "## 使用说明: 复制订阅链接到客户端 https://example.com/sub?token=abcdef",
+        "| 地区 | 延迟 | 速度 |", "|------|------|------|",
+        "```yaml", "```", "<!-- comment -->", "const config = { retries: 3, timeout: 5000 };",
+        "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.",
+    ]
+    lines = []
+    for link in make_links(rng, count):
+        lines.extend(rng.choice(junk) for _ in range(JUNK_LINES_PER_NODE))
+        lines.append(f"- 节点: {link} " if rng.random() < 0.5 else link)
+    return "\n".join(lines)
+
+def vmess_heavy(rng: random.Random, count: int) -> str:
+    return "\n".join(make_links(rng, count, VMESS_HEAVY_RATIO))
+
+CORPUS_KINDS = {
+    "links": (plain_links, "txt"),
+    "base64": (base64_subscription, "txt"),
+    "clash_yaml": (clash_yaml, "yaml"),
+    "json_list": (json_list, "json"),
+    "mixed_junk": (mixed_junk, "md"),
+    "vmess_heavy": (vmess_heavy, "txt"),
+}
+
+def build_corpus(nodes: int = DEFAULT_NODES, seed: int = DEFAULT_SEED) -> Dict[str, str]:
+    """生成全部语料：{类型: 文本}，每种类型使用独立的随机序列，增删类型不影响其他语料"""
+    return {kind: builder(random.Random(f"{seed}:{kind}"), nodes) for kind, (builder, _) in CORPUS_KINDS.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="生成确定性的基准测试语料")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODES, help="每份语料包含的节点数")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", default=os.path.join(".cache", "bench_corpus"), help="输出目录")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for kind, text in build_corpus(args.nodes, args.seed).items():
+        path = os.path.join(args.out, f"{kind}.{CORPUS_KINDS[kind][1]}")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"{path}: {len(text.encode('utf-8')) / 1024:.1f} KB")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+import os
+import sys
+import json
+import math
+import time
+import zlib
+import random
+import hashlib
+import argparse
+import threading
+import multiprocessing
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import DEFAULT_SEED, plain_links, base64_subscription, clash_yaml, json_list, mixed_junk, vmess_heavy
+
+# --- GitHub 代码搜索与 raw 内容的本地替身服务 ---
+# /search/code 按查询中的 关键词 / extension: / size: 从固定的文件全集中确定性地筛选结果，带速率限制响应头与脚本化的 403/429 限流；
+# /raw/<仓库>/<提交>/<路径> 返回由 corpus.py 生成的文件内容 (搜索结果中的 sha 为内容的 git blob sha，fork 文件与原文件相同)，延迟与节点数可配置；/_stats 返回请求计数，/_reset 返回计数后清零
+# 与 aggregator.py 配合：GITHUB_API_URL=http://127.0.0.1:<端口> GITHUB_RAW_URL=http://127.0.0.1:<端口>/raw
+
+DEFAULT_FILES = 20000          # 文件全集大小
+MATCH_PERCENT = 30             # 每个文件命中某个关键词的概率 (%)
+FORK_RATIO = 0.15              # 内容与另一个文件完全相同的比例 (fork/镜像)
+EMPTY_RATIO = 0.3              # 不含任何节点的文件比例 (命中关键词但不是订阅文件)
+REPO_COUNT = 3000              # 文件分布到的仓库数
+SEARCH_RESULT_CAP = 1000       # GitHub 只允许翻到前 1000 个结果
+MIN_FILE_SIZE = 200            # 名义文件大小范围 (字节，对数均匀分布)，用于 size: 分片
+MAX_FILE_SIZE = 384 * 1024
+BODY_CACHE_SIZE = 4096
+
+# 文件后缀 -> 可选的内容生成器
+BODY_BUILDERS = {
+    "yaml": [clash_yaml], "yml": [clash_yaml], "json": [json_list],
+    "txt": [plain_links, base64_subscription, vmess_heavy], "conf": [mixed_junk],
+}
+EXTENSIONS = list(BODY_BUILDERS)
+DIRS = ["", "sub/", "config/", "clash/", "nodes/", "data/2024/"]
+NAMES = ["sub", "config", "clash", "nodes", "v2ray", "proxies", "list", "free", "mix", "all"]
+
+class StandinConfig(NamedTuple):
+    files: int = DEFAULT_FILES
+    file_nodes: int = 40              # 每个文件的平均节点数 (指数分布)
+    raw_latency: float = 0.05         # raw 响应的平均延迟 (秒，0.5~1.5 倍抖动)
+    search_latency: float = 0.02
+    search_limit: int = 30            # 每个窗口的搜索额度 (X-RateLimit-Limit)
+    search_window: float = 60.0       # 额度窗口 (秒)，窗口结束时额度重置
+    episodes: str = ""                # 脚本化限流，见 parse_episodes
+    seed: int = DEFAULT_SEED
+
+class FileEntry(NamedTuple):
+    repo: str
+    path: str
+    ext: str
+    commit: str         # html_url / raw 链接中的提交号，每个文件唯一
+    size: int           # 名义大小，只用于 size: 过滤
+    content_seed: int   # 内容来源的文件序号，fork 文件指向原文件 (内容与 blob sha 均与原文件相同)
+    nodes: int
+
+def blob_sha(body: bytes) -> str:
+    """与 git 一致的 blob sha：内容相同的文件 sha 相同"""
+    return hashlib.sha1(b"blob %d\0" % len(body) + body).hexdigest()
+
+def parse_episodes(spec: str) -> Dict[int, Tuple[int, Optional[int]]]:
+    """
+    脚本化限流："序号[-序号]:状态码[:Retry-After]"，逗号分隔，序号为第几个搜索请求 (从 1 开始)
+    例如 "5:429:3,20-22:403" 表示第 5 个请求返回 429 并要求 3 秒后重试，第 20~22 个请求返回无任何提示头的 403 (次级限流)
+    """
+    episodes: Dict[int, Tuple[int, Optional[int]]] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        fields = part.split(":")
+        if len(fields) not in (2, 3):
+            raise ValueError(f"无效的限流脚本: {part}")
+        first, _, last = fields[0].partition("-")
+        retry_after = int(fields[2]) if len(fields) == 3 else None
+        for index in range(int(first), int(last or first) + 1):
+            episodes[index] = (int(fields[1]), retry_after)
+    return episodes
+
+def build_files(config: StandinConfig) -> List[FileEntry]:
+    rng = random.Random(f"{config.seed}:standin-files")
+    files: List[FileEntry] = []
+    for i in range(config.files):
+        repo = f"user{rng.randrange(REPO_COUNT)}/{rng.choice(NAMES)}-{rng.randrange(100)}"
+        commit = hashlib.sha1(f"{config.seed}:{i}".encode('utf-8')).hexdigest()
+        if i and rng.random() < FORK_RATIO:
+            # fork/镜像：另一个仓库中同路径、同内容的文件
+            origin = files[files[rng.randrange(i)].content_seed]
+            files.append(origin._replace(repo=repo, commit=commit))
+            continue
+        ext = rng.choice(EXTENSIONS)
+        path = f"{rng.choice(DIRS)}{rng.choice(NAMES)}{i}.{ext}"
+        size = int(math.exp(rng.uniform(math.log(MIN_FILE_SIZE), math.log(MAX_FILE_SIZE))))
+        nodes = 0 if rng.random() < EMPTY_RATIO else max(1, int(rng.expovariate(1 / max(config.file_nodes, 1))))
+        files.append(FileEntry(repo, path, ext, commit, size, i, nodes))
+    return files
+
+def parse_query(q: str) -> Tuple[str, Optional[str], Optional[Tuple[int, int]]]:
+    """拆出 关键词、extension: 与 size:lo..hi"""
+    words, ext, size = [], None, None
+    for token in q.split():
+        if token.startswith("extension:"):
+            ext = token[len("extension:"):]
+        elif token.startswith("size:") and ".." in token:
+            lo, hi = token[len("size:"):].split("..", 1)
+            size = (int(lo), int(hi))
+        else:
+            words.append(token)
+    return " ".join(words), ext, size
+
+class GitHubStandin:
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.files = build_files(config)
+        self.by_commit = {f.commit: i for i, f in enumerate(self.files)}
+        self.blob_shas: Dict[int, str] = {} # 内容序号 -> blob sha (首次出现在搜索结果中时计算)
+        self.episodes = parse_episodes(config.episodes)
+        self.lock = threading.Lock()
+        self.reset()
+        self.matches = lru_cache(maxsize=1024)(self._matches)
+        self.body = lru_cache(maxsize=BODY_CACHE_SIZE)(self._body)
+
+    def reset(self) -> None:
+        """清零计数与额度窗口，限流脚本从第 1 个请求重新开始"""
+        self.window_start = time.time()
+        self.window_used = 0
+        self.stats = {"search_requests": 0, "search_throttled": 0, "raw_requests": 0, "raw_bytes": 0, "raw_not_found": 0}
+
+    def _matches(self, keyword: str, ext: Optional[str]) -> List[int]:
+        """命中 关键词 + 后缀 的文件，按索引时间倒序 (序号越大越新)"""
+        return [
+            i for i in range(len(self.files) - 1, -1, -1)
+            if (ext is None or self.files[i].ext == ext) and zlib.crc32(f"{keyword}:{i}".encode('utf-8')) % 100 < MATCH_PERCENT
+        ]
+
+    def _body(self, content_seed: int) -> bytes:
+        entry = self.files[content_seed]
+        rng = random.Random(f"{self.config.seed}:body:{content_seed}")
+        builder = rng.choice(BODY_BUILDERS[entry.ext])
+        return builder(rng, entry.nodes).encode('utf-8')
+
+    def sha(self, index: int) -> str:
+        content_seed = self.files[index].content_seed
+        sha = self.blob_shas.get(content_seed)
+        if sha is None:
+            sha = self.blob_shas[content_seed] = blob_sha(self.body(content_seed))
+        return sha
+
+    def rate_limit(self) -> Tuple[Optional[Tuple[int, str]], Dict[str, str]]:
+        """记一次搜索请求，返回 (限流响应 (状态码, 消息) 或 None, 速率限制响应头)"""
+        with self.lock:
+            self.stats["search_requests"] += 1
+            now = time.time()
+            if now - self.window_start >= self.config.search_window:
+                self.window_start, self.window_used = now, 0
+            reset_at = int(math.ceil(self.window_start + self.config.search_window))
+            headers = {"X-RateLimit-Limit": str(self.config.search_limit), "X-RateLimit-Resource": "search"}
+
+            episode = self.episodes.get(self.stats["search_requests"])
+            if episode is not None:
+                # 次级限流：只按脚本给出 Retry-After，其余提示头一概不给
+                self.stats["search_throttled"] += 1
+                status, retry_after = episode
+                return (status, "You have exceeded a secondary rate limit."), ({"Retry-After": str(retry_after)} if retry_after is not None else {})
+
+            if self.window_used >= self.config.search_limit:
+                self.stats["search_throttled"] += 1
+                headers.update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset_at)})
+                return (403, "API rate limit exceeded."), headers
+            self.window_used += 1
+            headers.update({"X-RateLimit-Remaining": str(self.config.search_limit - self.window_used), "X-RateLimit-Reset": str(reset_at)})
+            return None, headers
+
+    def search(self, query: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        keyword, ext, size = parse_query(query.get("q", [""])[0])
+        per_page = min(int(query.get("per_page", ["30"])[0]), 100)
+        page = max(int(query.get("page", ["1"])[0]), 1)
+        if page * per_page > SEARCH_RESULT_CAP:
+            return 422, {"message": "Only the first 1000 search results are available"}
+        matched = self.matches(keyword, ext)
+        if size:
+            matched = [i for i in matched if size[0] <= self.files[i].size <= size[1]]
+        items = []
+        for i in matched[(page - 1) * per_page: page * per_page]:
+            entry = self.files[i]
+            items.append({
+                "name": entry.path.rsplit("/", 1)[-1],
+                "path": entry.path,
+                "sha": self.sha(i),
+                "html_url": f"https://github.com/{entry.repo}/blob/{entry.commit}/{entry.path}",
+                "repository": {"full_name": entry.repo},
+                "score": 1.0,
+            })
+        return 200, {"total_count": len(matched), "incomplete_results": False, "items": items}
+
+    def raw(self, path: str) -> Tuple[int, bytes]:
+        """/raw/<owner>/<repo>/<提交号>/<path>"""
+        parts = path.split("/", 5)
+        index = self.by_commit.get(parts[4]) if len(parts) == 6 else None
+        if index is None:
+            with self.lock:
+                self.stats["raw_not_found"] += 1
+            return 404, b"404: Not Found"
+        body = self.body(self.files[index].content_seed)
+        with self.lock:
+            self.stats["raw_requests"] += 1
+            self.stats["raw_bytes"] += len(body)
+        return 200, body
+
+def make_handler(standin: GitHubStandin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # keep-alive，与真实服务一致地复用连接
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/search/code":
+                time.sleep(standin.config.search_latency)
+                throttled, headers = standin.rate_limit()
+                if throttled:
+                    status, message = throttled
+                    self._send(status, json.dumps({"message": message}).encode('utf-8'), "application/json", headers)
+                    return
+                status, data = standin.search(parse_qs(url.query))
+                self._send(status, json.dumps(data).encode('utf-8'), "application/json", headers)
+            elif url.path.startswith("/raw/"):
+                time.sleep(standin.config.raw_latency * random.uniform(0.5, 1.5))
+                status, body = standin.raw(url.path)
+                self._send(status, body, "text/plain; charset=utf-8")
+            elif url.path in ("/_stats", "/_reset"):
+                with standin.lock:
+                    body = json.dumps(standin.stats).encode('utf-8')
+                    if url.path == "/_reset":
+                        standin.reset()
+                self._send(200, body, "application/json")
+            else:
+                self._send(404, b"{}", "application/json")
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(config: StandinConfig, host: str = "127.0.0.1", port: int = 0, ready=None) -> None:
+    """启动服务并阻塞；ready 为管道连接时把实际端口回传给父进程"""
+    server = ThreadingHTTPServer((host, port), make_handler(GitHubStandin(config)))
+    server.daemon_threads = True
+    if ready is not None:
+        ready.send(server.server_address[1])
+    server.serve_forever()
+
+def start_in_process(config: StandinConfig, host: str = "127.0.0.1") -> Tuple[multiprocessing.Process, str]:
+    """在独立进程中启动替身服务 (不与被测爬虫争抢 GIL)，返回 (进程, 基础地址)"""
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    process = ctx.Process(target=serve, args=(config, host, 0, child), daemon=True)
+    process.start()
+    if not parent.poll(60):
+        process.terminate()
+        raise RuntimeError("替身服务启动超时")
+    return process, f"http://{host}:{parent.recv()}"
+
+def main():
+    defaults = StandinConfig()
+    parser = argparse.ArgumentParser(description="GitHub 代码搜索与 raw 内容的本地替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--files", type=int, default=defaults.files, help="文件全集大小")
+    parser.add_argument("--file-nodes", type=int, default=defaults.file_nodes, help="每个文件的平均节点数")
+    parser.add_argument("--raw-latency", type=float, default=defaults.raw_latency, help="raw 响应平均延迟 (秒)")
+    parser.add_argument("--search-latency", type=float, default=defaults.search_latency, help="搜索响应延迟 (秒)")
+    parser.add_argument("--search-limit", type=int, default=defaults.search_limit, help="每个窗口的搜索额度")
+    parser.add_argument("--search-window", type=float, default=defaults.search_window, help="额度窗口 (秒)")
+    parser.add_argument("--episodes", default=defaults.episodes, help="脚本化限流，如 \"5:429:3,20-22:403\"")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    config = StandinConfig(args.files, args.file_nodes, args.raw_latency, args.search_latency,
+                           args.search_limit, args.search_window, args.episodes, args.seed)
+    base = f"http://{args.host}:{args.port}"
+    print(f"替身服务: {base}  (GITHUB_API_URL={base} GITHUB_RAW_URL={base}/raw)")
+    try:
+        serve(config, args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,12 +7,30 @@ import asyncio
 import ssl
 import time
 import logging
+import argparse
 import socket # [新增] 用于 DNS 解析
-from urllib.parse import urlparse, parse_qs, unquote, quote # [新增] 引入 quote 用于 URL 编码
+import ipaddress
+import contextvars
+import zlib
+import hashlib
+import itertools
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote # [新增] 引入 quote 用于 URL 编码
+
+from node_model import Node
 
 # --- [新增] 优化项 3: 严格版本兼容性断言 ---
 assert sys.version_info >= (3, 11), "SSL 检测要求 Python 3.11+"
 
+# resource 仅在类 Unix 系统可用，用于读取文件描述符上限
+try:
+    import resource
+except ImportError:
+    resource = None
+
 # --- [新增] 附加功能 A: GeoIP 数据库初始化 ---
 try:
     import maxminddb
@@ -21,11 +39,10 @@ try:
 except ImportError:
     geo_reader = None
 
-def get_country_code(host: str) -> str:
-    """[新增] 根据主机域名或 IP 解析国家地区代码"""
+def get_country_code(ip: str) -> str:
+    """[新增] 根据已解析的 IP 查询国家地区代码 (不再额外发起 DNS 查询)"""
     if not geo_reader: return "UNK"
     try:
-        ip = socket.gethostbyname(host)
         res = geo_reader.get(ip)
         if res and 'country' in res:
             return res['country']['iso_code']
@@ -41,11 +58,41 @@ SUB_FILE = "sub.txt"           # Base64 订阅文件
 # [新增] 最大保留节点数量 (防止长期运行导致文件无限膨胀)
 MAX_NODES = 10000
 
-# 并发数 (根据网络情况调整)
+# 并发数：自适应模式下为初始值，运行中按超时率与延迟漂移在 [MIN, MAX] 间调整
 CONCURRENCY = 200              
+ADAPTIVE_CONCURRENCY = True    # 关闭后固定使用 CONCURRENCY
+MIN_CONCURRENCY = 20
+MAX_CONCURRENCY = 1000
+ADAPT_WINDOW = 50              # 每多少个探测结果评估一次
+INCREASE_STEP = 20             # 健康时每次增加的并发数
+DECREASE_FACTOR = 0.7          # 拥塞时的收缩比例
+TIMEOUT_RATE_MARGIN = 0.1      # 超时率超出健康基线多少视为拥塞
+LATENCY_DRIFT_LIMIT = 2.0      # TCP 建连延迟中位数超过最低值的倍数视为拥塞
+FD_RESERVE = 64                # 为日志、DNS 线程等预留的文件描述符
+# 多进程分片：节点按端点分到多个进程，每个进程独立事件循环与并发预算 (上述并发值按进程数均分)
+CHECK_WORKERS = os.cpu_count() or 1
+SHARD_MIN_NODES = 5000         # 节点数少于该值时不值得启动子进程，仍在当前进程检测
+# 端点探测缓存 (工作流通过 actions/cache 跨运行保存 .cache 目录)
+# 各窗口以"轮"为单位，按工作流的调度间隔换算为时长
+PROBE_CACHE_FILE = os.path.join(".cache", "probe_cache.json")
+RUN_INTERVAL = 5 * 86400              # 定时运行间隔，与工作流 cron '0 0 */5 * *' 一致
+PROBE_CACHE_TTL_RUNS = 1              # 存活结果在之后的 1 轮内复用 (每个存活端点至少每两轮真实探测一次)
+NEGATIVE_CACHE_MIN_FAILS = 5          # 连续失败 5 轮后开始跳过 (偶发失败不影响下一轮检测)
+NEGATIVE_CACHE_BASE_RUNS = 1          # 开始跳过时跳过的轮数，之后每次连续失败翻倍
+NEGATIVE_CACHE_MAX_RUNS = 8           # 跳过轮数上限
+PROBE_CACHE_RETENTION_RUNS = 6        # 超过该轮数未再探测的条目将被清理
+
+def runs_window(runs):
+    """覆盖之后 runs 个定时运行的时长：多出半个间隔，吸收排队延迟与手动重跑带来的抖动"""
+    return runs * RUN_INTERVAL + RUN_INTERVAL / 2 if runs > 0 else 0
+QUEUE_SIZE = MAX_CONCURRENCY * 2 # 待检测队列长度上限 (输入按需读取，不一次性展开全部节点)
 # 超时设置 (秒)
 TCP_TIMEOUT = 2    # TCP 连接超时 (快速筛选)
 SSL_TIMEOUT = 3    # SSL 握手超时 (验证可用性)
+DNS_TIMEOUT = 3    # 单个域名解析超时
+DNS_WORKERS = 64   # 域名解析线程数 (getaddrinfo 为阻塞调用，放到独立线程池中并发执行)
+# TLS 会话复用：同一 IP:端口 + SNI 的后续握手尝试恢复之前的会话 (多个域名指向同一服务器时常见)
+TLS_SESSION_REUSE = True
 
 # --- 日志配置 ---
 logging.basicConfig(
@@ -56,19 +103,7 @@ logging.basicConfig(
 logger = logging.getLogger("NodeChecker")
 
 class NodeParser:
-    """节点解析工具类"""
-    
-    @staticmethod
-    def safe_base64_decode(text):
-        if not text: return ""
-        text = text.strip().replace('-', '+').replace('_', '/')
-        padding = len(text) % 4
-        if padding > 0:
-            text += '=' * (4 - padding)
-        try:
-            return base64.b64decode(text).decode('utf-8', errors='ignore')
-        except Exception:
-            return ""
+    """节点解析工具类 (解析逻辑统一在 node_model.Node)"""
 
     @staticmethod
     def parse(link):
@@ -76,115 +111,359 @@ class NodeParser:
         解析各类节点链接
         返回: (host, port, sni, is_tls)
         """
-        link = link.strip()
-        host, port, sni, is_tls = None, None, None, False
-        
+        node = Node.parse(link)
+        return node.host, node.port, node.sni, node.tls
+
+def fd_concurrency_cap():
+    """按进程的文件描述符软上限估算可同时在途的探测数 (每个探测占用一个套接字)"""
+    if resource is None:
+        return MAX_CONCURRENCY
+    try:
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (OSError, ValueError):
+        return MAX_CONCURRENCY
+    if soft == resource.RLIM_INFINITY:
+        return MAX_CONCURRENCY
+    return max(soft - FD_RESERVE, MIN_CONCURRENCY)
+
+class AdaptiveLimiter:
+    """
+    AIMD 并发控制器：替代固定大小的信号量
+    每 ADAPT_WINDOW 个探测结果评估一次：超时率明显高于健康基线、或 TCP 建连延迟中位数
+    相对最低值漂移超过 LATENCY_DRIFT_LIMIT 时乘性收缩，否则加性扩张；上限受文件描述符限制
+    """
+
+    def __init__(self, initial=CONCURRENCY, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY, adaptive=ADAPTIVE_CONCURRENCY):
+        self.maximum = max(min(maximum, fd_concurrency_cap()), minimum)
+        self.minimum = minimum
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.cond = asyncio.Condition()
+        # 当前评估窗口
+        self.window_count = 0
+        self.window_timeouts = 0
+        self.window_latencies = []
+        # 健康基线
+        self.base_timeout_rate = None
+        self.base_latency = None
+        self.last_decision = ""
+        self.adjustments = 0
+        self.low, self.high = self.limit, self.limit
+
+    async def __aenter__(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self.cond:
+            self.in_flight -= 1
+            # 只唤醒空闲槽位数量的等待者：通常为 1，上限刚扩张时一次补足新增的槽位
+            # (notify_all 会让全部等待中的 worker 醒来再逐个睡回去，开销随等待者数量线性增长)
+            self.cond.notify(max(self.limit - self.in_flight, 0))
+
+    def record(self, timed_out, connect_ms=None):
+        """记录一次探测结果 (是否超时，TCP 建连耗时)"""
+        if not self.adaptive:
+            return
+        self.window_count += 1
+        if timed_out:
+            self.window_timeouts += 1
+        if connect_ms is not None:
+            self.window_latencies.append(connect_ms)
+        if self.window_count >= ADAPT_WINDOW:
+            self._adapt()
+
+    def _adapt(self):
+        timeout_rate = self.window_timeouts / self.window_count
+        latency = sorted(self.window_latencies)[len(self.window_latencies) // 2] if self.window_latencies else None
+        self.window_count, self.window_timeouts, self.window_latencies = 0, 0, []
+
+        if self.base_timeout_rate is None:
+            self.base_timeout_rate = timeout_rate
+        if latency is not None:
+            # 延迟基线取近期最低值，并每个窗口放宽 5%，避免输入后段节点整体更远时被误判为持续拥塞
+            self.base_latency = latency if self.base_latency is None else min(latency, self.base_latency * 1.05)
+        drift = latency / self.base_latency if latency and self.base_latency else 1.0
+
+        old_limit = self.limit
+        if timeout_rate > self.base_timeout_rate + TIMEOUT_RATE_MARGIN or drift > LATENCY_DRIFT_LIMIT:
+            self.limit = max(self.minimum, int(self.limit * DECREASE_FACTOR))
+            self.last_decision = f"-{old_limit - self.limit} (超时率 {timeout_rate:.0%}, 延迟漂移 x{drift:.1f})"
+        else:
+            self.limit = min(self.maximum, self.limit + INCREASE_STEP)
+            # 只用健康窗口更新超时率基线 (死节点本身就会产生稳定比例的超时)
+            self.base_timeout_rate = 0.8 * self.base_timeout_rate + 0.2 * timeout_rate
+            self.last_decision = f"+{self.limit - old_limit}" if self.limit > old_limit else "="
+        if self.limit != old_limit:
+            self.adjustments += 1
+            self.low, self.high = min(self.low, self.limit), max(self.high, self.limit)
+
+    def status(self):
+        return f"并发: {self.limit}{f' ({self.last_decision})' if self.last_decision else ''}"
+
+    def summary(self):
+        if not self.adaptive:
+            return f"固定并发 {self.limit}"
+        return f"自适应并发：调整 {self.adjustments} 次，范围 {self.low}-{self.high}，最终 {self.limit} (上限 {self.maximum})"
+
+class DNSResolver:
+    """
+    共享 DNS 缓存：每个域名只解析一次，并发请求同一域名时共用同一次查询
+    解析在独立线程池中带超时执行，不阻塞事件循环；成功与失败的结果都会缓存
+    """
+
+    def __init__(self, workers=DNS_WORKERS, timeout=DNS_TIMEOUT):
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dns")
+        self.cache = {}     # 域名 -> IP (解析失败为 None)
+        self.pending = {}   # 域名 -> 正在进行的解析 Future
+        self.lookups = 0
+        self.failures = 0
+
+    async def resolve(self, host):
+        """返回 host 对应的 IP，失败返回 None；IP 字面量直接返回"""
         try:
-            # --- 1. VMess ---
-            if link.startswith("vmess://"):
-                try:
-                    b64_str = link[8:]
-                    json_str = NodeParser.safe_base64_decode(b64_str)
-                    conf = json.loads(json_str)
-                    host = conf.get("add")
-                    port = conf.get("port")
-                    # 严格筛选 TLS
-                    if conf.get("tls") in ["tls", "xtls"]:
-                        is_tls = True
-                        sni = conf.get("sni") or conf.get("host")
-                except: pass
+            ipaddress.ip_address(host)
+            return host
+        except ValueError:
+            pass
+        if host in self.cache:
+            return self.cache[host]
+        future = self.pending.get(host)
+        if future is None:
+            future = asyncio.ensure_future(self._lookup(host))
+            self.pending[host] = future
+        return await asyncio.shield(future)
 
-            # --- 2. Shadowsocks (SS) ---
-            elif link.startswith("ss://"):
-                try:
-                    body = link[5:].split('#')[0]
-                    if '@' in body:
-                        part_host = body.split('@')[1]
-                    else:
-                        decoded = NodeParser.safe_base64_decode(body)
-                        part_host = decoded.split('@')[1] if '@' in decoded else ""
-                    
-                    if part_host:
-                        h, p = part_host.split(':')
-                        host = h
-                        port = int(p)
-                    # 普通 SS 默认无 TLS，除非你有特定识别 plugin 的逻辑，否则这里 is_tls 为 False
-                except: pass
+    async def _lookup(self, host):
+        loop = asyncio.get_running_loop()
+        self.lookups += 1
+        ip = None
+        try:
+            infos = await asyncio.wait_for(
+                loop.run_in_executor(self.executor, socket.getaddrinfo, host, None, 0, socket.SOCK_STREAM),
+                timeout=self.timeout
+            )
+            # 优先 IPv4 (多数运行环境没有可用的 IPv6 出口)
+            ipv4 = [info for info in infos if info[0] == socket.AF_INET]
+            if ipv4 or infos:
+                ip = (ipv4 or infos)[0][4][0]
+        except (asyncio.TimeoutError, OSError, UnicodeError):
+            pass
+        if ip is None:
+            self.failures += 1
+        self.cache[host] = ip
+        self.pending.pop(host, None)
+        return ip
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
-            # --- 3. URL Schema (Trojan, VLESS, Hysteria2) ---
+def endpoint_key(node):
+    """探测端点：(主机, 端口, SNI)。只有 UUID/密码/路径不同的节点共用同一端点，只需握手一次"""
+    return (node.host.lower(), node.port, node.sni)
+
+# start_tls 不支持传入待恢复的会话：由当前探测协程通过上下文变量提供，在创建 SSLObject 时注入
+_resume_session = contextvars.ContextVar("resume_session", default=None)
+
+class ResumableSSLContext(ssl.SSLContext):
+    """wrap_bio 时附带上下文变量中的会话，使 asyncio 的 start_tls 也能恢复 TLS 会话"""
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session or _resume_session.get())
+
+class TLSProbe:
+    """
+    全部探测共享的 TLS 客户端：上下文只创建一次 (不校验证书，也不加载系统 CA)，
+    按 (IP, 端口, SNI) 缓存会话；握手耗时与上下文构建耗时分开统计
+    """
+
+    def __init__(self, reuse_sessions=TLS_SESSION_REUSE):
+        start = time.time()
+        self.context = ResumableSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        self.context.check_hostname = False
+        self.context.verify_mode = ssl.CERT_NONE
+        self.setup_ms = (time.time() - start) * 1000
+        self.reuse_sessions = reuse_sessions
+        self.sessions = {}
+        self.handshakes = 0
+        self.resumed = 0
+        self.tcp_ms = 0.0
+        self.handshake_ms = 0.0
+
+    async def handshake(self, writer, ip, port, sni):
+        """在已建立的 TCP 连接上升级 SSL，返回握手耗时 (ms)"""
+        key = (ip, port, sni)
+        token = _resume_session.set(self.sessions.get(key) if self.reuse_sessions else None)
+        try:
+            start_ssl = time.time()
+            await asyncio.wait_for(
+                writer.start_tls(self.context, server_hostname=sni),
+                timeout=SSL_TIMEOUT
+            )
+            latency = (time.time() - start_ssl) * 1000
+        finally:
+            _resume_session.reset(token)
+
+        self.handshakes += 1
+        self.handshake_ms += latency
+        ssl_object = writer.get_extra_info("ssl_object")
+        if ssl_object is not None:
+            if ssl_object.session_reused:
+                self.resumed += 1
+            if self.reuse_sessions and ssl_object.session is not None:
+                self.sessions[key] = ssl_object.session
+        return latency
+
+    def summary(self):
+        if not self.handshakes:
+            return f"TLS 上下文构建 {self.setup_ms:.1f}ms"
+        return (f"TLS 上下文构建 {self.setup_ms:.1f}ms (共享 1 个)，平均 TCP {self.tcp_ms / self.handshakes:.0f}ms / "
+                f"握手 {self.handshake_ms / self.handshakes:.0f}ms，会话复用 {self.resumed}/{self.handshakes}")
+
+class ProbeCache:
+    """
+    跨运行的端点探测结果缓存，键为 (host, port, sni)
+    存活结果在之后的 PROBE_CACHE_TTL_RUNS 轮内直接复用；连续失败 NEGATIVE_CACHE_MIN_FAILS 轮的端点在之后若干轮内不再探测，
+    跳过轮数随连续失败次数倍增
+    force=True 时忽略已有结果强制重新探测 (新结果仍会写回)
+    """
+
+    def __init__(self, path=PROBE_CACHE_FILE, force=False):
+        self.path = path
+        self.force = force
+        self.entries = {}
+        self.updates = {}   # 本轮新写入的条目 (分片子进程据此回传给父进程)
+        self.hits = 0
+        self.skipped = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception:
+                self.entries = {}
+
+    @staticmethod
+    def _key(key):
+        host, port, sni = key
+        return f"{host}|{port}|{sni or ''}"
+
+    def lookup(self, key, now=None):
+        """返回 (是否命中, 结果)；结果为 (延迟ms, IP, 测量时间) 或 None (仍在跳过窗口内的失效端点)"""
+        if self.force:
+            return False, None
+        entry = self.entries.get(self._key(key))
+        if not entry:
+            return False, None
+        now = now or time.time()
+        if entry.get("alive"):
+            if now - entry["checked"] < runs_window(PROBE_CACHE_TTL_RUNS):
+                self.hits += 1
+                return True, (entry["latency"], entry["ip"], entry["checked"])
+        elif now < entry.get("skip_until", 0):
+            self.skipped += 1
+            return True, None
+        return False, None
+
+    def record(self, key, result, now=None):
+        """写入探测结果：result 为 (延迟ms, IP) 或 None (探测失败)"""
+        now = now or time.time()
+        cache_key = self._key(key)
+        if result is not None:
+            entry = {"alive": True, "latency": round(result[0], 1), "ip": result[1], "checked": now}
+        else:
+            previous = self.entries.get(cache_key) or {}
+            fails = 1 if previous.get("alive", True) else previous.get("fails", 0) + 1
+            runs = 0
+            if fails >= NEGATIVE_CACHE_MIN_FAILS:
+                runs = min(NEGATIVE_CACHE_BASE_RUNS * 2 ** (fails - NEGATIVE_CACHE_MIN_FAILS), NEGATIVE_CACHE_MAX_RUNS)
+            entry = {"alive": False, "fails": fails, "checked": now, "skip_until": now + runs_window(runs)}
+        self.entries[cache_key] = entry
+        self.updates[cache_key] = entry
+
+    def merge(self, updates):
+        self.entries.update(updates)
+
+    def save(self, now=None):
+        """写回缓存，并清理长期未再探测的条目"""
+        if not self.path:
+            return
+        cutoff = (now or time.time()) - PROBE_CACHE_RETENTION_RUNS * RUN_INTERVAL
+        entries = {k: v for k, v in self.entries.items() if max(v.get("checked", 0), v.get("skip_until", 0)) >= cutoff}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"保存探测缓存失败: {e}")
+
+    def summary(self):
+        return f"探测缓存：复用存活结果 {self.hits} 个端点，跳过失效端点 {self.skipped} 个{' (已强制重新探测)' if self.force else ''}"
+
+class EndpointProbes:
+    """按端点共享探测结果：同一端点的第一个节点发起探测 (先查探测缓存)，其余节点等待同一个 Future"""
+
+    def __init__(self, limiter, resolver, tls, cache):
+        self.limiter = limiter
+        self.resolver = resolver
+        self.tls = tls
+        self.cache = cache
+        self.results = {}   # 端点 -> 探测 Future，结果为 (延迟ms, IP, 测量时间) 或 None
+
+    async def probe(self, key):
+        future = self.results.get(key)
+        if future is None:
+            hit, result = self.cache.lookup(key)
+            if hit:
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(result)
             else:
-                try:
-                    parsed = urlparse(link)
-                    host = parsed.hostname
-                    port = parsed.port
-                    qs = parse_qs(parsed.query)
-                    security = qs.get("security", [""])[0]
-                    scheme = parsed.scheme.lower()
-                    
-                    # Trojan
-                    if scheme == "trojan":
-                        if security != "none": is_tls = True
-                    
-                    # VLESS / Hysteria2
-                    elif scheme in ["vless", "hysteria2", "hy2"]:
-                        if security in ["tls", "reality", "auto"]: is_tls = True
-                    
-                    if is_tls:
-                        if "sni" in qs: sni = qs["sni"][0]
-                        elif "peer" in qs: sni = qs["peer"][0]
-                except: pass
-            
-            if port: port = int(port)
-                
-        except Exception:
-            return None, None, None, False
+                future = asyncio.ensure_future(self._probe_and_record(key))
+            self.results[key] = future
+        return await asyncio.shield(future)
 
-        return host, port, sni, is_tls
+    async def _probe_and_record(self, key):
+        result = await probe_endpoint(*key, self)
+        now = time.time()
+        self.cache.record(key, result, now)
+        return result + (now,) if result else None
 
-async def check_connectivity(link, semaphore):
+async def probe_endpoint(host, port, sni, probes):
     """
-    分阶段检测：
-    1. 静态过滤非 TLS
+    探测单个端点，返回 (TCP建连 + SSL握手 总延迟ms, IP)，失败返回 None
+    1. DNS 解析 (共享缓存，地理位置查询复用同一 IP)
     2. TCP Ping (连接端口)
-    3. SSL Handshake (验证协议)
+    3. SSL Handshake (验证协议，共享 TLS 上下文并尝试会话复用)
     """
-    # [阶段1] 解析并静态过滤
-    host, port, sni, is_tls = NodeParser.parse(link)
-    
-    # 如果不是 TLS 节点，直接抛弃 (符合"先执行过滤非 TLS 节点")
-    if not is_tls:
-        return None
-    if not host or not port:
-        return None
-
-    async with semaphore:
+    async with probes.limiter:
         writer = None
         try:
+            ip = await probes.resolver.resolve(host)
+            if ip is None:
+                return None
+
             # [阶段2] TCP Ping (去掉不在线节点)
             start_time = time.time()
-            # 建立纯 TCP 连接
+            # 建立纯 TCP 连接 (直连已解析的 IP，延迟不再包含 DNS 耗时)
             reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(host, port), 
+                asyncio.open_connection(ip, port), 
                 timeout=TCP_TIMEOUT
             )
             tcp_latency = (time.time() - start_time) * 1000
+            probes.limiter.record(False, tcp_latency)
             
             # 如果能走到这里，说明 TCP 是通的 (在线)
             
             # [阶段3] SSL 握手 (去掉无效/伪TLS节点)
-            # 准备 SSL 上下文
-            ssl_ctx = ssl.create_default_context()
-            ssl_ctx.check_hostname = False
-            ssl_ctx.verify_mode = ssl.CERT_NONE
-            
             # 在现有 TCP 连接上升级 SSL (start_tls)
             # 这比关闭再重连更高效，且能验证该端口确实支持 SSL
-            start_ssl = time.time()
-            await asyncio.wait_for(
-                writer.start_tls(ssl_ctx, server_hostname=sni),
-                timeout=SSL_TIMEOUT
-            )
-            ssl_handshake_latency = (time.time() - start_ssl) * 1000
+            ssl_handshake_latency = await probes.tls.handshake(writer, ip, port, sni)
+            probes.tls.tcp_ms += tcp_latency
             
             # 计算总延迟 (TCP建连 + SSL握手)
             total_latency = tcp_latency + ssl_handshake_latency
@@ -193,27 +472,14 @@ async def check_connectivity(link, semaphore):
             writer.close()
             try: await writer.wait_closed()
             except: pass
-            
-            # --- [新增] 附加功能 A：查询地理位置并格式化重命名节点 ---
-            cc = get_country_code(host)
-            new_remark = f"[{cc}] {total_latency:.0f}ms"
-            
-            new_link = link
-            if link.startswith("vmess://"):
-                try:
-                    conf = json.loads(NodeParser.safe_base64_decode(link[8:]))
-                    conf["ps"] = new_remark
-                    new_link = "vmess://" + base64.b64encode(json.dumps(conf, separators=(',', ':')).encode('utf-8')).decode('utf-8')
-                except Exception:
-                    new_link = link.split("#")[0] + "#" + quote(new_remark)
-            else:
-                new_link = link.split("#")[0] + "#" + quote(new_remark)
 
-            # 返回结果 (返回带地区和延迟的新链接)
-            return (new_link, total_latency, f"{host}:{port}")
+            return total_latency, ip
 
-        except (asyncio.TimeoutError, ConnectionRefusedError, OSError, ssl.SSLError):
+        except (asyncio.TimeoutError, ConnectionRefusedError, OSError, ssl.SSLError) as e:
             # 任何阶段失败 (TCP连不上 或 SSL握手失败) 都视为无效
+            if writer is None:
+                # TCP 阶段的失败计入并发控制 (超时可能源于拥塞，拒绝连接则不是)
+                probes.limiter.record(isinstance(e, asyncio.TimeoutError))
             if writer:
                 try:
                     writer.close()
@@ -229,55 +495,232 @@ async def check_connectivity(link, semaphore):
                 except: pass
             return None
 
-async def main():
-    print(f"--- 极速节点清洗 (TLS + TCP + SSL Pipeline) ---")
-    
-    if not os.path.exists(INPUT_FILE):
-        print(f"错误: 找不到 {INPUT_FILE}")
-        return
+def latency_remark(cc, latency, checked, now=None):
+    """新名称：[地区] 延迟；延迟取自之前运行的探测缓存时附上测量距今的天数"""
+    remark = f"[{cc}] {latency:.0f}ms"
+    age_days = int(((now or time.time()) - checked) // 86400)
+    return f"{remark} ({age_days}d)" if age_days > 0 else remark
+
+def rename_link(node, new_remark):
+    """把备注替换为新名称 (vmess 直接复用已解码的配置)"""
+    link = node.link
+    if node.vmess_conf is not None:
+        try:
+            conf = dict(node.vmess_conf)
+            conf["ps"] = new_remark
+            return "vmess://" + base64.b64encode(json.dumps(conf, separators=(',', ':')).encode('utf-8')).decode('utf-8')
+        except Exception:
+            pass
+    return link.split("#")[0] + "#" + quote(new_remark)
+
+async def check_connectivity(node, probes):
+    """
+    检测单个节点 (node 为已解析的 Node)：
+    1. 静态过滤非 TLS
+    2. 按 (host, port, sni) 端点共享探测结果，同一端点只做一次 TCP + SSL 握手
+    3. 存活节点按地区与延迟重命名
+    """
+    # [阶段1] 静态过滤
+    # 如果不是 TLS 节点，直接抛弃 (符合"先执行过滤非 TLS 节点")
+    if not node.tls:
+        return None
+    if not node.host or not node.port:
+        return None
+
+    key = endpoint_key(node)
+    result = await probes.probe(key)
+    if result is None:
+        return None
+    total_latency, ip, checked = result
 
-    # 1. 读取节点
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        raw_lines = [line.strip() for line in f if line.strip()]
-    unique_nodes = list(set(raw_lines))
-    print(f"初始节点数: {len(unique_nodes)}")
+    # --- [新增] 附加功能 A：查询地理位置并格式化重命名节点 ---
+    cc = get_country_code(ip)
+    new_link = rename_link(node, latency_remark(cc, total_latency, checked))
+
+    # 返回结果 (返回带地区和延迟的新链接)；最后一项为延迟的测量时间 (取自探测缓存时早于本轮开始)
+    return (new_link, total_latency, f"{node.host}:{node.port}", node.fingerprint, checked)
+
+async def check_nodes(nodes, limiter=None, shard=None, cache=None):
+    """
+    检测阶段：对 Node 序列执行三级筛选
+    nodes 可以是列表，也可以是惰性生成器 (按需解析，输入规模不影响内存与调度开销)
+    shard 为分片编号时 (子进程内) 不输出实时进度，汇总信息带分片前缀，探测缓存由父进程统一写回
+    返回按延迟升序排列的 [(带地区与延迟的新链接, 延迟, host:port, 原节点特征哈希, 延迟测量时间)]
+    """
+    total = len(nodes) if hasattr(nodes, "__len__") else None
+    prefix = f"[分片 {shard}] " if shard is not None else ""
+    if shard is None:
+        print(f"初始节点数: {total if total is not None else '流式读取'}")
     
-    # 2. 启动异步检测
+    # 启动异步检测：固定数量的 worker 从有界队列取节点，队列由输入序列按需填充；实际在途探测数由并发控制器决定
     # 注意：这里的 check_connectivity 内部已经包含了三个阶段的逻辑
-    semaphore = asyncio.Semaphore(CONCURRENCY)
-    tasks = [check_connectivity(node, semaphore) for node in unique_nodes]
+    limiter = limiter or AdaptiveLimiter()
+    cache = cache or ProbeCache()
+    resolver = DNSResolver()
+    probes = EndpointProbes(limiter, resolver, TLSProbe(), cache)
+    node_queue = asyncio.Queue(maxsize=QUEUE_SIZE)
     
-    print(f"开始三级筛选 (TCP超时: {TCP_TIMEOUT}s, SSL超时: {SSL_TIMEOUT}s)...")
+    if shard is None:
+        print(f"开始三级筛选 (TCP超时: {TCP_TIMEOUT}s, SSL超时: {SSL_TIMEOUT}s)...")
     start_time = time.time()
     
     valid_nodes = []
     checked_count = 0
-    total = len(tasks)
-    
-    # 实时处理结果
-    for future in asyncio.as_completed(tasks):
-        result = await future
-        checked_count += 1
-        
-        if result:
-            valid_nodes.append(result)
+
+    def report():
+        elapsed = time.time() - start_time
+        speed = checked_count / elapsed if elapsed > 0 else 0
+        progress = f"{checked_count}/{total}" if total is not None else f"{checked_count}"
+        sys.stdout.write(f"\r进度: {progress} | 存活(TLS): {len(valid_nodes)} | 速度: {speed:.1f}/s | {limiter.status()}")
+        sys.stdout.flush()
+
+    async def feeder():
+        # 按原始链接去重 (只保存 8 字节链接摘要，流式读取时不必让全部链接常驻内存)
+        seen_links = set()
+        for node in nodes:
+            digest = hashlib.md5(node.link.encode('utf-8')).digest()[:8]
+            if digest in seen_links:
+                continue
+            seen_links.add(digest)
+            await node_queue.put(node)
+        for _ in range(limiter.maximum):
+            await node_queue.put(None)
+
+    async def worker():
+        nonlocal checked_count
+        while True:
+            node = await node_queue.get()
+            if node is None:
+                return
+            result = await check_connectivity(node, probes)
+            checked_count += 1
             
-        # 进度条
-        if checked_count % 20 == 0 or checked_count == total:
-            elapsed = time.time() - start_time
-            speed = checked_count / elapsed if elapsed > 0 else 0
-            sys.stdout.write(f"\r进度: {checked_count}/{total} | 存活(TLS): {len(valid_nodes)} | 速度: {speed:.1f}/s")
-            sys.stdout.flush()
-
-    print("\n")
+            if result:
+                valid_nodes.append(result)
+            
+            # 进度条
+            if checked_count % 20 == 0 and shard is None:
+                report()
+
+    try:
+        await asyncio.gather(feeder(), *(worker() for _ in range(limiter.maximum)))
+    finally:
+        resolver.close()
+    if shard is None:
+        report()
+        print("\n")
+    print(f"{prefix}筛选完成，共检测 {checked_count} 个节点，存活 {len(valid_nodes)}，耗时 {time.time() - start_time:.2f}s (探测端点 {len(probes.results)} 个，DNS 解析 {resolver.lookups} 个域名，失败 {resolver.failures} 个)")
+    print(prefix + probes.tls.summary())
+    print(prefix + limiter.summary())
+    print(prefix + cache.summary())
+    if shard is None:
+        cache.save()
     
-    # 3. 排序 (延迟低优先)
+    # 排序 (延迟低优先)
     valid_nodes.sort(key=lambda x: x[1])
-    
+    return valid_nodes
+
+def shard_key(item):
+    """
+    分片键 host:port (主机小写、IPv6 去掉方括号)
+    原始链接中地址为明文的协议直接截取，vmess 与整体 base64 编码的 ss 需要解码才能得到真实地址
+    """
+    if isinstance(item, str):
+        protocol, _, rest = item.partition("://")
+        protocol = protocol.lower()
+        body = rest.split("#", 1)[0]
+        if protocol == "vmess" or (protocol == "ss" and "@" not in body):
+            item = Node.parse(item)
+        else:
+            netloc = body.split("?", 1)[0].split("/", 1)[0].rsplit("@", 1)[-1]
+            host, _, port = netloc.rpartition(":")
+            return f"{host.strip('[]')}:{port}".lower()
+    return f"{item.host}:{item.port}".lower()
+
+def shard_of(item, shards):
+    """按端点 (host:port) 分片：同一端点的节点总在同一进程，端点去重、探测缓存与会话复用不受影响"""
+    return zlib.crc32(shard_key(item).encode('utf-8')) % shards
+
+def as_nodes(items):
+    """原始链接与 Node 混合的序列 -> 惰性解析的 Node 序列"""
+    return (Node.parse(item) if isinstance(item, str) else item for item in items)
+
+def check_shard(path, shard, shards, force=False):
+    """子进程入口：独立事件循环检测一个分片 (从分片文件逐行读取解析)，返回 (结果, 探测缓存更新)"""
+    limiter = AdaptiveLimiter(
+        initial=max(CONCURRENCY // shards, MIN_CONCURRENCY),
+        maximum=max(MAX_CONCURRENCY // shards, MIN_CONCURRENCY)
+    )
+    cache = ProbeCache(force=force)
+    valid_nodes = asyncio.run(check_nodes(iter_nodes(path), limiter, shard, cache))
+    return valid_nodes, cache.updates
+
+async def check_nodes_sharded(nodes, workers=CHECK_WORKERS, force=False):
+    """
+    多进程检测：输入 (原始链接或 Node，可为惰性序列) 边读边按端点写入各分片的临时文件，
+    父进程只为取得分片键解码 vmess 与整体 base64 的 ss 链接、不在内存中保留全部输入；各子进程从自己的分片文件流式读取检测，合并结果后统一按延迟排序
+    进程数不足 2 或送检节点少于 SHARD_MIN_NODES 时退化为当前进程内的 check_nodes
+    force=True 时忽略探测缓存，全部端点重新探测
+    """
+    cache = ProbeCache(force=force)
+    items = iter(nodes)
+    if workers < 2:
+        return await check_nodes(as_nodes(items), cache=cache)
+    # 只预读 SHARD_MIN_NODES 条判断规模，不足时直接在当前进程检测
+    head = list(itertools.islice(items, SHARD_MIN_NODES))
+    if len(head) < SHARD_MIN_NODES:
+        return await check_nodes(as_nodes(head), cache=cache)
+
+    with tempfile.TemporaryDirectory(prefix="check_shards_") as shard_dir:
+        paths = [os.path.join(shard_dir, f"shard{index}.txt") for index in range(workers)]
+        counts = [0] * workers
+        files = [open(path, 'w', encoding='utf-8') for path in paths]
+        try:
+            for item in itertools.chain(head, items):
+                if isinstance(item, str):
+                    item = link = item.strip()
+                elif item.tls and item.host and item.port:
+                    link = item.link
+                else:
+                    continue # 已解析的非 TLS 节点在父进程直接丢弃
+                if not link:
+                    continue
+                index = shard_of(item, workers)
+                files[index].write(link + "\n")
+                counts[index] += 1
+        finally:
+            for f in files:
+                f.close()
+        del head
+        total = sum(counts)
+        print(f"初始节点数: {total}，按端点分为 {workers} 个分片: {', '.join(str(c) for c in counts)}")
+        print(f"开始三级筛选 (TCP超时: {TCP_TIMEOUT}s, SSL超时: {SSL_TIMEOUT}s, 每进程初始并发 {max(CONCURRENCY // workers, MIN_CONCURRENCY)})...")
+
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        # spawn 启动：父进程可能已有 DNS 线程池等线程，避免 fork
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(pool, check_shard, path, index, workers, force)
+                for index, path in enumerate(paths) if counts[index]
+            ))
+
+    valid_nodes = []
+    for shard_nodes, cache_updates in results:
+        valid_nodes.extend(shard_nodes)
+        cache.merge(cache_updates)
+    cache.save()
+    elapsed = time.time() - start_time
+    print(f"全部分片完成，存活 {len(valid_nodes)} 个，耗时 {elapsed:.2f}s ({total / elapsed if elapsed > 0 else 0:.1f}/s)")
+    # 排序 (延迟低优先)
+    valid_nodes.sort(key=lambda x: x[1])
+    return valid_nodes
+
+def save_results(valid_nodes):
+    """截取最优节点并保存明文与 Base64 订阅"""
     # --- [修改] 截取前 MAX_NODES 个最优节点，严格控制输出文件大小 ---
     final_links = [x[0] for x in valid_nodes][:MAX_NODES]
     
-    # 4. 保存
     try:
         with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
             f.write("\n".join(final_links))
@@ -286,7 +729,6 @@ async def main():
         with open(SUB_FILE, 'w', encoding='utf-8') as f:
             f.write(b64_content)
             
-        print(f"筛选完成，耗时 {time.time() - start_time:.2f}s")
         print(f"检测存活 TLS 节点: {len(valid_nodes)} 个，根据策略保留最优的 {len(final_links)} 个")
         if valid_nodes:
             print(f"最优节点延迟: {valid_nodes[0][1]:.2f}ms")
@@ -295,8 +737,36 @@ async def main():
     except Exception as e:
         print(f"保存失败: {e}")
 
+def iter_links(path):
+    """逐行读取节点文件中的原始链接"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            link = line.strip()
+            if link:
+                yield link
+
+def iter_nodes(path):
+    """逐行读取并解析节点文件"""
+    return as_nodes(iter_links(path))
+
+async def main(force_probe=False):
+    print(f"--- 极速节点清洗 (TLS + TCP + SSL Pipeline) ---")
+    
+    if not os.path.exists(INPUT_FILE):
+        print(f"错误: 找不到 {INPUT_FILE}")
+        return
+
+    # 1. 逐行读取原始链接 (解析在检测进程内按需进行) 2. 检测并排序 (节点较多时按端点分片到多个进程)
+    valid_nodes = await check_nodes_sharded(iter_links(INPUT_FILE), force=force_probe)
+    
+    # 3. 保存
+    save_results(valid_nodes)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="节点连通性检测")
+    parser.add_argument("--force-probe", action="store_true", help="忽略探测缓存，重新探测全部端点")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.force_probe))
     except KeyboardInterrupt:
         print("\n用户停止检测")
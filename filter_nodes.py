@@ -1,8 +1,10 @@
 import os
-import json
+import re
 import base64
 from urllib.parse import unquote
 
+from node_model import Node
+
 # --- 配置部分 ---
 INPUT_FILE = "nodes.txt"           # 输入的节点文件
 OUTPUT_FILE = "nodes_filtered.txt" # 过滤后输出的节点文件
@@ -25,47 +27,81 @@ BLACKLIST_KEYWORDS = [
     "群"
 ]
 
-def safe_base64_decode(text):
-    """安全的 Base64 解码，兼容现有的处理逻辑"""
-    if not text:
-        return ""
-    text = text.strip().replace('-', '+').replace('_', '/')
-    padding = len(text) % 4
-    if padding > 0:
-        text += '=' * (4 - padding)
-    try:
-        return base64.b64decode(text).decode('utf-8', errors='ignore')
-    except Exception:
-        return ""
+# 按字段过滤的规则：字段名为 Node 的解析字段 (protocol / host / port / sni / remark)，命中任一关键字即剔除
+# 例如 {"host": ["example.com"], "protocol": ["hysteria2"]}
+FIELD_BLACKLIST = {
+    "protocol": [],
+    "host": [],
+    "remark": [],
+}
+# FIELD_BLACKLIST 可用的字段 (Node 中取值为字符串或数字的解析字段)
+FILTER_FIELDS = ("protocol", "host", "port", "sni", "remark", "link")
 
 def get_node_name(link):
     """
     提取节点名称(备注)
-    支持 vmess 的 JSON 'ps' 字段解析
-    支持 ss/trojan/vless 等协议的 URL # 后缀解析
+    vmess 取 JSON 'ps' 字段，ss/trojan/vless 等协议取 URL # 后缀 (解析统一由 node_model 完成)
     """
-    link = link.strip()
-    
-    # 1. 处理 VMess 协议
-    if link.startswith("vmess://"):
-        try:
-            b64_str = link[8:]
-            json_str = safe_base64_decode(b64_str)
-            conf = json.loads(json_str)
-            return conf.get("ps", "")
-        except Exception:
-            return ""
-            
-    # 2. 处理包含 '#' 的通用 URI 协议 (ss, trojan, vless, hysteria2 等)
-    elif "#" in link:
-        try:
-            name_part = link.split("#", 1)[1]
-            # URL 解码，将 %20 等恢复为正常字符以便匹配
-            return unquote(name_part)
-        except Exception:
-            return ""
-            
-    return ""
+    return Node.parse(link).remark
+
+def compile_keywords(keywords):
+    """把关键字列表编译为单个交替正则 (无关键字时返回 None)，一次扫描即可判断是否命中任一关键字"""
+    keywords = [k for k in keywords if k]
+    if not keywords:
+        return None
+    # 长关键字在前，保证前缀相同的关键字中优先匹配更长的一个
+    return re.compile("|".join(re.escape(k) for k in sorted(set(keywords), key=len, reverse=True)))
+
+class KeywordMatcher:
+    """编译后的黑名单：全局关键字匹配名称与解码后的链接，字段规则只匹配对应的解析字段"""
+
+    def __init__(self, keywords=None, field_rules=None):
+        self.pattern = compile_keywords(BLACKLIST_KEYWORDS if keywords is None else keywords)
+        field_rules = FIELD_BLACKLIST if field_rules is None else field_rules
+        unknown = sorted(set(field_rules) - set(FILTER_FIELDS))
+        if unknown:
+            # 字段名写错时规则会静默失效，直接报错
+            raise ValueError(f"FIELD_BLACKLIST 中的未知字段: {', '.join(unknown)} (可用字段: {', '.join(FILTER_FIELDS)})")
+        self.field_patterns = [
+            (field, pattern) for field, pattern in
+            ((field, compile_keywords(words)) for field, words in field_rules.items())
+            if pattern
+        ]
+
+    def is_banned(self, node):
+        if self.pattern:
+            # 每条链接只解码一次；名称只在链接中看不到时 (vmess 的 ps 字段在 base64 内) 才单独匹配
+            decoded_link = unquote(node.link)
+            if self.pattern.search(decoded_link):
+                return True
+            if node.remark and node.vmess_conf is not None and self.pattern.search(node.remark):
+                return True
+        for field, pattern in self.field_patterns:
+            value = getattr(node, field, None)
+            if value is not None and pattern.search(str(value)):
+                return True
+        return False
+
+# 按上方配置编译的默认黑名单 (导入时编译一次，各次调用共用)
+DEFAULT_MATCHER = KeywordMatcher()
+
+def is_banned(node, matcher=None):
+    """同时检查节点名称和原始链接中是否包含黑名单关键字，并应用字段规则"""
+    return (matcher or DEFAULT_MATCHER).is_banned(node)
+
+def apply_filter(nodes, matcher=None):
+    """过滤阶段：返回 (保留的 Node 列表, 被剔除的数量)"""
+    matcher = matcher or DEFAULT_MATCHER
+    valid_nodes = []
+    filtered_count = 0
+    for node in nodes:
+        if not matcher.is_banned(node):
+            valid_nodes.append(node)
+        else:
+            filtered_count += 1
+            # 开启调试时可打印被过滤的节点名称
+            # print(f"已过滤: {node.remark or '未知名称'}")
+    return valid_nodes, filtered_count
 
 def main():
     print("--- 节点关键字过滤脚本 ---")
@@ -80,35 +116,17 @@ def main():
         
     print(f"初始读取节点数: {len(raw_lines)}")
     
-    valid_nodes = []
-    filtered_count = 0
-
     # 执行过滤逻辑
-    for link in raw_lines:
-        node_name = get_node_name(link)
-        
-        is_banned = False
-        # 遍历黑名单关键字
-        for keyword in BLACKLIST_KEYWORDS:
-            # 同时检查节点名称和原始链接中是否包含关键字
-            if keyword in node_name or keyword in unquote(link):
-                is_banned = True
-                break
-                
-        if not is_banned:
-            valid_nodes.append(link)
-        else:
-            filtered_count += 1
-            # 开启调试时可打印被过滤的节点名称
-            # print(f"已过滤: {node_name or '未知名称'}")
+    valid_nodes, filtered_count = apply_filter(Node.parse(link) for link in raw_lines)
+    valid_links = [node.link for node in valid_nodes]
 
     # 保存明文节点结果
     try:
         with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            f.write("\n".join(valid_nodes))
+            f.write("\n".join(valid_links))
             
         # 同时生成 Base64 订阅文件，保持与你的项目生态一致
-        b64_content = base64.b64encode("\n".join(valid_nodes).encode('utf-8')).decode('utf-8')
+        b64_content = base64.b64encode("\n".join(valid_links).encode('utf-8')).decode('utf-8')
         with open(SUB_FILE, 'w', encoding='utf-8') as f:
             f.write(b64_content)
             
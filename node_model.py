@@ -0,0 +1,299 @@
+import json
+import base64
+import hashlib
+from array import array
+from urllib.parse import urlparse, urlsplit, parse_qs, parse_qsl, unquote, quote, urlencode
+from typing import Any, Dict, Optional
+
+# --- 共享节点模型：聚合、合并、过滤、测速四个脚本统一使用 ---
+# 每条链接只解码一次 (vmess 的 base64 + JSON 也只解析一次)，解析出的字段随 Node 对象贯穿各阶段
+
+def safe_base64_decode(text: str) -> Optional[str]:
+    """安全的 Base64 解码，处理空白、URL 安全字符和填充"""
+    if not text:
+        return None
+    text = text.strip().replace(' ', '').replace('\n', '').replace('\r', '')
+    text = text.replace('-', '+').replace('_', '/')
+    padding = len(text) % 4
+    if padding > 0:
+        text += '=' * (4 - padding)
+    try:
+        return base64.b64decode(text).decode('utf-8', errors='ignore')
+    except Exception:
+        return None
+
+def _md5(text: str) -> str:
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+# --- 规范化指纹：同一逻辑节点的不同写法 (参数顺序、大小写、百分号编码、ss 的两种 base64 形式) 得到同一指纹 ---
+FINGERPRINT_VERSION = 2  # 指纹算法版本，变更时节点历史库会按新算法重建主键
+
+PROTOCOL_ALIASES = {"hy2": "hysteria2"}
+# vmess 中与服务器身份无关的字段 (备注、配置格式版本)
+VMESS_VOLATILE_FIELDS = {"ps", "v", "remark", "remarks"}
+# vmess 字段的默认值：显式写出默认值与省略该字段视为同一配置
+VMESS_DEFAULTS = {"aid": "0", "scy": "auto", "type": "none", "net": "tcp"}
+# 取值为域名的字段，大小写不敏感
+HOSTNAME_FIELDS = {"add", "host", "sni", "peer", "servername"}
+
+def _format_host(host: str) -> str:
+    host = host.strip("[]").lower()
+    return f"[{host}]" if ":" in host else host
+
+def _canonical_query(query: str) -> str:
+    """查询参数解码后按键排序，空值参数丢弃"""
+    pairs = []
+    for key, value in parse_qsl(query, keep_blank_values=False):
+        if key.lower() in HOSTNAME_FIELDS:
+            value = value.lower()
+        pairs.append((key, value))
+    return urlencode(sorted(pairs), quote_via=quote)
+
+def _canonical_vmess(conf: Dict[str, Any]) -> str:
+    fields = {}
+    for key, value in conf.items():
+        if key in VMESS_VOLATILE_FIELDS or value is None:
+            continue
+        value = str(value).strip()
+        if key in HOSTNAME_FIELDS or key == "id":
+            value = value.lower()
+        if value == "" or VMESS_DEFAULTS.get(key) == value:
+            continue
+        fields[key] = value
+    return "vmess://" + json.dumps(fields, sort_keys=True, ensure_ascii=False)
+
+def _canonical_ss(body: str) -> str:
+    """SIP002 (base64(method:pass)@host:port 或明文 userinfo) 与整体 base64 编码统一为 ss://method:pass@host:port"""
+    main, _, query = body.partition("?")
+    main = main.rstrip("/")
+    if "@" in main:
+        userinfo, hostport = main.rsplit("@", 1)
+        userinfo = unquote(userinfo)
+        if ":" not in userinfo:
+            userinfo = safe_base64_decode(userinfo) or ""
+    else:
+        userinfo, hostport = (safe_base64_decode(main) or "").rsplit("@", 1)
+    method, password = userinfo.split(":", 1)
+    host, port = hostport.rsplit(":", 1)
+    canonical = f"ss://{method.strip().lower()}:{password}@{_format_host(host)}:{int(port)}"
+    query = _canonical_query(query)
+    return f"{canonical}?{query}" if query else canonical
+
+def _canonical_url(protocol: str, body: str) -> str:
+    """trojan / vless / hysteria2 等 URL 形式：主机小写、去掉默认路径、查询参数排序"""
+    parsed = urlsplit(f"{protocol}://{body}")
+    user = unquote(parsed.username or "")
+    if parsed.password is not None:
+        user += ":" + unquote(parsed.password)
+    if protocol == "vless":
+        user = user.lower() # UUID 大小写不敏感
+    path = unquote(parsed.path)
+    if path == "/":
+        path = ""
+    canonical = f"{protocol}://{quote(user, safe=':')}@{_format_host(parsed.hostname or '')}:{parsed.port}{quote(path)}"
+    query = _canonical_query(parsed.query)
+    return f"{canonical}?{query}" if query else canonical
+
+def canonical_link(link: str, vmess_conf: Optional[Dict[str, Any]] = None) -> str:
+    """
+    生成节点的规范形式 (不含备注)，作为去重指纹的输入
+    vmess 可传入已解码的配置避免重复解码；无法规范化的链接退化为 协议://# 之前的原文
+    """
+    link = link.strip()
+    if "://" not in link:
+        return link
+    protocol, rest = link.split("://", 1)
+    protocol = protocol.lower()
+    protocol = PROTOCOL_ALIASES.get(protocol, protocol)
+    body = rest.split("#")[0]
+    try:
+        if protocol == "vmess":
+            if vmess_conf is None:
+                decoded = safe_base64_decode(body)
+                vmess_conf = json.loads(decoded) if decoded else None
+            if isinstance(vmess_conf, dict):
+                return _canonical_vmess(vmess_conf)
+        elif protocol == "ss":
+            return _canonical_ss(body)
+        else:
+            return _canonical_url(protocol, body)
+    except Exception:
+        pass
+    return f"{protocol}://{body}"
+
+class Node:
+    """
+    紧凑的节点表示 (__slots__)
+    protocol: 协议名 (小写)       host/port: 服务器地址
+    sni/tls: TLS 服务器名与是否启用 TLS (仅 TLS 节点才有 sni)
+    remark: 备注名称              link: 原始链接
+    fingerprint: 剥离备注后的特征哈希 (首次访问时计算)
+    """
+    __slots__ = ("protocol", "host", "port", "sni", "tls", "remark", "link", "vmess_conf", "_fingerprint")
+
+    def __init__(self, link: str):
+        self.link = link
+        self.protocol = ""
+        self.host: Optional[str] = None
+        self.port: Optional[int] = None
+        self.sni: Optional[str] = None
+        self.tls = False
+        self.remark = ""
+        self.vmess_conf: Optional[Dict[str, Any]] = None # vmess 解码后的配置，供重命名等操作复用
+        self._fingerprint: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"Node({self.protocol}://{self.host}:{self.port}, tls={self.tls}, sni={self.sni!r})"
+
+    @classmethod
+    def parse(cls, link: str) -> "Node":
+        """解析各类节点链接，解析失败的字段保持默认值 (host/port 为 None)"""
+        node = cls(link.strip())
+        if "://" not in node.link:
+            return node
+        protocol, rest = node.link.split("://", 1)
+        node.protocol = protocol.lower()
+
+        try:
+            # --- 1. VMess ---
+            if node.protocol == "vmess":
+                decoded = safe_base64_decode(rest.split("#")[0])
+                conf = json.loads(decoded) if decoded else None
+                if isinstance(conf, dict):
+                    node.vmess_conf = conf
+                    node.remark = str(conf.get("ps", ""))
+                    node.host = conf.get("add")
+                    node.port = conf.get("port")
+                    # 严格筛选 TLS
+                    if conf.get("tls") in ["tls", "xtls"]:
+                        node.tls = True
+                        node.sni = conf.get("sni") or conf.get("host")
+
+            # --- 2. Shadowsocks (SS) ---
+            elif node.protocol == "ss":
+                if "#" in rest:
+                    node.remark = unquote(rest.split("#", 1)[1])
+                body = rest.split('#')[0]
+                if '@' in body:
+                    part_host = body.split('@')[1]
+                else:
+                    decoded = safe_base64_decode(body) or ""
+                    part_host = decoded.split('@')[1] if '@' in decoded else ""
+                if part_host:
+                    h, p = part_host.rsplit(':', 1)
+                    node.host = h.strip('[]')
+                    node.port = p
+                # 普通 SS 默认无 TLS
+
+            # --- 3. URL Schema (Trojan, VLESS, Hysteria2) ---
+            else:
+                if "#" in rest:
+                    node.remark = unquote(rest.split("#", 1)[1])
+                parsed = urlparse(node.link)
+                node.host = parsed.hostname
+                node.port = parsed.port
+                qs = parse_qs(parsed.query)
+                security = qs.get("security", [""])[0]
+
+                # Trojan
+                if node.protocol == "trojan":
+                    if security != "none": node.tls = True
+
+                # VLESS / Hysteria2
+                elif node.protocol in ["vless", "hysteria2", "hy2"]:
+                    if security in ["tls", "reality", "auto"]: node.tls = True
+
+                if node.tls:
+                    if "sni" in qs: node.sni = qs["sni"][0]
+                    elif "peer" in qs: node.sni = qs["peer"][0]
+
+            if node.port: node.port = int(node.port)
+        except Exception:
+            node.host, node.port, node.sni, node.tls = None, None, None, False
+
+        return node
+
+    @property
+    def fingerprint(self) -> str:
+        """核心特征提取：无视节点备注/延迟后缀及等价写法差异进行哈希对比"""
+        if self._fingerprint is None:
+            self._fingerprint = self._compute_fingerprint()
+        return self._fingerprint
+
+    def _compute_fingerprint(self) -> str:
+        # 对规范形式哈希 (vmess 复用已解码的配置)
+        return _md5(canonical_link(self.link, self.vmess_conf))
+
+def node_fingerprint(link: str) -> str:
+    """只需要去重特征时的快捷入口：直接对规范形式哈希，无需解析地址字段"""
+    return _md5(canonical_link(link))
+
+def fingerprint_digest(fingerprint: str) -> bytes:
+    """指纹的 8 字节二进制摘要 (十六进制指纹的前 16 位)，放入普通 set 去重，比 32 位十六进制字符串省约一半内存"""
+    return bytes.fromhex(fingerprint[:16])
+
+class FingerprintSet:
+    """
+    紧凑的指纹去重集合：只保存 64 位二进制摘要 (取十六进制指纹的前 16 位)，
+    以 array('Q') 做线性探测的开放寻址表 (0 表示空槽)，装载率超过一半时扩容
+    每个条目约占 16~32 字节 (set 中的 8 字节摘要约 90 字节)，但纯 Python 探测循环的 add/查询比 set 慢数倍：
+    只用于内存占主导、且不在锁内的场景 (如合并历史节点全集)，热路径上的去重使用 fingerprint_digest + set
+    """
+    __slots__ = ("table", "mask", "count")
+
+    def __init__(self, capacity: int = 1024):
+        size = 16
+        while size < capacity * 2:
+            size <<= 1
+        self.table = array('Q', bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+
+    @staticmethod
+    def digest(fingerprint: str) -> int:
+        return int(fingerprint[:16], 16) or 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, fingerprint: str) -> bool:
+        value = self.digest(fingerprint)
+        table, mask = self.table, self.mask
+        i = value & mask
+        while True:
+            slot = table[i]
+            if slot == value:
+                return True
+            if slot == 0:
+                return False
+            i = (i + 1) & mask
+
+    def add(self, fingerprint: str) -> bool:
+        """加入指纹，返回是否为新指纹"""
+        value = self.digest(fingerprint)
+        table, mask = self.table, self.mask
+        i = value & mask
+        while True:
+            slot = table[i]
+            if slot == value:
+                return False
+            if slot == 0:
+                break
+            i = (i + 1) & mask
+        table[i] = value
+        self.count += 1
+        if self.count * 2 > len(table):
+            self._grow()
+        return True
+
+    def _grow(self) -> None:
+        old = self.table
+        self.table = array('Q', bytes(8 * len(old) * 2))
+        self.mask = len(self.table) - 1
+        table, mask = self.table, self.mask
+        for value in old:
+            if value:
+                i = value & mask
+                while table[i]:
+                    i = (i + 1) & mask
+                table[i] = value
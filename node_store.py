@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from node_model import Node, FingerprintSet, FINGERPRINT_VERSION
+
+# --- 节点历史库：以特征哈希为主键的本地 SQLite 存储 ---
+# 取代每轮重新下载 previous_nodes.txt 并对全部新旧链接重新哈希合并的做法：
+# 新一轮爬取结果按主键 upsert，历史候选通过 last_alive 索引按需选取，开销只与本轮规模相关
+
+STORE_FILE = os.path.join(".cache", "nodes.db")
+HISTORY_WINDOW_DAYS = 15     # 最近一次存活在该窗口内的历史节点才会重新送检
+RETENTION_DAYS = 60          # 超过该时长既未被爬到也未存活的节点将被清理
+LATENCY_HISTORY_LEN = 10     # 每个节点保留的最近延迟记录条数
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    fingerprint     TEXT PRIMARY KEY,
+    link            TEXT NOT NULL,
+    protocol        TEXT,
+    host            TEXT,
+    port            INTEGER,
+    source          TEXT,
+    first_seen      REAL NOT NULL,
+    last_seen       REAL NOT NULL,
+    last_alive      REAL,
+    latency_history TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_last_alive ON nodes(last_alive);
+CREATE INDEX IF NOT EXISTS idx_nodes_last_seen ON nodes(last_seen);
+"""
+
+class NodeStore:
+    def __init__(self, path: str = STORE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        # user_version 记录写入时的指纹算法版本，版本变化时按新算法重建主键
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != FINGERPRINT_VERSION:
+            rekeyed = self._rekey()
+            self.conn.execute(f"PRAGMA user_version = {int(FINGERPRINT_VERSION)}")
+            if rekeyed:
+                print(f"指纹算法已更新，历史库按新指纹重建: {rekeyed} -> {self.count()} 个节点")
+
+    def _rekey(self) -> int:
+        """按当前指纹算法重算全部主键，新算法下相同的节点合并为一行"""
+        rows = self.conn.execute(
+            "SELECT link, source, first_seen, last_seen, last_alive, latency_history FROM nodes"
+        ).fetchall()
+        if not rows:
+            return 0
+        merged = {}
+        for link, source, first_seen, last_seen, last_alive, latency_history in rows:
+            node = Node.parse(link)
+            current = merged.get(node.fingerprint)
+            if current is None:
+                merged[node.fingerprint] = [node, source, first_seen, last_seen, last_alive, latency_history]
+                continue
+            # 合并：链接与来源取最近一次出现的，延迟历史取最近一次存活的
+            if last_seen > current[3]:
+                current[0], current[1], current[3] = node, source, last_seen
+            current[2] = min(current[2], first_seen)
+            if last_alive is not None and (current[4] is None or last_alive > current[4]):
+                current[4], current[5] = last_alive, latency_history
+        with self.conn:
+            self.conn.execute("DELETE FROM nodes")
+            self.conn.executemany("""
+                INSERT INTO nodes (fingerprint, link, protocol, host, port, source, first_seen, last_seen, last_alive, latency_history)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (fingerprint, node.link, node.protocol, node.host, node.port, source, first_seen, last_seen, last_alive, latency_history)
+                for fingerprint, (node, source, first_seen, last_seen, last_alive, latency_history) in merged.items()
+            ])
+        return len(rows)
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def upsert(self, nodes: Iterable[Node], source: str, now: float, alive: bool = False,
+               sources: Optional[Dict[int, str]] = None) -> int:
+        """
+        写入一批节点：新节点记录首次出现时间，已有节点刷新 last_seen 与最新链接
+        sources 为 64 位指纹 -> 来源文件 (仓库:路径)，映射中没有的节点以 source 记录来源
+        """
+        rows = [
+            (node.fingerprint, node.link, node.protocol, node.host, node.port, sources.get(FingerprintSet.digest(node.fingerprint), source) if sources else source, now, now, now if alive else None)
+            for node in nodes
+        ]
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO nodes (fingerprint, link, protocol, host, port, source, first_seen, last_seen, last_alive)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(fingerprint) DO UPDATE SET
+                    link = excluded.link,
+                    last_seen = excluded.last_seen,
+                    source = excluded.source,
+                    last_alive = COALESCE(excluded.last_alive, nodes.last_alive)
+            """, rows)
+        return len(rows)
+
+    def select_for_check(self, since: float, exclude_seen_at: Optional[float] = None, limit: Optional[int] = None) -> List[str]:
+        """按 last_alive 索引选出近期存活过的历史节点 (可排除本轮刚写入的节点)，最近存活的优先"""
+        sql = "SELECT link FROM nodes WHERE last_alive >= ?"
+        params: list = [since]
+        if exclude_seen_at is not None:
+            sql += " AND last_seen < ?"
+            params.append(exclude_seen_at)
+        sql += " ORDER BY last_alive DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def merge_crawl(self, crawl_nodes: Iterable[Node], source: str = "crawl", now: Optional[float] = None,
+                    sources: Optional[Dict[int, str]] = None) -> List[Node]:
+        """
+        合并阶段 (历史库版本)：本轮节点去重后 upsert，再追加近期存活过、但本轮未爬到的历史节点
+        返回待检测的 Node 列表 (本轮节点在前)
+        """
+        now = now or time.time()
+        unique = {}
+        for node in crawl_nodes:
+            unique.setdefault(node.fingerprint, node)
+        self.upsert(unique.values(), source, now, sources=sources)
+        since = now - HISTORY_WINDOW_DAYS * 86400
+        history = [Node.parse(link) for link in self.select_for_check(since, exclude_seen_at=now)]
+        return list(unique.values()) + history
+
+    def record_results(self, results: Iterable[Tuple[str, float]], now: Optional[float] = None) -> None:
+        """记录检测结果：[(fingerprint, 延迟ms)]，刷新 last_alive 并追加延迟历史"""
+        now = now or time.time()
+        results = list(results)
+        with self.conn:
+            for fingerprint, latency in results:
+                row = self.conn.execute(
+                    "SELECT latency_history FROM nodes WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+                if row is None:
+                    continue
+                history = json.loads(row[0] or "[]")
+                history.append(round(latency, 1))
+                self.conn.execute(
+                    "UPDATE nodes SET last_alive = ?, latency_history = ? WHERE fingerprint = ?",
+                    (now, json.dumps(history[-LATENCY_HISTORY_LEN:]), fingerprint)
+                )
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """清理长期既未被爬到也未存活的节点，保持历史库规模有界"""
+        cutoff = (now or time.time()) - RETENTION_DAYS * 86400
+        with self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM nodes WHERE last_seen < ? AND COALESCE(last_alive, 0) < ?", (cutoff, cutoff)
+            )
+        return cur.rowcount
@@ -0,0 +1,85 @@
+import os
+import time
+import asyncio
+import argparse
+
+import merge_nodes
+import filter_nodes
+import check_active
+from node_model import Node
+from node_store import NodeStore, STORE_FILE
+from yield_stats import record_check_results, load_node_sources, node_source_index
+
+# --- 一体化流水线：合并 -> 关键字过滤 -> 连通性检测 ---
+# 各阶段在内存中直接传递已解析的 Node 对象，只在最后写出 nodes.txt 与 sub.txt 一次
+
+DEBUG_MERGED_FILE = "debug_merged.txt"     # 可选：合并阶段的中间结果
+DEBUG_FILTERED_FILE = "debug_filtered.txt" # 可选：过滤阶段的中间结果
+
+def write_debug(path, nodes):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(node.link for node in nodes))
+    print(f"[调试] 中间结果已保存至 {path}")
+
+async def run_pipeline(debug_outputs=False, use_store=True, force_probe=False):
+    # 1. 合并：历史库模式下 upsert 本轮节点并按索引选取近期存活的历史节点，否则退化为文件合并
+    print("--- [1/3] 历史节点与新节点合并去重 ---")
+    now = time.time()
+    store = None
+    if use_store:
+        store = NodeStore(STORE_FILE)
+        if store.count() == 0 and os.path.exists(merge_nodes.INPUT_PREV):
+            # 首次启用历史库：以上一轮发布的节点作为初始存活记录
+            prev_nodes = [Node.parse(link) for link in merge_nodes.read_links(merge_nodes.INPUT_PREV)]
+            store.upsert(prev_nodes, "release", now - 1, alive=True)
+            print(f"历史库为空，已从 {merge_nodes.INPUT_PREV} 导入 {len(prev_nodes)} 个节点")
+        crawl_nodes = [Node.parse(link) for link in merge_nodes.read_links(merge_nodes.INPUT_RAW)]
+        # 来源记为爬取阶段写出的 仓库:路径 (node_sources.json)，缺失时记为 crawl
+        merged = store.merge_crawl(crawl_nodes, "crawl", now, sources=node_source_index(load_node_sources()))
+        print(f"历史库共 {store.count()} 个节点，本轮送检: {len(merged)}")
+    else:
+        merged = merge_nodes.merge_sources([
+            merge_nodes.read_links(merge_nodes.INPUT_RAW),
+            merge_nodes.read_links(merge_nodes.INPUT_PREV)
+        ])
+        print(f"合并去重后节点数: {len(merged)}")
+    if debug_outputs:
+        write_debug(DEBUG_MERGED_FILE, merged)
+
+    # 2. 关键字过滤
+    print("--- [2/3] 节点关键字过滤 ---")
+    kept, filtered_count = filter_nodes.apply_filter(merged)
+    print(f"命中关键字被剔除的节点数: {filtered_count}，保留: {len(kept)}")
+    if debug_outputs:
+        write_debug(DEBUG_FILTERED_FILE, kept)
+
+    # 3. 连通性检测并保存最终结果
+    print("--- [3/3] 极速节点清洗 (TLS + TCP + SSL Pipeline) ---")
+    valid_nodes = await check_active.check_nodes_sharded(kept, force=force_probe)
+    check_active.save_results(valid_nodes)
+
+    # 回填各搜索组合的存活节点数，供下一轮爬取调整搜索优先级
+    alive_counts = record_check_results(fingerprint for _, _, _, fingerprint, _ in valid_nodes)
+    if alive_counts:
+        print(f"已回填 {len(alive_counts)} 个搜索组合的存活统计")
+
+    if store:
+        # 测量时间早于本轮开始的结果取自探测缓存：不刷新 last_alive，也不重复追加延迟
+        store.record_results((fingerprint, latency) for _, latency, _, fingerprint, checked in valid_nodes if checked >= now)
+        pruned = store.prune(now)
+        store.close()
+        print(f"历史库已更新 (存活 {len(valid_nodes)}，清理过期 {pruned})")
+
+def main():
+    parser = argparse.ArgumentParser(description="合并、过滤、检测一体化流水线")
+    parser.add_argument("--debug-outputs", action="store_true", help="额外写出每个阶段的中间节点文件")
+    parser.add_argument("--no-store", action="store_true", help="不使用节点历史库，改为合并 previous_nodes.txt")
+    parser.add_argument("--force-probe", action="store_true", help="忽略探测缓存，重新探测全部端点")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_pipeline(args.debug_outputs, not args.no_store, args.force_probe))
+    except KeyboardInterrupt:
+        print("\n用户停止检测")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import ssl
+import sys
+import shutil
+import socket
+import threading
+import subprocess
+
+import pytest
+
+# 被测脚本位于仓库根目录 (平铺的脚本，不是安装包)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session")
+def tls_server(tmp_path_factory):
+    """本地 TLS 服务 (自签名证书)，返回端口；接受连接并完成握手后关闭，供连通性检测测试使用"""
+    if not shutil.which("openssl"):
+        pytest.skip("需要 openssl 生成自签名证书")
+    cert_dir = tmp_path_factory.mktemp("tls")
+    cert, key = str(cert_dir / "cert.pem"), str(cert_dir / "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                    "-keyout", key, "-out", cert], check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+
+    listener = socket.create_server(("127.0.0.1", 0))
+    stats = {"handshakes": 0}
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=handshake, args=(conn,), daemon=True).start()
+
+    def handshake(conn):
+        try:
+            with context.wrap_socket(conn, server_side=True) as tls:
+                stats["handshakes"] += 1
+                tls.settimeout(2)
+                tls.recv(1)
+        except (OSError, ssl.SSLError):
+            pass
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield listener.getsockname()[1], stats
+    listener.close()
+
+@pytest.fixture
+def closed_port():
+    """本机上一个没有服务监听的端口 (连接立即被拒绝)"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
@@ -0,0 +1,116 @@
+import asyncio
+
+import check_active
+from check_active import AdaptiveLimiter, ADAPT_WINDOW, INCREASE_STEP, DECREASE_FACTOR
+
+def feed_window(limiter, timeouts=0, connect_ms=10.0):
+    """喂满一个评估窗口：前 timeouts 个结果超时，其余以 connect_ms 建连成功"""
+    for i in range(ADAPT_WINDOW):
+        if i < timeouts:
+            limiter.record(True)
+        else:
+            limiter.record(False, connect_ms)
+
+def test_healthy_windows_increase_additively():
+    limiter = AdaptiveLimiter(initial=100, minimum=20, maximum=1000)
+    feed_window(limiter)
+    feed_window(limiter)
+    assert limiter.limit == 100 + 2 * INCREASE_STEP
+    assert limiter.adjustments == 2
+
+def test_timeout_spike_decreases_multiplicatively():
+    limiter = AdaptiveLimiter(initial=100, minimum=20, maximum=1000)
+    feed_window(limiter, timeouts=5)            # 基线超时率 10%
+    grown = limiter.limit
+    feed_window(limiter, timeouts=ADAPT_WINDOW // 2)
+    assert limiter.limit == int(grown * DECREASE_FACTOR)
+    assert limiter.last_decision.startswith("-")
+
+def test_steady_dead_node_timeouts_are_not_congestion():
+    # 死节点带来的稳定超时比例构成基线，本身不触发收缩
+    limiter = AdaptiveLimiter(initial=100, minimum=20, maximum=1000)
+    for _ in range(3):
+        feed_window(limiter, timeouts=10)
+    assert limiter.limit == 100 + 3 * INCREASE_STEP
+
+def test_latency_drift_decreases():
+    limiter = AdaptiveLimiter(initial=100, minimum=20, maximum=1000)
+    feed_window(limiter, connect_ms=10.0)
+    grown = limiter.limit
+    feed_window(limiter, connect_ms=50.0)
+    assert limiter.limit == int(grown * DECREASE_FACTOR)
+    assert "x4.8" in limiter.last_decision    # 基线每个窗口放宽 5%: 50 / 10.5
+
+def test_limit_stays_within_bounds():
+    limiter = AdaptiveLimiter(initial=30, minimum=20, maximum=60)
+    for _ in range(10):
+        feed_window(limiter)
+    assert limiter.limit == 60
+    for _ in range(10):
+        feed_window(limiter, timeouts=ADAPT_WINDOW)
+    assert limiter.limit == 20
+    assert (limiter.low, limiter.high) == (20, 60)
+
+def test_maximum_respects_fd_cap(monkeypatch):
+    monkeypatch.setattr(check_active, "fd_concurrency_cap", lambda: 40)
+    limiter = AdaptiveLimiter(initial=500, minimum=20, maximum=1000)
+    assert limiter.maximum == 40
+    assert limiter.limit == 40
+
+def test_fixed_mode_ignores_results():
+    limiter = AdaptiveLimiter(initial=50, minimum=20, maximum=1000, adaptive=False)
+    for _ in range(5):
+        feed_window(limiter, timeouts=ADAPT_WINDOW)
+    assert limiter.limit == 50
+    assert limiter.summary() == "固定并发 50"
+
+def test_in_flight_never_exceeds_limit():
+    limiter = AdaptiveLimiter(initial=20, minimum=20, maximum=1000, adaptive=False)
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.001)
+
+    async def main():
+        await asyncio.gather(*(worker() for _ in range(200)))
+
+    asyncio.run(main())
+    assert peak == 20
+    assert limiter.in_flight == 0
+
+def test_release_wakes_only_free_slots():
+    limiter = AdaptiveLimiter(initial=20, minimum=20, maximum=1000, adaptive=False)
+    woken = 0
+
+    async def main():
+        nonlocal woken
+        await asyncio.gather(*(limiter.__aenter__() for _ in range(20)))
+        predicate_calls = 0
+        original = limiter.cond.wait_for
+
+        async def counting_wait_for(predicate):
+            def counted():
+                nonlocal predicate_calls
+                predicate_calls += 1
+                return predicate()
+            return await original(counted)
+
+        limiter.cond.wait_for = counting_wait_for
+        waiters = [asyncio.ensure_future(limiter.__aenter__()) for _ in range(50)]
+        await asyncio.sleep(0)
+        baseline = predicate_calls          # 每个等待者入队时各检查一次
+        await limiter.__aexit__(None, None, None)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        woken = predicate_calls - baseline
+        assert sum(w.done() for w in waiters) == 1
+        for w in waiters:
+            w.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    asyncio.run(main())
+    # 释放一个槽位只唤醒一个等待者，而不是让全部 50 个醒来重新检查
+    assert woken == 1
@@ -0,0 +1,49 @@
+import time
+import asyncio
+
+import pytest
+
+import aggregator
+from aggregator import FileTask
+
+pytestmark = pytest.mark.skipif(aggregator.aiohttp is None, reason="需要 aiohttp")
+
+async def drip(request):
+    """每 0.2 秒发送一小块：单次读取从不超时，只有总截止时间能结束它"""
+    from aiohttp import web
+    resp = web.StreamResponse(headers={"Content-Type": "text/plain"})
+    await resp.prepare(request)
+    for _ in range(50):
+        await resp.write(b"trojan://pw@drip.example:443#x\n")
+        await asyncio.sleep(0.2)
+    return resp
+
+async def fetch_all(crawler, tasks):
+    from aiohttp import web
+    app = web.Application()
+    app.router.add_get("/{path:.*}", drip)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    for i, path in enumerate(tasks):
+        url = f"http://127.0.0.1:{port}/{path}"
+        crawler.url_queue.put((0, i, FileTask(url, f"url:{url}", "k|txt", path)))
+    engine = asyncio.create_task(crawler._async_fetch_main())
+    start = time.perf_counter()
+    while crawler.url_queue.unfinished_tasks:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    crawler.should_stop = True
+    await engine
+    await runner.cleanup()
+    return elapsed
+
+def test_slow_drip_download_hits_total_deadline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(aggregator, "TIMEOUT", 1)
+    crawler = aggregator.NodeAggregator(token=None)
+    elapsed = asyncio.run(fetch_all(crawler, ["slow.txt"]))
+    assert elapsed < 3
+    assert crawler.file_counts == {}
@@ -0,0 +1,52 @@
+import json
+
+import aggregator
+from aggregator import BlobCache
+
+def saved(tmp_path, **entries):
+    path = str(tmp_path / "blob_cache.json")
+    cache = BlobCache(path)
+    for sha, nodes in entries.items():
+        cache.put(BlobCache.key_for(f"https://raw.example/{sha}", sha), f"https://raw.example/{sha}", nodes)
+    cache.save()
+    return path
+
+def test_round_trip_by_sha_and_url(tmp_path):
+    path = saved(tmp_path, abc=["trojan://a@h:443"], empty=[])
+    cache = BlobCache(path)
+    assert cache.get("sha:abc", "https://raw.example/other") == ["trojan://a@h:443"]
+    # 同一 raw URL 的新 sha 未知时经 URL 索引命中
+    assert cache.get("sha:new", "https://raw.example/empty") == []
+    assert cache.get("sha:missing", "https://raw.example/missing") is None
+    assert cache.hits == 2
+
+def test_extractor_version_change_drops_entries(tmp_path, monkeypatch):
+    path = saved(tmp_path, abc=["trojan://a@h:443"])
+    monkeypatch.setattr(aggregator, "EXTRACTOR_VERSION", aggregator.EXTRACTOR_VERSION + 1)
+    cache = BlobCache(path)
+    assert cache.get("sha:abc", "https://raw.example/abc") is None
+    cache.save()
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)["format"]["extractor"] == aggregator.EXTRACTOR_VERSION
+
+def test_max_file_bytes_change_drops_skipped_files(tmp_path, monkeypatch):
+    path = saved(tmp_path, big=[])
+    monkeypatch.setattr(aggregator, "MAX_FILE_BYTES", aggregator.MAX_FILE_BYTES * 2)
+    assert BlobCache(path).get("sha:big", "https://raw.example/big") is None
+
+def test_unversioned_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "blob_cache.json"
+    path.write_text(json.dumps({"entries": {"sha:abc": {"nodes": ["x"], "ts": 0}}, "urls": {}}))
+    assert BlobCache(str(path)).entries == {}
+
+def test_save_keeps_most_recently_hit_entries(tmp_path):
+    path = str(tmp_path / "blob_cache.json")
+    cache = BlobCache(path, max_entries=2)
+    for i, sha in enumerate(["a", "b", "c"]):
+        cache.put(f"sha:{sha}", f"u/{sha}", [])
+        cache.entries[f"sha:{sha}"]["ts"] = i
+    cache.get("sha:a", "u/a")
+    cache.save()
+    reloaded = BlobCache(path)
+    assert set(reloaded.entries) == {"sha:a", "sha:c"}
+    assert set(reloaded.url_index) == {"u/a", "u/c"}
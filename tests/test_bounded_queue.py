@@ -0,0 +1,43 @@
+import asyncio
+
+import check_active
+from check_active import check_nodes, ProbeCache, AdaptiveLimiter
+from node_model import Node
+
+def test_lazy_input_is_consumed_with_bounded_lookahead(monkeypatch):
+    monkeypatch.setattr(check_active, "QUEUE_SIZE", 10)
+    produced = 0
+    started = 0
+    max_ahead = 0
+
+    def nodes():
+        nonlocal produced
+        for i in range(500):
+            produced += 1
+            yield Node.parse(f"trojan://pw@h{i}.example:443")
+
+    async def fake_check(node, probes):
+        nonlocal started, max_ahead
+        started += 1
+        max_ahead = max(max_ahead, produced - started)
+        await asyncio.sleep(0.001)
+        return None
+
+    monkeypatch.setattr(check_active, "check_connectivity", fake_check)
+    limiter = AdaptiveLimiter(initial=20, minimum=20, maximum=20)
+    asyncio.run(check_nodes(nodes(), limiter, cache=ProbeCache(path=None)))
+    assert started == 500
+    # 预读量只取决于队列长度与 worker 数，与输入规模无关
+    assert max_ahead <= check_active.QUEUE_SIZE + limiter.maximum + 1
+
+def test_duplicate_links_are_checked_once(monkeypatch):
+    seen = []
+
+    async def fake_check(node, probes):
+        seen.append(node.link)
+        return None
+
+    monkeypatch.setattr(check_active, "check_connectivity", fake_check)
+    links = ["trojan://pw@a.example:443#x", "trojan://pw@a.example:443#x", "trojan://pw@a.example:443#y"]
+    asyncio.run(check_nodes((Node.parse(link) for link in links), cache=ProbeCache(path=None)))
+    assert sorted(seen) == sorted(set(links))
@@ -0,0 +1,69 @@
+import json
+import base64
+
+import pytest
+
+from node_model import Node, canonical_link, node_fingerprint
+
+def vmess(**conf):
+    return "vmess://" + base64.b64encode(json.dumps(conf).encode()).decode()
+
+def same(*links):
+    return len({node_fingerprint(link) for link in links}) == 1
+
+def test_vmess_ignores_key_order_remark_and_defaults():
+    a = vmess(add="V.Example", port="443", id="ABC", tls="tls", ps="香港", v="2")
+    b = vmess(tls="tls", id="abc", port=443, add="v.example", aid="0", net="tcp", scy="auto", type="none", ps="日本")
+    assert same(a, b)
+    assert canonical_link(a) == 'vmess://{"add": "v.example", "id": "abc", "port": "443", "tls": "tls"}'
+
+def test_vmess_non_default_fields_still_matter():
+    assert not same(vmess(add="v.example", port=443, id="u"), vmess(add="v.example", port=443, id="u", net="ws"))
+    assert not same(vmess(add="v.example", port=443, id="u"), vmess(add="v.example", port=443, id="u", path="/a"))
+
+def test_node_fingerprint_matches_parsed_node():
+    link = vmess(add="v.example", port=443, id="u", ps="x")
+    assert Node.parse(link).fingerprint == node_fingerprint(link)
+
+def test_ss_sip002_plain_and_full_base64_agree():
+    userinfo = base64.urlsafe_b64encode(b"AES-256-GCM:pw").decode().rstrip("=")
+    sip002 = f"ss://{userinfo}@1.2.3.4:8388#a"
+    plain = "ss://aes-256-gcm:pw@1.2.3.4:8388/#b"
+    full = "ss://" + base64.b64encode(b"aes-256-gcm:pw@1.2.3.4:8388").decode() + "#c"
+    assert same(sip002, plain, full)
+    assert canonical_link(full) == "ss://aes-256-gcm:pw@1.2.3.4:8388"
+
+def test_ss_password_is_case_sensitive():
+    assert not same("ss://aes-256-gcm:pw@1.2.3.4:8388", "ss://aes-256-gcm:PW@1.2.3.4:8388")
+
+@pytest.mark.parametrize("a,b", [
+    # 查询参数顺序
+    ("trojan://pw@t.example:443?sni=s.example&type=ws", "trojan://pw@t.example:443?type=ws&sni=s.example"),
+    # 主机与域名类参数大小写
+    ("trojan://pw@T.Example:443?sni=S.Example", "trojan://pw@t.example:443?sni=s.example"),
+    # 百分号编码
+    ("trojan://p%40ss@t.example:443?path=%2Fws", "trojan://p%40ss@t.example:443?path=/ws"),
+    # 默认路径与空值参数
+    ("vless://U-U-I-D@v.example:443/?security=tls&flow=", "vless://u-u-i-d@v.example:443?security=tls"),
+    # 协议名大小写与 hy2 别名
+    ("hy2://pw@h.example:443", "HYSTERIA2://pw@h.example:443"),
+    # IPv6 主机
+    ("trojan://pw@[2001:DB8::1]:443", "trojan://pw@[2001:db8::1]:443#x"),
+])
+def test_equivalent_url_spellings_share_a_fingerprint(a, b):
+    assert same(a, b)
+
+@pytest.mark.parametrize("a,b", [
+    ("trojan://pw@t.example:443", "trojan://PW@t.example:443"),       # trojan 密码区分大小写
+    ("trojan://pw@t.example:443", "trojan://pw@t.example:8443"),
+    ("trojan://pw@t.example:443?path=/A", "trojan://pw@t.example:443?path=/a"),
+    ("trojan://pw@t.example:443", "vless://pw@t.example:443"),
+])
+def test_distinct_nodes_stay_distinct(a, b):
+    assert not same(a, b)
+
+@pytest.mark.parametrize("link", ["vmess://!!!#x", "ss://bm9wZQ==#x", "trojan://pw@t.example:notaport#x"])
+def test_unparseable_links_fall_back_to_raw_body(link):
+    protocol, rest = link.split("://", 1)
+    assert canonical_link(link) == f"{protocol}://{rest.split('#')[0]}"
+    assert same(link, link.replace("#x", "#y"))
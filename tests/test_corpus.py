@@ -0,0 +1,31 @@
+import os
+import sys
+import random
+
+import pytest
+
+# 语料生成器位于 benchmarks/ (平铺脚本)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from corpus import build_corpus, make_links, CORPUS_KINDS
+from aggregator import NodeExtractor
+
+def test_same_seed_builds_identical_corpus():
+    assert build_corpus(50, seed=7) == build_corpus(50, seed=7)
+    assert make_links(random.Random("s"), 30) == make_links(random.Random("s"), 30)
+
+def test_different_seed_changes_every_kind():
+    a, b = build_corpus(50, seed=7), build_corpus(50, seed=8)
+    assert all(a[kind] != b[kind] for kind in CORPUS_KINDS)
+
+def test_kinds_use_independent_random_streams(monkeypatch):
+    # 去掉一种语料不影响其余语料的内容
+    full = build_corpus(50, seed=7)
+    monkeypatch.delitem(CORPUS_KINDS, "json_list")
+    partial = build_corpus(50, seed=7)
+    assert partial == {kind: text for kind, text in full.items() if kind != "json_list"}
+
+@pytest.mark.parametrize("kind", sorted(CORPUS_KINDS))
+def test_every_kind_yields_all_its_nodes(kind):
+    text = build_corpus(50, seed=7)[kind]
+    assert len(NodeExtractor().extract_nodes(text)) == 50
@@ -0,0 +1,49 @@
+import time
+import socket
+import asyncio
+
+import pytest
+
+import check_active
+from check_active import DNSResolver
+
+@pytest.fixture
+def fake_dns(monkeypatch):
+    calls = []
+
+    def getaddrinfo(host, port, family=0, type=0, *args):
+        calls.append(host)
+        time.sleep(0.05)
+        if host == "slow.example":
+            time.sleep(1)
+        if host.startswith("missing"):
+            raise socket.gaierror("not found")
+        return [(socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("2001:db8::1", 0, 0, 0)),
+                (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.0.2.1", 0))]
+
+    monkeypatch.setattr(check_active.socket, "getaddrinfo", getaddrinfo)
+    return calls
+
+def resolve_all(resolver, hosts):
+    async def run():
+        try:
+            return await asyncio.gather(*(resolver.resolve(host) for host in hosts))
+        finally:
+            resolver.close()
+    return asyncio.run(run())
+
+def test_ip_literals_skip_lookup(fake_dns):
+    assert resolve_all(DNSResolver(), ["1.2.3.4", "2001:db8::2"]) == ["1.2.3.4", "2001:db8::2"]
+    assert fake_dns == []
+
+def test_concurrent_lookups_share_one_query_and_prefer_ipv4(fake_dns):
+    resolver = DNSResolver()
+    assert resolve_all(resolver, ["a.example"] * 50) == ["192.0.2.1"] * 50
+    assert fake_dns == ["a.example"] and resolver.lookups == 1
+
+def test_failures_and_timeouts_are_cached(fake_dns):
+    resolver = DNSResolver(timeout=0.3)
+    assert resolve_all(resolver, ["missing.example", "slow.example"]) == [None, None]
+    assert resolver.failures == 2
+    assert resolver.cache == {"missing.example": None, "slow.example": None}
+    assert not resolver.pending
@@ -0,0 +1,32 @@
+import asyncio
+
+from check_active import check_nodes, endpoint_key, ProbeCache, AdaptiveLimiter
+from node_model import Node
+
+def run_check(links):
+    return asyncio.run(check_nodes([Node.parse(link) for link in links], AdaptiveLimiter(initial=50), cache=ProbeCache(path=None)))
+
+def test_nodes_on_one_endpoint_share_a_single_handshake(tls_server):
+    port, stats = tls_server
+    links = [f"trojan://user{i}@127.0.0.1:{port}?sni=localhost#n{i}" for i in range(20)]
+    before = stats["handshakes"]
+    results = run_check(links)
+    assert len(results) == 20
+    assert stats["handshakes"] - before == 1
+    # 结果按节点逐个扇出：链接与指纹各不相同，延迟相同
+    assert len({fingerprint for _, _, _, fingerprint, _ in results}) == 20
+    assert len({latency for _, latency, _, _, _ in results}) == 1
+
+def test_different_sni_is_a_different_endpoint(tls_server):
+    port, stats = tls_server
+    before = stats["handshakes"]
+    run_check([f"trojan://pw@127.0.0.1:{port}?sni=a.example", f"trojan://pw@127.0.0.1:{port}?sni=b.example"])
+    assert stats["handshakes"] - before == 2
+
+def test_dead_endpoint_fails_every_node(closed_port):
+    assert run_check([f"trojan://u{i}@127.0.0.1:{closed_port}" for i in range(5)]) == []
+
+def test_endpoint_key_ignores_host_case():
+    a = Node.parse("trojan://pw@Edge.Example:443?sni=s")
+    b = Node.parse("trojan://other@edge.example:443?sni=s#x")
+    assert endpoint_key(a) == endpoint_key(b) == ("edge.example", 443, "s")
@@ -0,0 +1,62 @@
+import json
+import base64
+
+import pytest
+
+import aggregator
+from aggregator import NodeExtractor, FORMAT_JSON, FORMAT_YAML, FORMAT_LINKS, FORMAT_BASE64, PROXIES_SNIFF_CHARS
+
+TROJAN = "trojan://pw@h.example:443?sni=s.example#a"
+VLESS = "vless://uuid@v.example:443?security=tls#b"
+
+CLASH = """\
+# 示例 trojan://pw@comment.example:443#in-comment
+port: 7890
+proxies:
+  - {name: t, type: trojan, server: t.example, port: 443, password: pw, sni: s.example}
+  - {name: s, type: ss, server: s.example, port: 8388, cipher: aes-256-gcm, password: pw}
+"""
+
+@pytest.fixture
+def extractor():
+    return NodeExtractor()
+
+needs_yaml = pytest.mark.skipif(aggregator.yaml is None, reason="需要 PyYAML")
+
+def test_sniff_json(extractor):
+    assert extractor.sniff_format(json.dumps({"proxies": []})) == FORMAT_JSON
+
+@needs_yaml
+def test_sniff_clash_before_links_even_with_a_link_in_the_head(extractor):
+    assert extractor.sniff_format(CLASH) == FORMAT_YAML
+
+def test_sniff_plain_links(extractor):
+    assert extractor.sniff_format(f"{TROJAN}\n{VLESS}\n") == FORMAT_LINKS
+
+def test_sniff_base64_subscription(extractor):
+    assert extractor.sniff_format(base64.b64encode(f"{TROJAN}\n{VLESS}".encode()).decode()) == FORMAT_BASE64
+
+@needs_yaml
+def test_proxies_key_sniff_is_bounded(extractor):
+    late = TROJAN + "\n" + "x" * PROXIES_SNIFF_CHARS + "\nproxies:\n  - {name: t, type: trojan, server: t.example, port: 443, password: pw}\n"
+    assert extractor.sniff_format(late) == FORMAT_LINKS
+
+@needs_yaml
+def test_parsed_yaml_takes_only_the_structured_path(extractor):
+    nodes, path = extractor.extract_nodes_with_format(CLASH)
+    assert path == FORMAT_YAML
+    assert len(nodes) == 2 and not any("comment.example" in node for node in nodes)
+    assert nodes[0].startswith("trojan://pw@t.example:443") and nodes[1].startswith("ss://")
+
+@needs_yaml
+def test_unparseable_yaml_falls_back_to_links(extractor):
+    broken = "proxies:\n  - [unclosed\n" + TROJAN + "\n"
+    nodes, path = extractor.extract_nodes_with_format(broken)
+    assert nodes == [TROJAN] and path == f"{FORMAT_YAML}->{FORMAT_LINKS}"
+
+def test_base64_subscription_decodes(extractor):
+    encoded = base64.b64encode(f"{TROJAN}\n{VLESS}".encode()).decode()
+    assert extractor.extract_nodes_with_format(encoded) == ([TROJAN, VLESS], FORMAT_BASE64)
+
+def test_empty_body(extractor):
+    assert extractor.extract_nodes_with_format("") == ([], "none")
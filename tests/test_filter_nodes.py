@@ -0,0 +1,41 @@
+import json
+import base64
+
+import pytest
+
+import filter_nodes
+from filter_nodes import KeywordMatcher, compile_keywords, is_banned, apply_filter
+from node_model import Node
+
+def vmess(**conf):
+    return "vmess://" + base64.b64encode(json.dumps(conf).encode()).decode()
+
+def test_compile_prefers_longer_keywords_and_ignores_empty():
+    assert compile_keywords(["", None]) is None
+    assert compile_keywords(["流", "流量"]).search("剩余流量").group() == "流量"
+
+def test_matches_percent_encoded_remark():
+    matcher = KeywordMatcher(keywords=["到期"], field_rules={})
+    assert matcher.is_banned(Node.parse("trojan://pw@h.example:443#%E5%88%B0%E6%9C%9F"))
+    assert not matcher.is_banned(Node.parse("trojan://pw@h.example:443#ok"))
+
+def test_matches_vmess_remark_inside_base64():
+    matcher = KeywordMatcher(keywords=["官网"], field_rules={})
+    assert matcher.is_banned(Node.parse(vmess(add="h.example", port=443, id="x", ps="官网 example")))
+
+def test_field_rules_only_match_their_field():
+    matcher = KeywordMatcher(keywords=[], field_rules={"host": ["bad.example"]})
+    assert matcher.is_banned(Node.parse("trojan://pw@bad.example:443#x"))
+    assert not matcher.is_banned(Node.parse("trojan://pw@good.example:443#bad.example"))
+
+def test_unknown_field_fails_loudly():
+    with pytest.raises(ValueError, match="hostname"):
+        KeywordMatcher(field_rules={"hostname": ["x"]})
+
+def test_default_matcher_is_compiled_once(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("默认黑名单不应在每次调用时重新编译")
+    monkeypatch.setattr(filter_nodes, "compile_keywords", fail)
+    node = Node.parse("trojan://pw@h.example:443#剩余流量")
+    assert is_banned(node)
+    assert apply_filter([node, Node.parse("trojan://pw@h.example:443#ok")])[1] == 1
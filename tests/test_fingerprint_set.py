@@ -0,0 +1,38 @@
+import hashlib
+import random
+
+from node_model import FingerprintSet, fingerprint_digest
+
+def fingerprints(count, seed=0):
+    rng = random.Random(seed)
+    return [hashlib.md5(str(rng.random()).encode()).hexdigest() for _ in range(count)]
+
+def test_add_reports_new_and_matches_builtin_set():
+    seen, reference = FingerprintSet(capacity=4), set()
+    values = fingerprints(5000) * 2
+    for fp in values:
+        assert seen.add(fp) == (fp[:16] not in reference)
+        reference.add(fp[:16])
+    assert len(seen) == len(reference) == 5000
+    assert all(fp in seen for fp in values)
+    assert not any(fp in seen for fp in fingerprints(200, seed=1))
+
+def test_growth_keeps_load_factor_below_half():
+    seen = FingerprintSet(capacity=1)
+    for fp in fingerprints(1000):
+        seen.add(fp)
+    assert len(seen) * 2 <= len(seen.table)
+
+def test_zero_digest_does_not_collide_with_empty_slot():
+    seen = FingerprintSet()
+    zero = "0" * 32
+    assert zero not in seen
+    assert seen.add(zero)
+    assert zero in seen and not seen.add(zero)
+
+def test_only_first_64_bits_are_compared():
+    # 两种去重方式的判定一致：均只比较前 16 位十六进制
+    a, b = "0123456789abcdef" + "0" * 16, "0123456789abcdef" + "f" * 16
+    seen = FingerprintSet()
+    assert seen.add(a) and not seen.add(b)
+    assert fingerprint_digest(a) == fingerprint_digest(b) == bytes.fromhex("0123456789abcdef")
@@ -0,0 +1,56 @@
+import os
+import sys
+import shutil
+import subprocess
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from github_standin import GitHubStandin, StandinConfig, blob_sha, parse_episodes
+
+@pytest.fixture(scope="module")
+def standin():
+    return GitHubStandin(StandinConfig(files=400, file_nodes=5, seed=7))
+
+def search_items(standin, q):
+    status, body = standin.search({"q": [q], "per_page": ["100"]})
+    assert status == 200
+    return body["items"]
+
+def raw_path(item):
+    _, _, _, owner, repo, _, commit, path = item["html_url"].split("/", 7)
+    return f"/raw/{owner}/{repo}/{commit}/{path}"
+
+@pytest.mark.skipif(not shutil.which("git"), reason="需要 git")
+def test_blob_sha_matches_git_hash_object():
+    body = "ss://YWVzOnB3QDEuMi4zLjQ6ODM4OA==\n节点\n".encode()
+    expected = subprocess.run(["git", "hash-object", "--stdin"], input=body, capture_output=True, check=True).stdout.decode().strip()
+    assert blob_sha(body) == expected
+
+def test_search_sha_is_the_blob_sha_of_the_raw_body(standin):
+    items = search_items(standin, "vmess")
+    assert items
+    for item in items:
+        status, body = standin.raw(raw_path(item))
+        assert status == 200
+        assert blob_sha(body) == item["sha"]
+
+def test_forks_share_their_origin_blob_sha(standin):
+    forks = [i for i, entry in enumerate(standin.files) if entry.content_seed != i]
+    assert forks
+    for i in forks:
+        origin = standin.files[i].content_seed
+        assert standin.files[i].commit != standin.files[origin].commit
+        assert standin.sha(i) == standin.sha(origin)
+    # 不同内容的文件 sha 不同
+    originals = [i for i, entry in enumerate(standin.files) if entry.content_seed == i and entry.nodes]
+    assert len({standin.sha(i) for i in originals}) == len(originals)
+
+def test_unknown_commit_is_not_found(standin):
+    assert standin.raw("/raw/user/repo/" + "0" * 40 + "/sub.txt")[0] == 404
+
+def test_parse_episodes():
+    assert parse_episodes("5:429:3,20-22:403") == {5: (429, 3), 20: (403, None), 21: (403, None), 22: (403, None)}
+    with pytest.raises(ValueError):
+        parse_episodes("5")
@@ -0,0 +1,56 @@
+import json
+import base64
+
+import pytest
+
+from node_model import Node, safe_base64_decode
+
+def vmess(**conf):
+    return "vmess://" + base64.b64encode(json.dumps(conf).encode()).decode()
+
+def test_vmess_tls_node():
+    node = Node.parse(vmess(add="v.example", port="443", id="u", tls="tls", host="cdn.example", ps="香港"))
+    assert (node.protocol, node.host, node.port, node.tls, node.sni, node.remark) == ("vmess", "v.example", 443, True, "cdn.example", "香港")
+    assert node.vmess_conf["id"] == "u"
+
+def test_vmess_without_tls_has_no_sni():
+    node = Node.parse(vmess(add="v.example", port=80, id="u", host="cdn.example"))
+    assert not node.tls and node.sni is None and node.port == 80
+
+def test_ss_sip002_and_full_base64():
+    userinfo = base64.b64encode(b"aes-256-gcm:pw").decode()
+    sip002 = Node.parse(f"ss://{userinfo}@1.2.3.4:8388#%E6%97%A5%E6%9C%AC")
+    full = Node.parse("ss://" + base64.b64encode(b"aes-256-gcm:pw@1.2.3.4:8388").decode() + "#x")
+    assert (sip002.host, sip002.port, sip002.remark, sip002.tls) == ("1.2.3.4", 8388, "日本", False)
+    assert (full.host, full.port) == ("1.2.3.4", 8388)
+
+@pytest.mark.parametrize("link,tls,sni", [
+    ("trojan://pw@t.example:443?sni=s.example#a", True, "s.example"),
+    ("trojan://pw@t.example:443?peer=p.example", True, "p.example"),
+    ("trojan://pw@t.example:443?security=none", False, None),
+    ("vless://u@v.example:443?security=reality&sni=r.example", True, "r.example"),
+    ("vless://u@v.example:443?security=none", False, None),
+    ("hysteria2://pw@h.example:443?security=tls", True, None),
+])
+def test_url_schemes(link, tls, sni):
+    node = Node.parse(link)
+    assert (node.tls, node.sni, node.port) == (tls, sni, 443)
+
+def test_ipv6_host_is_unbracketed():
+    assert Node.parse("trojan://pw@[2001:db8::1]:443#x").host == "2001:db8::1"
+
+@pytest.mark.parametrize("link", ["", "not a link", "vmess://!!!", "trojan://pw@h.example:notaport", "ss://bm9wZQ=="])
+def test_malformed_links_parse_to_empty_fields(link):
+    node = Node.parse(link)
+    assert node.host is None or node.port is None
+    assert not node.tls
+
+def test_fingerprint_is_computed_once_and_ignores_remark():
+    a, b = Node.parse("trojan://pw@t.example:443#a"), Node.parse("trojan://pw@t.example:443#b")
+    assert a.fingerprint == b.fingerprint
+    assert a._fingerprint is not None
+
+def test_safe_base64_decode_handles_urlsafe_and_padding():
+    encoded = base64.urlsafe_b64encode("节点?>>".encode()).decode().rstrip("=")
+    assert safe_base64_decode(encoded) == "节点?>>"
+    assert safe_base64_decode("") is None
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from node_model import Node, FingerprintSet, FINGERPRINT_VERSION
+from node_store import NodeStore, HISTORY_WINDOW_DAYS, RETENTION_DAYS, LATENCY_HISTORY_LEN
+
+DAY = 86400
+
+@pytest.fixture
+def store(tmp_path):
+    store = NodeStore(str(tmp_path / "nodes.db"))
+    yield store
+    store.close()
+
+def nodes(*links):
+    return [Node.parse(link) for link in links]
+
+def row(store, link):
+    return store.conn.execute(
+        "SELECT link, source, first_seen, last_seen, last_alive, latency_history FROM nodes WHERE fingerprint = ?",
+        (Node.parse(link).fingerprint,)
+    ).fetchone()
+
+def test_upsert_keeps_first_seen_and_refreshes_the_rest(store):
+    store.upsert(nodes("trojan://pw@a.example:443#old"), "crawl", 100, alive=True)
+    store.upsert(nodes("trojan://pw@a.example:443#new"), "repo:path", 200)
+    link, source, first_seen, last_seen, last_alive, _ = row(store, "trojan://pw@a.example:443")
+    assert (link, source, first_seen, last_seen, last_alive) == ("trojan://pw@a.example:443#new", "repo:path", 100, 200, 100)
+    assert store.count() == 1
+
+def test_upsert_records_per_node_sources(store):
+    a, b = nodes("trojan://pw@a.example:443", "trojan://pw@b.example:443")
+    store.upsert([a, b], "crawl", 100, sources={FingerprintSet.digest(a.fingerprint): "user/repo:sub.txt"})
+    assert row(store, a.link)[1] == "user/repo:sub.txt"
+    assert row(store, b.link)[1] == "crawl"
+
+def test_merge_crawl_returns_new_nodes_then_recent_history(store):
+    now = 100 * DAY
+    store.upsert(nodes("trojan://pw@recent.example:443"), "crawl", now - DAY, alive=True)
+    store.upsert(nodes("trojan://pw@stale.example:443"), "crawl", now - (HISTORY_WINDOW_DAYS + 1) * DAY, alive=True)
+    store.upsert(nodes("trojan://pw@never.example:443"), "crawl", now - DAY)
+    merged = store.merge_crawl(nodes("trojan://pw@new.example:443", "trojan://pw@new.example:443#dup",
+                                     "trojan://pw@recent.example:443#again"), now=now)
+    assert [node.host for node in merged] == ["new.example", "recent.example"]
+
+def test_record_results_appends_bounded_history(store):
+    link = "trojan://pw@a.example:443"
+    store.upsert(nodes(link), "crawl", 100)
+    for i in range(LATENCY_HISTORY_LEN + 3):
+        store.record_results([(Node.parse(link).fingerprint, 10.0 + i)], now=200 + i)
+    *_, last_alive, history = row(store, link)
+    history = json.loads(history)
+    assert last_alive == 200 + LATENCY_HISTORY_LEN + 2
+    assert len(history) == LATENCY_HISTORY_LEN and history[-1] == 10.0 + LATENCY_HISTORY_LEN + 2
+    # 不在库中的指纹直接忽略
+    store.record_results([("f" * 32, 1.0)])
+
+def test_prune_removes_only_long_unseen_and_dead(store):
+    now = 1000 * DAY
+    old = now - (RETENTION_DAYS + 1) * DAY
+    store.upsert(nodes("trojan://pw@gone.example:443"), "crawl", old)
+    store.upsert(nodes("trojan://pw@kept.example:443"), "crawl", now)
+    store.upsert(nodes("trojan://pw@alive.example:443"), "crawl", old)
+    store.record_results([(Node.parse("trojan://pw@alive.example:443").fingerprint, 5.0)], now=now)
+    assert store.prune(now) == 1
+    assert row(store, "trojan://pw@gone.example:443") is None
+
+def test_reopen_with_old_fingerprint_version_merges_equivalent_rows(tmp_path):
+    path = str(tmp_path / "nodes.db")
+    store = NodeStore(path)
+    # 旧算法下同一节点的两种写法各占一行 (主键为旧指纹)
+    store.conn.executemany(
+        "INSERT INTO nodes (fingerprint, link, source, first_seen, last_seen, last_alive, latency_history) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [("old-a", "trojan://pw@t.example:443?sni=s&type=ws#a", "repo:a", 100, 300, 250, "[1.0]"),
+         ("old-b", "trojan://pw@T.example:443?type=ws&sni=s#b", "repo:b", 50, 200, 290, "[2.0]"),
+         ("old-c", "trojan://pw@other.example:443#c", "repo:c", 10, 20, None, "[]")]
+    )
+    store.conn.execute("PRAGMA user_version = 1")
+    store.close()
+
+    store = NodeStore(path)
+    try:
+        assert store.count() == 2
+        assert store.conn.execute("PRAGMA user_version").fetchone()[0] == FINGERPRINT_VERSION
+        link, source, first_seen, last_seen, last_alive, history = row(store, "trojan://pw@t.example:443?sni=s&type=ws")
+        # 链接与来源取最近出现的一行，first_seen 取最早，延迟历史取最近存活的一行
+        assert (link, source, first_seen, last_seen) == ("trojan://pw@t.example:443?sni=s&type=ws#a", "repo:a", 50, 300)
+        assert (last_alive, json.loads(history)) == (290, [2.0])
+        assert row(store, "trojan://pw@other.example:443")[0] == "trojan://pw@other.example:443#c"
+    finally:
+        store.close()
+
+def test_reopen_with_current_version_does_not_rekey(tmp_path):
+    path = str(tmp_path / "nodes.db")
+    store = NodeStore(path)
+    store.conn.execute(
+        "INSERT INTO nodes (fingerprint, link, first_seen, last_seen) VALUES ('legacy', 'trojan://pw@t.example:443', 1, 1)"
+    )
+    store.close()
+    store = NodeStore(path)
+    try:
+        assert store.conn.execute("SELECT fingerprint FROM nodes").fetchall() == [("legacy",)]
+    finally:
+        store.close()
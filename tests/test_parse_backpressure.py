@@ -0,0 +1,44 @@
+import threading
+
+import aggregator
+from aggregator import FileTask
+
+def make_crawler(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return aggregator.NodeAggregator(token=None)
+
+def submit_in_thread(crawler, name):
+    task = FileTask(f"https://raw.example/{name}", f"url:{name}", "k|txt", name)
+    thread = threading.Thread(target=crawler._submit_parse, args=(task, b"body", None), daemon=True)
+    thread.start()
+    return thread
+
+def fill(crawler):
+    for i in range(crawler.parse_queue.maxsize):
+        crawler._submit_parse(FileTask(f"u{i}", f"k{i}", "k|txt", f"s{i}"), b"body", None)
+
+def test_parse_queue_is_bounded_by_parse_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(aggregator, "PARSE_WORKERS", 3)
+    crawler = make_crawler(tmp_path, monkeypatch)
+    assert crawler.parse_queue.maxsize == 3 * aggregator.PARSE_BATCH_SIZE
+
+def test_submit_blocks_until_dispatcher_drains(tmp_path, monkeypatch):
+    crawler = make_crawler(tmp_path, monkeypatch)
+    fill(crawler)
+    thread = submit_in_thread(crawler, "extra")
+    thread.join(0.3)
+    assert thread.is_alive()
+    crawler.parse_queue.get()
+    thread.join(2)
+    assert not thread.is_alive()
+    assert crawler.parse_queue.full()
+
+def test_blocked_submit_gives_up_on_stop(tmp_path, monkeypatch):
+    crawler = make_crawler(tmp_path, monkeypatch)
+    fill(crawler)
+    pending = crawler.pending_parse
+    thread = submit_in_thread(crawler, "extra")
+    crawler.should_stop = True
+    thread.join(3)
+    assert not thread.is_alive()
+    assert crawler.pending_parse == pending
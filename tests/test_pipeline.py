@@ -0,0 +1,62 @@
+import json
+import base64
+import asyncio
+import sqlite3
+
+import pipeline
+from node_model import Node
+from node_store import STORE_FILE
+
+def write_input(links):
+    with open("nodes.txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(links))
+
+def read_output():
+    with open("nodes.txt", encoding="utf-8") as f:
+        links = f.read().splitlines()
+    with open("sub.txt", encoding="utf-8") as f:
+        assert base64.b64decode(f.read()).decode("utf-8").splitlines() == links
+    return links
+
+def latency_history(link):
+    with sqlite3.connect(STORE_FILE) as conn:
+        row = conn.execute("SELECT latency_history, last_alive FROM nodes WHERE fingerprint = ?", (Node.parse(link).fingerprint,)).fetchone()
+    return json.loads(row[0]), row[1]
+
+def test_pipeline_merges_filters_checks_and_records(tmp_path, monkeypatch, tls_server, closed_port):
+    monkeypatch.chdir(tmp_path)
+    port, _ = tls_server
+    alive = f"trojan://pw@127.0.0.1:{port}?sni=localhost#a"
+    links = [
+        alive,
+        f"trojan://pw@127.0.0.1:{port}?sni=localhost#same-node-other-remark",
+        f"trojan://pw@127.0.0.1:{closed_port}?sni=localhost#dead",
+        f"vless://u@127.0.0.1:{port}?security=none#plain",
+        f"trojan://pw@127.0.0.1:{port}?sni=other#剩余流量",
+    ]
+    write_input(links)
+    asyncio.run(pipeline.run_pipeline())
+
+    output = read_output()
+    assert len(output) == 1
+    assert output[0].startswith(f"trojan://pw@127.0.0.1:{port}?sni=localhost#") and "ms" in output[0]
+    history, last_alive = latency_history(alive)
+    assert len(history) == 1 and last_alive is not None
+
+    # 第二轮：存活结果取自探测缓存，不重复写入延迟历史；强制重新探测时照常记录
+    write_input(links)
+    asyncio.run(pipeline.run_pipeline())
+    assert len(latency_history(alive)[0]) == 1
+    write_input(links)
+    asyncio.run(pipeline.run_pipeline(force_probe=True))
+    assert len(latency_history(alive)[0]) == 2
+
+def test_pipeline_without_store_merges_previous_release(tmp_path, monkeypatch, closed_port):
+    monkeypatch.chdir(tmp_path)
+    write_input([f"trojan://pw@127.0.0.1:{closed_port}#new"])
+    with open("previous_nodes.txt", "w", encoding="utf-8") as f:
+        f.write(f"trojan://pw@127.0.0.1:{closed_port}#old\n")
+    asyncio.run(pipeline.run_pipeline(debug_outputs=True, use_store=False))
+    with open(pipeline.DEBUG_MERGED_FILE, encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"trojan://pw@127.0.0.1:{closed_port}#new"]
+    assert read_output() == []
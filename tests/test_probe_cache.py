@@ -0,0 +1,69 @@
+import pytest
+
+from check_active import (
+    ProbeCache, latency_remark, runs_window,
+    RUN_INTERVAL, NEGATIVE_CACHE_MIN_FAILS, NEGATIVE_CACHE_BASE_RUNS, PROBE_CACHE_TTL_RUNS,
+)
+
+KEY = ("node.example", 443, "sni.example")
+
+def simulate_failing_endpoint(runs, interval):
+    """按调度节奏模拟一个每轮都探测失败的端点，返回各轮是否真实发起了探测"""
+    cache = ProbeCache(path=None)
+    probed = []
+    for run in range(runs):
+        now = interval * (run + 1)
+        hit, _ = cache.lookup(KEY, now)
+        probed.append(not hit)
+        if not hit:
+            cache.record(KEY, None, now)
+    return probed
+
+@pytest.mark.parametrize("delay", [0, 3600])
+def test_consecutive_failures_suppress_next_scheduled_probe(delay):
+    # 连续失败 NEGATIVE_CACHE_MIN_FAILS 轮的端点，下一轮 (含排队延迟) 不再探测，之后恢复探测
+    probed = simulate_failing_endpoint(NEGATIVE_CACHE_MIN_FAILS + NEGATIVE_CACHE_BASE_RUNS + 1, RUN_INTERVAL + delay)
+    assert probed == [True] * NEGATIVE_CACHE_MIN_FAILS + [False] * NEGATIVE_CACHE_BASE_RUNS + [True]
+
+def test_skip_window_doubles_and_is_capped():
+    cache = ProbeCache(path=None)
+    skips = []
+    for _ in range(NEGATIVE_CACHE_MIN_FAILS + 6):
+        cache.record(KEY, None, 1000)
+        entry = cache.entries[cache._key(KEY)]
+        skips.append(round((entry["skip_until"] - 1000) / RUN_INTERVAL, 1))
+    assert skips[:NEGATIVE_CACHE_MIN_FAILS - 1] == [0] * (NEGATIVE_CACHE_MIN_FAILS - 1)
+    assert skips[NEGATIVE_CACHE_MIN_FAILS - 1:] == [1.5, 2.5, 4.5, 8.5, 8.5, 8.5, 8.5]
+
+def test_alive_result_reused_with_its_measurement_time():
+    cache = ProbeCache(path=None)
+    cache.record(KEY, (123.4, "1.2.3.4"), now=1000)
+    assert cache.lookup(KEY, 1000 + RUN_INTERVAL) == (True, (123.4, "1.2.3.4", 1000))
+    assert cache.lookup(KEY, 1000 + runs_window(PROBE_CACHE_TTL_RUNS)) == (False, None)
+    assert cache.hits == 1
+
+def test_success_resets_failure_streak():
+    cache = ProbeCache(path=None)
+    for _ in range(NEGATIVE_CACHE_MIN_FAILS - 1):
+        cache.record(KEY, None, 0)
+    cache.record(KEY, (50.0, "1.2.3.4"), 0)
+    cache.record(KEY, None, 0)
+    assert cache.entries[cache._key(KEY)]["fails"] == 1
+
+def test_force_ignores_entries_but_still_records():
+    cache = ProbeCache(path=None, force=True)
+    cache.record(KEY, (50.0, "1.2.3.4"), now=0)
+    assert cache.lookup(KEY, 1) == (False, None)
+    assert cache._key(KEY) in cache.updates
+
+def test_save_drops_entries_past_retention(tmp_path):
+    path = str(tmp_path / "probe_cache.json")
+    cache = ProbeCache(path=path)
+    cache.record(("old.example", 443, None), (10.0, "1.1.1.1"), now=1000)
+    cache.record(KEY, (10.0, "1.1.1.1"), now=100 * RUN_INTERVAL)
+    cache.save(now=100 * RUN_INTERVAL)
+    assert list(ProbeCache(path=path).entries) == [cache._key(KEY)]
+
+def test_latency_remark_marks_cached_measurements():
+    assert latency_remark("US", 123.4, checked=1000, now=1000 + 3600) == "[US] 123ms"
+    assert latency_remark("US", 123.4, checked=1000, now=1000 + 2 * 86400 + 5) == "[US] 123ms (2d)"
@@ -0,0 +1,70 @@
+import re
+import random
+
+import pytest
+
+import aggregator
+from aggregator import NodeAggregator, MAX_PAGES, PER_PAGE, MAX_SLICES, SIZE_RANGE_MAX
+
+@pytest.mark.parametrize("lo,hi", [(0, SIZE_RANGE_MAX), (0, 1), (100, 5000), (7, 9)])
+def test_split_size_range_partitions_without_overlap(lo, hi):
+    halves = NodeAggregator._split_size_range(lo, hi)
+    if hi - lo < 2:
+        assert halves is None
+        return
+    (a, b), (c, d) = halves
+    assert a == lo and d == hi and c == b + 1 and a <= b < d
+
+def test_split_is_geometric():
+    (_, mid), _ = NodeAggregator._split_size_range(0, SIZE_RANGE_MAX)
+    assert mid < SIZE_RANGE_MAX // 8
+
+class FakeIndex:
+    """按 size: 范围筛选的假搜索结果 (按索引时间倒序分页)"""
+
+    def __init__(self, sizes):
+        self.files = [(f"f{i}", size) for i, size in enumerate(sizes)]
+        self.queries = []
+
+    def __call__(self, query, page):
+        self.queries.append((query, page))
+        match = re.search(r"size:(\d+)\.\.(\d+)", query)
+        lo, hi = (int(match.group(1)), int(match.group(2))) if match else (0, SIZE_RANGE_MAX)
+        hits = [name for name, size in self.files if lo <= size <= hi]
+        items = [{"html_url": f"https://github.com/u/r/blob/c/{name}", "sha": name, "path": name}
+                 for name in hits[(page - 1) * PER_PAGE: page * PER_PAGE]]
+        return "ok", {"total_count": len(hits), "items": items}
+
+@pytest.fixture
+def crawler(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return NodeAggregator(token=None)
+
+def run_combo(crawler, monkeypatch, sizes):
+    index = FakeIndex(sizes)
+    monkeypatch.setattr(crawler, "_search_page", index)
+    enqueued = []
+    monkeypatch.setattr(crawler, "_enqueue_file", lambda raw_url, sha, combo, source: enqueued.append(sha))
+    assert crawler._search_combo("clash", "yaml")
+    return index, enqueued
+
+def test_small_result_set_is_not_partitioned(crawler, monkeypatch):
+    index, enqueued = run_combo(crawler, monkeypatch, [100] * (PER_PAGE + 5))
+    assert all("size:" not in query for query, _ in index.queries)
+    assert sorted(enqueued) == sorted(f"f{i}" for i in range(PER_PAGE + 5))
+
+def test_large_result_set_is_sliced_into_disjoint_size_ranges(crawler, monkeypatch):
+    rng = random.Random(1)
+    sizes = [int(rng.lognormvariate(7, 1.5)) % SIZE_RANGE_MAX for _ in range(MAX_PAGES * PER_PAGE * 4)]
+    index, enqueued = run_combo(crawler, monkeypatch, sizes)
+    ranges = sorted({tuple(map(int, re.search(r"size:(\d+)\.\.(\d+)", q).groups())) for q, _ in index.queries if "size:" in q})
+    leaves = [r for r in ranges if not any(o != r and r[0] <= o[0] and o[1] <= r[1] for o in ranges)]
+    assert len(leaves) <= MAX_SLICES
+    assert all(a[1] < b[0] for a, b in zip(leaves, leaves[1:]))
+    # 分片远多于一个查询可翻页的结果数 (只有基础查询首页与分片结果重叠)
+    assert len(set(enqueued)) > MAX_PAGES * PER_PAGE * 2
+    assert all(page <= MAX_PAGES for _, page in index.queries)
+
+def test_stop_status_aborts_the_search(crawler, monkeypatch):
+    monkeypatch.setattr(crawler, "_search_page", lambda query, page: ("stop", None))
+    assert not crawler._search_combo("clash", "yaml")
@@ -0,0 +1,36 @@
+import time
+
+import aggregator
+from aggregator import SearchRateLimiter, SECONDARY_LIMIT_BACKOFF, SECONDARY_LIMIT_MAX_BACKOFF
+
+def test_retry_after_header_takes_precedence():
+    limiter = SearchRateLimiter(1.0)
+    assert limiter.throttle_delay({"Retry-After": "7"}) == (7.0, True)
+    assert limiter.backoff_level == 0
+
+def test_exhausted_quota_waits_until_reset():
+    limiter = SearchRateLimiter(1.0)
+    reset = time.time() + 30
+    delay, by_header = limiter.throttle_delay({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)})
+    assert by_header and 29 <= delay <= 32
+
+def test_secondary_backoff_doubles_is_capped_and_resets():
+    limiter = SearchRateLimiter(1.0)
+    delays = [limiter.throttle_delay({})[0] for _ in range(8)]
+    assert delays[:2] == [SECONDARY_LIMIT_BACKOFF, SECONDARY_LIMIT_BACKOFF * 2]
+    assert max(delays) == delays[-1] == SECONDARY_LIMIT_MAX_BACKOFF
+    limiter.on_success()
+    assert limiter.throttle_delay({})[0] == SECONDARY_LIMIT_BACKOFF
+
+def test_acquire_refuses_wait_past_deadline():
+    limiter = SearchRateLimiter(1.0)
+    limiter.update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 60)})
+    assert not limiter.acquire(deadline=time.time() + 5)
+
+def test_session_leaves_throttling_to_the_limiter():
+    # 429 + Retry-After 必须返回给 _search_page，而不是在 session.get 内部休眠重试
+    session = aggregator.NodeAggregator._init_session(None)
+    retry = session.get_adapter("https://api.github.com").max_retries
+    assert not retry.is_retry("GET", 429, has_retry_after=True)
+    assert not retry.is_retry("GET", 403, has_retry_after=True)
+    assert retry.is_retry("GET", 502)
@@ -0,0 +1,56 @@
+import pytest
+
+from node_model import FingerprintSet
+from yield_stats import (
+    SearchStats, combo_key, save_node_sources, load_node_sources, node_source_index, record_check_results,
+    NODE_SOURCES_FILE, STATS_DECAY, YIELD_PRIOR,
+)
+
+FP_A, FP_B, FP_C = "a" * 32, "b" * 32, "c" * 32
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+def test_unsearched_combo_gets_the_optimistic_prior():
+    stats = SearchStats()
+    stats.record_crawl({combo_key("clash", "yaml"): {"files": 10, "new_nodes": 0}})
+    assert stats.score(combo_key("never", "txt")) == YIELD_PRIOR
+    assert stats.score(combo_key("clash", "yaml")) < YIELD_PRIOR
+
+def test_order_prefers_productive_combos_and_decays_history():
+    stats = SearchStats()
+    good, bad = combo_key("vmess://", "txt"), combo_key("config", "json")
+    stats.record_crawl({good: {"files": 5, "new_nodes": 500}, bad: {"files": 5, "new_nodes": 0}})
+    assert stats.order([bad, good]) == [good, bad]
+    stats.record_crawl({good: {"files": 5, "new_nodes": 0}})
+    assert stats.combos[good]["new_nodes"] == pytest.approx(500 * STATS_DECAY)
+
+def test_alive_counts_are_recorded_once_per_crawl_run():
+    stats = SearchStats()
+    assert stats.record_alive(1.0, {"k|txt": 3})
+    assert not stats.record_alive(1.0, {"k|txt": 3})
+    assert stats.combos["k|txt"]["alive"] == 3
+
+def test_node_sources_round_trip_and_index():
+    digests = [FingerprintSet.digest(FP_A), FingerprintSet.digest(FP_B)]
+    save_node_sources(NODE_SOURCES_FILE, 42.0, {"u/r:sub.txt": ("k|txt", digests)})
+    data = load_node_sources()
+    assert data["run"] == 42.0
+    assert node_source_index(data) == {digest: "u/r:sub.txt" for digest in digests}
+
+def test_unknown_node_sources_version_is_ignored():
+    with open(NODE_SOURCES_FILE, "w", encoding="utf-8") as f:
+        f.write('{"run": 1, "nodes": {"aaaa": "k|txt"}}')
+    assert load_node_sources() == {"run": None, "files": {}}
+
+def test_record_check_results_backfills_alive_counts():
+    save_node_sources(NODE_SOURCES_FILE, 7.0, {
+        "u/r:a.txt": ("k|txt", [FingerprintSet.digest(FP_A), FingerprintSet.digest(FP_B)]),
+        "u/r:b.yaml": ("c|yaml", [FingerprintSet.digest(FP_C)]),
+    })
+    assert record_check_results([FP_A, FP_B]) == {"k|txt": 2}
+    assert SearchStats().combos["k|txt"]["alive"] == 2
+    # 同一轮爬取结果再次回填不会重复累加
+    record_check_results([FP_A, FP_B])
+    assert SearchStats().combos["k|txt"]["alive"] == 2
@@ -0,0 +1,46 @@
+import json
+import base64
+
+import pytest
+
+from node_model import Node
+from check_active import shard_key, shard_of, endpoint_key
+
+def vmess(**conf):
+    return "vmess://" + base64.b64encode(json.dumps(conf).encode()).decode()
+
+def ss_b64(method, password, host, port):
+    return "ss://" + base64.b64encode(f"{method}:{password}@{host}:{port}".encode()).decode()
+
+SAME_ENDPOINT = [
+    vmess(add="Edge.Example.com", port="443", id="a", tls="tls", sni="cdn.example", ps="one"),
+    vmess(add="edge.example.com", port=443, id="b", tls="tls", sni="cdn.example", ps="two", net="ws"),
+    "trojan://secret@edge.example.com:443?sni=cdn.example#three",
+    "vless://uuid@EDGE.example.com:443/?security=tls&sni=cdn.example",
+]
+
+def test_same_endpoint_same_key():
+    assert {shard_key(link) for link in SAME_ENDPOINT} == {"edge.example.com:443"}
+
+@pytest.mark.parametrize("shards", [2, 3, 8, 16])
+def test_same_endpoint_same_shard(shards):
+    assert len({shard_of(link, shards) for link in SAME_ENDPOINT}) == 1
+
+def test_ss_encodings_share_key():
+    sip002 = "ss://" + base64.b64encode(b"aes-256-gcm:pw").decode() + "@1.2.3.4:8388#x"
+    assert shard_key(sip002) == shard_key(ss_b64("aes-256-gcm", "pw", "1.2.3.4", 8388)) == "1.2.3.4:8388"
+
+def test_ipv6_key_has_no_brackets():
+    assert shard_key("trojan://pw@[2001:DB8::1]:443#x") == "2001:db8::1:443"
+
+def test_links_and_parsed_nodes_agree():
+    links = SAME_ENDPOINT + ["trojan://pw@[2001:db8::1]:443#x", ss_b64("aes-128-gcm", "pw", "5.6.7.8", 1234)]
+    for link in links:
+        assert shard_key(link) == shard_key(Node.parse(link))
+
+def test_endpoint_keys_never_split_across_shards():
+    # endpoint_key 比分片键更细 (还区分 SNI)，同一 endpoint_key 的节点必然在同一分片
+    by_endpoint = {}
+    for link in SAME_ENDPOINT:
+        by_endpoint.setdefault(endpoint_key(Node.parse(link)), set()).add(shard_of(link, 7))
+    assert all(len(shards) == 1 for shards in by_endpoint.values())
@@ -0,0 +1,45 @@
+import pytest
+
+from aggregator import NodeAggregator
+from yield_stats import SourceReputation, source_key, YIELD_PRIOR
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+def test_file_score_falls_back_to_repo_then_prior():
+    reputation = SourceReputation()
+    reputation.record_crawl({source_key("good/repo", "a.txt"): 200, source_key("bad/repo", "a.txt"): 0})
+    assert reputation.score(source_key("good/repo", "other.txt")) > YIELD_PRIOR
+    assert reputation.score(source_key("bad/repo", "other.txt")) < YIELD_PRIOR
+    assert reputation.score(source_key("new/repo", "a.txt")) == YIELD_PRIOR
+
+def test_repo_is_decayed_once_per_run():
+    reputation = SourceReputation()
+    reputation.record_crawl({source_key("u/r", "a"): 1, source_key("u/r", "b"): 2})
+    repo = reputation.entries["r:u/r"]
+    assert (repo["runs"], repo["files"], repo["new_nodes"]) == (1, 2, 3)
+
+def test_alive_counts_credit_file_and_repo_once():
+    reputation = SourceReputation()
+    assert reputation.record_alive(5.0, {source_key("u/r", "a"): 4})
+    assert not reputation.record_alive(5.0, {source_key("u/r", "a"): 4})
+    assert reputation.entries["p:u/r:a"]["alive"] == reputation.entries["r:u/r"]["alive"] == 4
+
+def test_save_keeps_most_recent_entries(tmp_path):
+    path = str(tmp_path / "rep.json")
+    reputation = SourceReputation(path, max_entries=2)
+    for i, name in enumerate(["old", "mid", "new"]):
+        reputation.entries[f"r:{name}"] = {"runs": 1, "last_run": i}
+    reputation.save()
+    assert set(SourceReputation(path).entries) == {"r:mid", "r:new"}
+
+def test_download_queue_pops_highest_reputation_first():
+    reputation = SourceReputation()
+    reputation.record_crawl({source_key("rich/repo", "x"): 500, source_key("poor/repo", "x"): 0})
+    reputation.save()
+    crawler = NodeAggregator(token=None)
+    for repo in ("poor/repo", "unknown/repo", "rich/repo"):
+        crawler._enqueue_file(f"https://raw.example/{repo}/x", f"sha-{repo}", "k|txt", source_key(repo, "x"))
+    order = [crawler.url_queue.get_nowait()[2].source.split(":")[0] for _ in range(3)]
+    assert order == ["rich/repo", "unknown/repo", "poor/repo"]
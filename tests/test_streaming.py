@@ -0,0 +1,84 @@
+import pytest
+
+import aggregator
+from aggregator import StreamingLinkScanner, StreamingBody, LINK_PATTERN
+
+LINKS = [
+    "hysteria2://pw@h2.example:443?sni=s.example#节点一",
+    "trojan://pw@t.example:443#b",
+    "vmess://eyJhZGQiOiJ2LmV4YW1wbGUifQ==",
+    "ss://YWVzLTI1Ni1nY206cHc=@[2001:db8::1]:8388#c",
+]
+TEXT = "# 订阅\n" + "\n".join(LINKS) + "\n尾部说明 vless://uuid@v.example:443?security=tls"
+
+def scan(chunks):
+    scanner = StreamingLinkScanner()
+    for chunk in chunks:
+        scanner.feed(chunk)
+    return scanner.close()
+
+def test_single_chunk_matches_findall():
+    assert scan([TEXT]) == LINK_PATTERN.findall(TEXT)
+
+@pytest.mark.parametrize("cut", range(1, len(TEXT)))
+def test_every_two_chunk_split_matches_findall(cut):
+    assert scan([TEXT[:cut], TEXT[cut:]]) == LINK_PATTERN.findall(TEXT)
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 64])
+def test_small_chunks_match_findall(size):
+    assert scan([TEXT[i:i + size] for i in range(0, len(TEXT), size)]) == LINK_PATTERN.findall(TEXT)
+
+def feed_all(stream, data, size, first=None):
+    """first 为首块长度 (格式在首块上判定)，之后按 size 分块"""
+    first = first or size
+    chunks = [data[:first]] + [data[i:i + size] for i in range(first, len(data), size)]
+    return all(stream.feed(chunk) for chunk in chunks)
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_link_body_is_scanned_without_buffering(size):
+    data = TEXT.split("\n", 1)[1].encode("utf-8")  # 以链接开头，按明文链接流式扫描
+    stream = StreamingBody("utf-8")
+    assert feed_all(stream, data, size, first=40)
+    assert stream.scanner is not None and stream.chunks == []
+    assert stream.scanner.close() == LINK_PATTERN.findall(data.decode("utf-8"))
+
+def test_tiny_first_chunk_falls_back_to_buffering():
+    # 首块不足以识别协议头时缓存原文走完整解析，结果仍然完整
+    data = TEXT.split("\n", 1)[1].encode("utf-8")
+    stream = StreamingBody("utf-8")
+    assert feed_all(stream, data, 1)
+    assert stream.scanner is None and b"".join(stream.chunks) == data
+
+def test_multibyte_character_split_across_chunks():
+    data = ("trojan://pw@t.example:443#节点\n" * 3).encode("utf-8")
+    stream = StreamingBody("utf-8")
+    assert feed_all(stream, data, 1, first=28)  # 首块在 "节" 的 UTF-8 字节中间截断
+    assert stream.scanner.close() == ["trojan://pw@t.example:443#"] * 3
+
+def test_clash_body_with_leading_link_is_buffered():
+    data = b"trojan://pw@t.example:443#comment\nproxies:\n  - {name: a}\n"
+    stream = StreamingBody(None)
+    assert feed_all(stream, data, 8)
+    assert stream.scanner is None and b"".join(stream.chunks) == data
+
+def test_binary_first_chunk_aborts():
+    stream = StreamingBody(None)
+    assert not stream.feed(b"PK\x03\x04\x00\x00")
+    assert stream.aborted == "binary"
+
+def test_oversize_aborts(monkeypatch):
+    monkeypatch.setattr(aggregator, "MAX_FILE_BYTES", 10)
+    stream = StreamingBody(None)
+    assert stream.feed(b"0123456789")
+    assert not stream.feed(b"x")
+    assert stream.aborted == "oversize"
+
+@pytest.mark.parametrize("content_type,length,reason", [
+    ("image/png", None, "binary"),
+    ("text/plain", str(aggregator.MAX_FILE_BYTES + 1), "oversize"),
+    ("text/plain; charset=utf-8", "100", None),
+])
+def test_headers_reject_early(content_type, length, reason):
+    stream = StreamingBody(None)
+    assert stream.accept_headers(content_type, length) == (reason is None)
+    assert stream.aborted == reason
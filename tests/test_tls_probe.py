@@ -0,0 +1,63 @@
+import ssl
+import asyncio
+
+from check_active import TLSProbe
+
+def handshake_n(tls, port, sni, n):
+    async def main():
+        for _ in range(n):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                await tls.handshake(writer, "127.0.0.1", port, sni)
+            finally:
+                writer.close()
+    asyncio.run(main())
+
+def spy_wrap_bio(monkeypatch):
+    """记录每次 wrap_bio 实际传入的 session 与上下文"""
+    calls = []
+    original = ssl.SSLContext.wrap_bio
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        calls.append((self, session))
+        return original(self, incoming, outgoing, server_side, server_hostname, session)
+
+    monkeypatch.setattr(ssl.SSLContext, "wrap_bio", wrap_bio)
+    return calls
+
+def test_all_handshakes_share_one_context(tls_server, monkeypatch):
+    port, _ = tls_server
+    calls = spy_wrap_bio(monkeypatch)
+    tls = TLSProbe()
+    handshake_n(tls, port, "localhost", 3)
+    assert tls.handshakes == 3
+    assert {id(context) for context, _ in calls} == {id(tls.context)}
+
+def test_session_is_cached_per_endpoint_and_offered_on_reconnect(tls_server, monkeypatch):
+    port, _ = tls_server
+    calls = spy_wrap_bio(monkeypatch)
+    tls = TLSProbe(reuse_sessions=True)
+    handshake_n(tls, port, "localhost", 2)
+    key = ("127.0.0.1", port, "localhost")
+    assert list(tls.sessions) == [key]
+    # 首次握手没有可用会话；第二次把第一次拿到的会话交给 wrap_bio
+    assert calls[0][1] is None
+    assert calls[1][1] is not None
+
+def test_other_sni_does_not_reuse_the_session(tls_server, monkeypatch):
+    port, _ = tls_server
+    calls = spy_wrap_bio(monkeypatch)
+    tls = TLSProbe(reuse_sessions=True)
+    handshake_n(tls, port, "a.example", 1)
+    handshake_n(tls, port, "b.example", 1)
+    assert len(tls.sessions) == 2
+    assert [session for _, session in calls] == [None, None]
+
+def test_reuse_disabled_keeps_no_sessions(tls_server, monkeypatch):
+    port, _ = tls_server
+    calls = spy_wrap_bio(monkeypatch)
+    tls = TLSProbe(reuse_sessions=False)
+    handshake_n(tls, port, "localhost", 2)
+    assert tls.sessions == {}
+    assert [session for _, session in calls] == [None, None]
+    assert "会话复用 0/2" in tls.summary()
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from node_model import FingerprintSet
+
+# --- 产出统计：爬取阶段 (aggregator.py) 与检测阶段 (pipeline.py) 共用的跨运行状态 ---
+# 爬取阶段记录每个 关键词|后缀 组合找到的文件数与新增节点数，并按来源文件把 命中组合 + 首次带来的节点指纹 写入 NODE_SOURCES_FILE；
+# 检测阶段据此统计各组合最终通过检测的节点数，下一轮爬取按历史产出优先搜索高产组合；
+# 同样的统计也按 仓库 / 仓库:路径 记录为来源信誉，下载队列按信誉优先下载历史上高产的文件
+
+CACHE_DIR = ".cache"
+SEARCH_STATS_FILE = os.path.join(CACHE_DIR, "search_stats.json")
+SOURCE_REPUTATION_FILE = os.path.join(CACHE_DIR, "source_reputation.json")
+NODE_SOURCES_FILE = "node_sources.json" # 与 nodes.txt 一同随工件传递到检测阶段
+NODE_SOURCES_VERSION = 2 # 按来源文件记录节点 (64 位指纹，与 FingerprintSet.digest 一致)
+
+STATS_DECAY = 0.8        # 每参与一轮搜索，历史统计衰减一次，使评分逐步反映近期产出
+NEW_NODE_WEIGHT = 0.2    # 新增节点相对于存活节点的权重
+YIELD_PRIOR = 5.0        # 先验产出：未搜索过的组合获得乐观评分，保证会被探索
+REPUTATION_MAX_ENTRIES = 50000 # 来源信誉条目上限，超出时淘汰最久未出现的来源
+
+def _load_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+def _save_json(path: str, data) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def combo_key(keyword: str, ext: str) -> str:
+    return f"{keyword}|{ext}"
+
+def source_key(repo: str, path: str) -> str:
+    """文件来源标识: 仓库全名:文件路径"""
+    return f"{repo}:{path}"
+
+def _yield_score(entry: Optional[Dict[str, float]]) -> float:
+    """预期产出：(存活 + 新增节点加权 + 先验) / (衰减后的轮数 + 1)"""
+    if not entry:
+        return YIELD_PRIOR
+    gain = entry.get("alive", 0) + NEW_NODE_WEIGHT * entry.get("new_nodes", 0) + YIELD_PRIOR
+    return gain / (entry.get("runs", 0) + 1)
+
+def _decay_entry(entries: Dict[str, Dict[str, float]], key: str) -> Dict[str, float]:
+    """取出条目并衰减一次历史值 (每参与一轮调用一次)，轮数加一"""
+    entry = entries.setdefault(key, {"runs": 0, "files": 0, "new_nodes": 0, "alive": 0})
+    for field in ("runs", "files", "new_nodes", "alive"):
+        entry[field] = entry.get(field, 0) * STATS_DECAY
+    entry["runs"] += 1
+    entry["last_run"] = time.time()
+    return entry
+
+class SearchStats:
+    """每个 关键词|后缀 组合的衰减产出统计: runs / files / new_nodes / alive"""
+
+    def __init__(self, path: str = SEARCH_STATS_FILE):
+        self.path = path
+        data = _load_json(path, {})
+        self.combos: Dict[str, Dict[str, float]] = data.get("combos", {})
+        self.alive_recorded_run: Optional[float] = data.get("alive_recorded_run")
+
+    def score(self, combo: str) -> float:
+        return _yield_score(self.combos.get(combo))
+
+    def order(self, combos: Iterable[str]) -> List[str]:
+        """按预期产出从高到低排序，同分时随机打散"""
+        combos = list(combos)
+        random.shuffle(combos)
+        return sorted(combos, key=self.score, reverse=True)
+
+    def record_crawl(self, run_counts: Dict[str, Dict[str, int]]) -> None:
+        """记录本轮搜索过的组合：先衰减历史值，再累加本轮的文件数与新增节点数"""
+        for combo, counts in run_counts.items():
+            entry = _decay_entry(self.combos, combo)
+            entry["files"] += counts.get("files", 0)
+            entry["new_nodes"] += counts.get("new_nodes", 0)
+
+    def record_alive(self, crawl_run: float, alive_counts: Dict[str, int]) -> bool:
+        """记录检测阶段各组合的存活节点数；同一轮爬取结果只计入一次 (复用旧工件时不重复累加)"""
+        if self.alive_recorded_run == crawl_run:
+            return False
+        for combo, count in alive_counts.items():
+            entry = self.combos.setdefault(combo, {"runs": 1, "files": 0, "new_nodes": 0, "alive": 0})
+            entry["alive"] = entry.get("alive", 0) + count
+        self.alive_recorded_run = crawl_run
+        return True
+
+    def save(self) -> None:
+        _save_json(self.path, {"combos": self.combos, "alive_recorded_run": self.alive_recorded_run})
+
+class SourceReputation:
+    """
+    文件来源信誉：按仓库 (r:仓库) 与具体文件 (p:仓库:路径) 两级记录衰减产出
+    runs 为出现轮数，new_nodes 为提取到的节点数，alive 为最终通过检测的节点数；
+    文件有记录时按文件评分，否则沿用所在仓库的评分，两者都没有时取先验
+    """
+
+    def __init__(self, path: str = SOURCE_REPUTATION_FILE, max_entries: int = REPUTATION_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        data = _load_json(path, {})
+        self.entries: Dict[str, Dict[str, float]] = data.get("entries", {})
+        self.alive_recorded_run: Optional[float] = data.get("alive_recorded_run")
+
+    @staticmethod
+    def _keys(source: str) -> Tuple[str, str]:
+        return "p:" + source, "r:" + source.split(":", 1)[0]
+
+    def score(self, source: str) -> float:
+        path_key, repo_key = self._keys(source)
+        entry = self.entries.get(path_key) or self.entries.get(repo_key)
+        return _yield_score(entry)
+
+    def record_crawl(self, file_counts: Dict[str, int]) -> None:
+        """记录本轮下载过的文件及其提取到的节点数 (同一仓库本轮只衰减一次)"""
+        repo_counts: Dict[str, List[int]] = {}
+        for source, nodes in file_counts.items():
+            path_key, repo_key = self._keys(source)
+            _decay_entry(self.entries, path_key)["new_nodes"] += nodes
+            counts = repo_counts.setdefault(repo_key, [0, 0])
+            counts[0] += 1
+            counts[1] += nodes
+        for repo_key, (files, nodes) in repo_counts.items():
+            entry = _decay_entry(self.entries, repo_key)
+            entry["files"] += files
+            entry["new_nodes"] += nodes
+
+    def record_alive(self, crawl_run: float, alive_counts: Dict[str, int]) -> bool:
+        """记录各文件最终存活的节点数，同时计入所在仓库；同一轮爬取结果只计入一次"""
+        if self.alive_recorded_run == crawl_run:
+            return False
+        for source, count in alive_counts.items():
+            for key in self._keys(source):
+                entry = self.entries.setdefault(key, {"runs": 1, "files": 0, "new_nodes": 0, "alive": 0})
+                entry["alive"] = entry.get("alive", 0) + count
+        self.alive_recorded_run = crawl_run
+        return True
+
+    def save(self) -> None:
+        if len(self.entries) > self.max_entries:
+            recent = sorted(self.entries.items(), key=lambda kv: kv[1].get("last_run", 0), reverse=True)
+            self.entries = dict(recent[:self.max_entries])
+        _save_json(self.path, {"entries": self.entries, "alive_recorded_run": self.alive_recorded_run})
+
+def save_node_sources(path: str, crawl_run: float, files: Dict[str, Tuple[str, Iterable[int]]]) -> None:
+    """写出 来源文件 -> (命中组合, 该文件首次带来的节点 64 位指纹) 映射"""
+    _save_json(path, {
+        "version": NODE_SOURCES_VERSION,
+        "run": crawl_run,
+        "files": {source: {"combo": combo, "nodes": [f"{digest:016x}" for digest in digests]} for source, (combo, digests) in files.items()},
+    })
+
+def load_node_sources(path: str = NODE_SOURCES_FILE) -> Dict:
+    data = _load_json(path, {})
+    if data.get("version") != NODE_SOURCES_VERSION:
+        return {"run": None, "files": {}}
+    return data
+
+def node_source_index(node_sources: Dict) -> Dict[int, str]:
+    """64 位节点指纹 -> 来源文件 (仓库:路径)"""
+    return {
+        int(digest, 16): source
+        for source, entry in (node_sources.get("files") or {}).items()
+        for digest in entry.get("nodes", ())
+    }
+
+def record_check_results(alive_fingerprints: Iterable[str], sources_path: str = NODE_SOURCES_FILE) -> Dict[str, int]:
+    """检测阶段回填：按来源文件统计各组合 / 各来源文件的存活节点数，写入搜索统计与来源信誉"""
+    node_sources = load_node_sources(sources_path)
+    files = node_sources.get("files") or {}
+    if not files:
+        return {}
+    alive = {FingerprintSet.digest(fingerprint) for fingerprint in alive_fingerprints}
+    crawl_run = node_sources.get("run")
+    alive_counts: Dict[str, int] = {}
+    file_alive: Dict[str, int] = {}
+    for source, entry in files.items():
+        count = sum(1 for digest in entry.get("nodes", ()) if int(digest, 16) in alive)
+        if count:
+            file_alive[source] = count
+            alive_counts[entry["combo"]] = alive_counts.get(entry["combo"], 0) + count
+    stats = SearchStats()
+    if stats.record_alive(crawl_run, alive_counts):
+        stats.save()
+    reputation = SourceReputation()
+    if reputation.record_alive(crawl_run, file_alive):
+        reputation.save()
+    return alive_counts